@@ -1,30 +1,46 @@
 """
 Data query API endpoints
+
+Handlers are plain functions: their database queries and Arrow scans are
+blocking, so FastAPI runs them in its threadpool instead of on the event
+loop, where they would stall every other request (progress streams too).
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List, Optional
+from sqlalchemy import func, and_, or_, distinct
+from typing import List, Literal, Optional
+from datetime import date, timedelta
+import base64
+import json
+from .. import result_store
 from ..database import get_db
-from ..models import Job, Upload, EmployeeSummary, Transaction, QualifierTracker
+from ..models import Job, Upload, EmployeeSummary, Transaction, QualifierTracker, JobRollup
 from ..schemas import (
     EmployeeSummaryItem, TransactionItem, QualifierTrackerItem,
-    HistoryItem, StatisticsResponse
+    HistoryItem, StatisticsResponse, RollupItem, AggregateItem
 )
 from ..config import OUTPUT_DIR
+from ..responses import table_response
 
 router = APIRouter()
 
 @router.get("/data/summary", response_model=List[EmployeeSummaryItem])
-async def get_summary(
+def get_summary(
+    request: Request,
     job_id: str,
     store_code: Optional[str] = None,
     lob: Optional[str] = None,
     role: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Get employee summary data with optional filters"""
+    """Get employee summary data with optional filters (JSON, Arrow or Parquet)"""
+    if result_store.has_results(job_id):
+        results = result_store.query_table(job_id, 'summary', result_store.equality_filter(
+            store_code=store_code, role=role
+        ))
+        return table_response(request, results, EmployeeSummaryItem)
+
     query = db.query(EmployeeSummary).filter(EmployeeSummary.job_id == job_id)
 
     if store_code:
@@ -33,49 +49,237 @@ async def get_summary(
         query = query.filter(EmployeeSummary.role == role)
 
     results = query.all()
-    return results
+    return table_response(request, results, EmployeeSummaryItem)
 
 @router.get("/data/tracker", response_model=List[QualifierTrackerItem])
-async def get_tracker(job_id: str, db: Session = Depends(get_db)):
-    """Get qualifier tracker data"""
+def get_tracker(request: Request, job_id: str, db: Session = Depends(get_db)):
+    """Get qualifier tracker data (JSON, Arrow or Parquet)"""
+    if result_store.has_results(job_id):
+        return table_response(request, result_store.query_table(job_id, 'tracker'), QualifierTrackerItem)
+
     results = db.query(QualifierTracker).filter(QualifierTracker.job_id == job_id).all()
-    return results
+    return table_response(request, results, QualifierTrackerItem)
+
+# Sortable transaction columns (each backed by a (job_id, column, id) index)
+TRANSACTION_SORT_COLUMNS = {
+    'id': Transaction.id,
+    'store_code': Transaction.store_code,
+    'ince_amt': Transaction.ince_amt,
+    'net_sales_value': Transaction.net_sales_value
+}
+
+MAX_DATE_RANGE_DAYS = 3660
+
+def encode_cursor(sort, value, row_id):
+    """Opaque cursor pointing just past a row in the given sort order"""
+    return base64.urlsafe_b64encode(json.dumps([sort, value, row_id]).encode()).decode()
+
+def decode_cursor(cursor, sort):
+    """Return (sort value, id) from a cursor made for the same sort"""
+    try:
+        cursor_sort, value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if cursor_sort != sort:
+        raise HTTPException(status_code=400, detail="Cursor was made for a different sort")
+    return value, row_id
+
+def sales_date_values(date_from, date_to):
+    """
+    Stored sales_date strings for every day in a range
+
+    Sales dates are stored as text as they came out of the export
+    (DD/MM/YYYY, or YYYY-MM-DD 00:00:00 for real Excel dates), so a range is
+    matched as an IN list of days rather than a string comparison.
+    """
+    days = (date_to - date_from).days + 1
+    if days > MAX_DATE_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range is limited to {MAX_DATE_RANGE_DAYS} days")
+
+    values = []
+    for i in range(max(days, 0)):
+        day = date_from + timedelta(days=i)
+        values += [day.strftime('%d/%m/%Y'), day.strftime('%Y-%m-%d 00:00:00')]
+    return values
+
+class TransactionFilters:
+    """Transaction filter query parameters, shared by the transaction endpoints"""
+
+    def __init__(
+        self,
+        store_code: Optional[str] = None,
+        lob: Optional[str] = None,
+        salesman: Optional[str] = None,
+        sm: Optional[str] = None,
+        dm: Optional[str] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        min_incentive: Optional[float] = None,
+        max_incentive: Optional[float] = None
+    ):
+        self.store_code = store_code
+        self.lob = lob
+        self.salesman = salesman
+        self.sm = sm
+        self.dm = dm
+        self.sales_dates = None
+        if date_from or date_to:
+            self.sales_dates = sales_date_values(date_from or date_to, date_to or date_from)
+        self.min_incentive = min_incentive
+        self.max_incentive = max_incentive
+
+    def conditions(self):
+        """SQL conditions on Transaction"""
+        conditions = [
+            column == value
+            for column, value in [
+                (Transaction.store_code, self.store_code), (Transaction.lob, self.lob),
+                (Transaction.salesman, self.salesman), (Transaction.sm, self.sm), (Transaction.dm, self.dm)
+            ]
+            if value
+        ]
+        if self.sales_dates is not None:
+            conditions.append(Transaction.sales_date.in_(self.sales_dates))
+        if self.min_incentive is not None:
+            conditions.append(Transaction.ince_amt >= self.min_incentive)
+        if self.max_incentive is not None:
+            conditions.append(Transaction.ince_amt <= self.max_incentive)
+        return conditions
+
+    def expression(self):
+        """Result store filter expression (None = no filter)"""
+        return result_store.transaction_filter(
+            store_code=self.store_code, lob=self.lob, salesman=self.salesman, sm=self.sm, dm=self.dm,
+            sales_dates=self.sales_dates, min_incentive=self.min_incentive, max_incentive=self.max_incentive
+        )
 
 @router.get("/data/transactions", response_model=List[TransactionItem])
-async def get_transactions(
+def get_transactions(
+    request: Request,
+    response: Response,
     job_id: str,
-    limit: int = Query(100, le=1000),
-    offset: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
+    sort: Literal['id', 'store_code', 'ince_amt', 'net_sales_value'] = 'id',
+    descending: bool = False,
+    filters: TransactionFilters = Depends(),
     db: Session = Depends(get_db)
 ):
-    """Get transaction data with pagination"""
-    results = db.query(Transaction).filter(
-        Transaction.job_id == job_id
-    ).offset(offset).limit(limit).all()
-    return results
+    """
+    Get transaction data one page at a time, with optional filters (JSON,
+    Arrow or Parquet)
+
+    Pages use keyset pagination on (sort column, id): when more rows
+    follow, the X-Next-Cursor response header holds the cursor for the
+    next page. offset still skips rows for older clients, but only without
+    a cursor, and it gets slower the deeper it goes.
+    """
+    if cursor and offset:
+        raise HTTPException(status_code=400, detail="Use either cursor or offset, not both")
+    after = decode_cursor(cursor, sort) if cursor else None
+
+    if result_store.has_results(job_id):
+        results = result_store.query_transactions(
+            job_id, filters.expression(), sort, descending, after, offset + limit + 1
+        ).slice(offset)
+        if len(results) > limit:
+            results = results.slice(0, limit)
+            last = results.slice(limit - 1).to_pylist()[0]
+            response.headers["X-Next-Cursor"] = encode_cursor(sort, last[sort], last['id'])
+        return table_response(request, results, TransactionItem, response.headers)
+
+    query = db.query(Transaction).filter(Transaction.job_id == job_id, *filters.conditions())
+
+    sort_col = TRANSACTION_SORT_COLUMNS[sort]
+    if after:
+        value, row_id = after
+        if sort == 'id':
+            condition = Transaction.id < row_id if descending else Transaction.id > row_id
+        elif descending:
+            condition = or_(sort_col < value, and_(sort_col == value, Transaction.id < row_id))
+        else:
+            condition = or_(sort_col > value, and_(sort_col == value, Transaction.id > row_id))
+        query = query.filter(condition)
+
+    if descending:
+        query = query.order_by(sort_col.desc(), Transaction.id.desc())
+    else:
+        query = query.order_by(sort_col, Transaction.id)
+
+    results = query.offset(offset).limit(limit + 1).all()
+    if len(results) > limit:
+        results = results[:limit]
+        last = results[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(sort, getattr(last, sort), last.id)
+    return table_response(request, results, TransactionItem, response.headers)
+
+@router.get("/data/aggregate", response_model=List[AggregateItem], response_model_exclude_unset=True)
+def get_aggregate(
+    job_id: List[str] = Query(...),
+    by: List[Literal['store_code', 'store_name', 'lob', 'salesman', 'sm', 'dm', 'sales_date']] = Query([]),
+    filters: TransactionFilters = Depends(),
+    db: Session = Depends(get_db)
+):
+    """
+    Totals of lines, bills, sales and incentive across one or more jobs,
+    grouped by the by columns (one overall row if none are given)
+    """
+    job_id, by = list(dict.fromkeys(job_id)), list(dict.fromkeys(by))
+    stored_jobs = [j for j in job_id if result_store.has_results(j)]
+    database_jobs = [j for j in job_id if j not in stored_jobs]
+
+    if not stored_jobs:
+        group_cols = [getattr(Transaction, column) for column in by]
+        query = db.query(
+            *group_cols,
+            func.count().label('lines'),
+            func.count(distinct(Transaction.bill_no)).label('bills'),
+            func.coalesce(func.sum(Transaction.net_sales_value), 0).label('sales_with_gst'),
+            func.coalesce(func.sum(Transaction.sales_without_gst), 0).label('sales_without_gst'),
+            func.coalesce(func.sum(Transaction.ince_amt), 0).label('incentive')
+        ).filter(Transaction.job_id.in_(database_jobs), *filters.conditions())
+        rows = query.group_by(*group_cols).order_by(*group_cols).all()
+        # An overall total over no matching lines is an empty result, as in the result store
+        return [row._asdict() for row in rows if row.lines]
+
+    # Jobs saved before the result store existed are read row by row and
+    # aggregated together with the Parquet jobs
+    rows = None
+    if database_jobs:
+        columns = [getattr(Transaction, column) for column in result_store.aggregate_columns(by)]
+        rows = [row._asdict() for row in db.query(*columns).filter(
+            Transaction.job_id.in_(database_jobs), *filters.conditions()
+        )]
+    return result_store.aggregate_transactions(stored_jobs, by, filters.expression(), rows)
 
 @router.get("/data/statistics", response_model=StatisticsResponse)
-async def get_statistics(job_id: str, db: Session = Depends(get_db)):
-    """Get aggregate statistics for a job"""
+def get_statistics(job_id: str, db: Session = Depends(get_db)):
+    """Get aggregate statistics for a job (from its rollups)"""
     job = db.query(Job).filter(Job.id == job_id).first()
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
 
-    # Get total sales
-    total_sales = db.query(func.sum(Transaction.sales_without_gst)).filter(
-        Transaction.job_id == job_id
-    ).scalar() or 0
-
-    # Get unique stores and LOBs
-    stores = db.query(Transaction.store_name).filter(
-        Transaction.job_id == job_id
-    ).distinct().all()
-    stores = [s[0] for s in stores]
+    rollups = db.query(JobRollup).filter(
+        JobRollup.job_id == job_id,
+        JobRollup.dimension.in_(['total', 'store', 'lob'])
+    ).order_by(JobRollup.id).all()
 
-    lobs = db.query(Transaction.lob).filter(
-        Transaction.job_id == job_id
-    ).distinct().all()
-    lobs = [l[0] for l in lobs]
+    if rollups:
+        total_sales = sum(r.sales_without_gst for r in rollups if r.dimension == 'total')
+        stores = [r.label for r in rollups if r.dimension == 'store']
+        lobs = [r.key for r in rollups if r.dimension == 'lob']
+    else:
+        # Jobs saved before rollups existed
+        total_sales = db.query(func.sum(Transaction.sales_without_gst)).filter(
+            Transaction.job_id == job_id
+        ).scalar() or 0
+        stores = [s[0] for s in db.query(Transaction.store_name).filter(
+            Transaction.job_id == job_id
+        ).distinct().all()]
+        lobs = [l[0] for l in db.query(Transaction.lob).filter(
+            Transaction.job_id == job_id
+        ).distinct().all()]
 
     return StatisticsResponse(
         total_sales=float(total_sales),
@@ -87,8 +291,22 @@ async def get_statistics(job_id: str, db: Session = Depends(get_db)):
         lobs=lobs
     )
 
+@router.get("/data/rollups", response_model=List[RollupItem])
+def get_rollups(
+    job_id: str,
+    dimension: Optional[Literal['total', 'store', 'lob', 'role', 'date']] = None,
+    db: Session = Depends(get_db)
+):
+    """Get per-job totals by store, LOB, role or sales date (all dimensions if none is given)"""
+    query = db.query(JobRollup).filter(JobRollup.job_id == job_id)
+
+    if dimension:
+        query = query.filter(JobRollup.dimension == dimension)
+
+    return query.order_by(JobRollup.id).all()
+
 @router.get("/download/{job_id}")
-async def download_output(job_id: str, db: Session = Depends(get_db)):
+def download_output(job_id: str, db: Session = Depends(get_db)):
     """Download processed output file"""
     job = db.query(Job).filter(Job.id == job_id).first()
     if not job:
@@ -108,7 +326,7 @@ async def download_output(job_id: str, db: Session = Depends(get_db)):
     )
 
 @router.get("/history", response_model=List[HistoryItem])
-async def get_history(
+def get_history(
     limit: int = Query(10, le=100),
     offset: int = 0,
     db: Session = Depends(get_db)
@@ -3,31 +3,124 @@ File upload API endpoint
 """
 from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
 from sqlalchemy.orm import Session
+import hashlib
+import io
 import uuid
 from pathlib import Path
 from datetime import datetime
 from ..database import get_db
 from ..models import Upload
 from ..schemas import UploadResponse
-from ..config import UPLOAD_DIR
+from ..calculator import SALES_SHEET_NAME
+from ..config import UPLOAD_DIR, UPLOAD_CHUNK_SIZE, MAX_UPLOAD_BYTES, UPLOAD_VALIDATE_HEADER
+from utils.ingest import SUPPORTED_EXTENSIONS, detect_format, missing_columns, read_header
 
 router = APIRouter()
 
+# Multipart framing around the file in Content-Length (boundaries, part headers)
+MULTIPART_OVERHEAD = 64 * 1024
+TOO_LARGE_DETAIL = f"File is larger than {round(MAX_UPLOAD_BYTES / (1024 * 1024), 1):g} MB"
+
+# CSV headers are checked from the first line, before the rest is copied
+CSV_HEADER_MAX_BYTES = 64 * 1024
+
+def declared_too_large(content_length):
+    """True if a request's Content-Length already rules the upload out"""
+    return bool(content_length) and content_length.isdigit() and int(content_length) > MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD
+
+def validate_header(header):
+    """Raise a 400 unless the header has every required column"""
+    missing_cols = missing_columns(header)
+    if missing_cols:
+        raise HTTPException(status_code=400, detail=f"Missing columns: {missing_cols}")
+
+def validate_csv_head(head):
+    """
+    Check the header of a CSV upload from its first bytes
+
+    Returns True once the check has run, or False if head is not CSV (other
+    formats keep their schema at the end or in a zip directory, so they are
+    checked after the whole file is written).
+    """
+    if detect_format(io.BytesIO(head)) != 'csv':
+        return False
+    first_line = head.split(b'\n', 1)[0]
+    try:
+        header = read_header(io.BytesIO(first_line))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Could not read file: {e}")
+    validate_header(header)
+    return True
+
+def validate_file(path):
+    """Check the header of a stored upload (sheet 'Sales Report - Hometown (2)' for workbooks)"""
+    try:
+        validate_header(read_header(path, SALES_SHEET_NAME))
+    except (ValueError, OSError) as e:
+        raise HTTPException(status_code=400, detail=f"Could not read file: {e}")
+
+async def save_upload(file, path, validate=False):
+    """
+    Copy an upload to its final path in fixed-size chunks
+
+    Starlette has already received the whole multipart body into a spooled
+    temporary file by the time this runs, so the only rejection that happens
+    before the body is read is the Content-Length check (declared_too_large,
+    in the limit_upload_size middleware). Here only one chunk is held in
+    memory at a time while the SHA-256 and size are computed, and the copy
+    stops (and the partial file is removed) once it grows past
+    MAX_UPLOAD_BYTES, e.g. for chunked requests without a Content-Length, or,
+    for CSV, once its header turns out to be missing columns.
+
+    Returns: (size in bytes, SHA-256 hex digest)
+    """
+    digest = hashlib.sha256()
+    size = 0
+    head = b'' if validate else None
+    try:
+        with open(path, "wb") as f:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_UPLOAD_BYTES:
+                    raise HTTPException(status_code=413, detail=TOO_LARGE_DETAIL)
+                digest.update(chunk)
+                f.write(chunk)
+
+                if head is not None:
+                    head += chunk[:CSV_HEADER_MAX_BYTES]
+                    if b'\n' in head or len(head) >= CSV_HEADER_MAX_BYTES:
+                        checked = validate_csv_head(head)
+                        head = None
+                        validate = not checked
+
+        if validate:
+            validate_file(path)
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+
+    return size, digest.hexdigest()
+
 @router.post("/upload", response_model=UploadResponse)
-async def upload_file(file: UploadFile = File(...), db: Session = Depends(get_db)):
-    """Upload an Excel file for processing"""
-    # Validate file type
-    if not file.filename.endswith('.xlsx'):
-        raise HTTPException(status_code=400, detail="Only .xlsx files are allowed")
+async def upload_file(
+    file: UploadFile = File(...),
+    validate: bool = UPLOAD_VALIDATE_HEADER,
+    db: Session = Depends(get_db)
+):
+    """Upload a sales file (.xlsx, .csv, .parquet or Arrow IPC) for processing"""
+    # Validate file type (the actual format is detected from the content when processing)
+    if not file.filename.lower().endswith(tuple(SUPPORTED_EXTENSIONS)):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Only {', '.join(SUPPORTED_EXTENSIONS)} files are allowed"
+        )
 
     # Generate file ID
     file_id = str(uuid.uuid4())
 
     # Save file
-    upload_path = UPLOAD_DIR / f"{file_id}_{file.filename}"
-    with open(upload_path, "wb") as f:
-        content = await file.read()
-        f.write(content)
+    upload_path = UPLOAD_DIR / f"{file_id}_{Path(file.filename).name}"
+    file_size, sha256 = await save_upload(file, upload_path, validate)
 
     # Store metadata in database
     db_upload = Upload(
@@ -35,7 +128,7 @@ async def upload_file(file: UploadFile = File(...), db: Session = Depends(get_db
         filename=file.filename,
         file_path=str(upload_path),
         upload_time=datetime.now(),
-        file_size=len(content)
+        file_size=file_size
     )
     db.add(db_upload)
     db.commit()
@@ -45,5 +138,6 @@ async def upload_file(file: UploadFile = File(...), db: Session = Depends(get_db
         file_id=file_id,
         filename=file.filename,
         upload_time=db_upload.upload_time,
-        file_size=len(content)
+        file_size=file_size,
+        sha256=sha256
     )
@@ -5,11 +5,25 @@ Refactored for FastAPI integration
 Core calculation logic (preserved 100% accuracy)
 """
 
+import numpy as np
 import pandas as pd
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from utils.calculator import employee_lob_points, summarize_employee_points
+from utils.export import write_workbook
+from utils.ingest import load_sales_frame
+from utils.rules import apply_commission_rules
+from .config import CALC_WORKERS, CALC_PARALLEL_MIN_ROWS
+import os
 import warnings
 warnings.filterwarnings('ignore')
 
+SALES_SHEET_NAME = 'Sales Report - Hometown (2)'
+
+INCENTIVE_COLUMNS = ['Ince Amt', 'PE Inc amt', 'SM Inc Amt', 'DM Inc Amt']
+SUMMARY_COLUMNS = ['Store Code', 'Store Name', 'Employee', 'Role',
+                   'Furniture Points', 'Homeware Points', 'Total Points']
+
 # ============================================================================
 # INCENTIVE CALCULATION
 # ============================================================================
@@ -69,35 +83,27 @@ def calculate_incentives(row):
         'DM Inc Amt': dm_incentive
     })
 
+def calculate_incentives_vectorized(df, month=None):
+    """
+    Calculate incentive columns J, M, N, O for every row at once
+
+    Same logic as calculate_incentives, evaluated over whole columns with the
+    commission rule version in force for month (YYYY-MM, defaults to the
+    current month).
+    """
+    return apply_commission_rules(df, month=month, zero_unnamed=False)
+
 # ============================================================================
 # DATA LOADING
 # ============================================================================
 
-def load_sales_data(filepath, sheet_name='Sales Report - Hometown (2)'):
+def load_sales_data(filepath, sheet_name=SALES_SHEET_NAME):
     """Load raw sales data from BI export"""
-    df = pd.read_excel(filepath, sheet_name=sheet_name, header=0)
-
-    required_cols = [
-        'Store Code', 'Name', 'Sales_Doc', 'Sales Date', 'LOB', 'Bill No', 'Salesman',
-        'Sum of NET SALES VALUE', 'Sum of Sales value Without GST', 'SM', 'DM'
-    ]
-
-    missing_cols = [col for col in required_cols if col not in df.columns]
-    if missing_cols:
-        raise ValueError(f"Missing columns: {missing_cols}")
-
-    df = df[required_cols].copy()
-    df['Sum of NET SALES VALUE'] = pd.to_numeric(df['Sum of NET SALES VALUE'], errors='coerce').fillna(0)
-    df['Sum of Sales value Without GST'] = pd.to_numeric(df['Sum of Sales value Without GST'], errors='coerce').fillna(0)
-
-    for col in ['Salesman', 'SM', 'DM']:
-        df[col] = df[col].fillna('-')
+    return load_sales_frame(filepath, sheet_name)
 
-    return df
-
-def process_calculations(df):
-    """Calculate incentives for all transactions"""
-    incentive_cols = df.apply(calculate_incentives, axis=1)
+def process_calculations(df, month=None):
+    """Calculate incentives for all transactions using the rules in force for month (YYYY-MM)"""
+    incentive_cols = calculate_incentives_vectorized(df, month)
     df['Ince Amt'] = incentive_cols['Ince Amt']
     df['PE Inc amt'] = incentive_cols['PE Inc amt']
     df['SM Inc Amt'] = incentive_cols['SM Inc Amt']
@@ -111,40 +117,7 @@ def process_calculations(df):
 
 def create_employee_summary(df):
     """Aggregate incentives by employee"""
-    employees = {}
-
-    # Process each role
-    for role, col in [('PE', 'Salesman'), ('SM', 'SM'), ('DM', 'DM')]:
-        inc_col = 'PE Inc amt' if role == 'PE' else f'{role} Inc Amt'
-        data = df.groupby(['Store Code', 'Name', col, 'LOB'])[inc_col].sum().reset_index()
-
-        for _, row in data.iterrows():
-            emp = row[col]
-            if emp != '-' and row[inc_col] > 0:
-                key = (row['Store Code'], row['Name'], emp, role)
-                if key not in employees:
-                    employees[key] = {
-                        'Store Code': row['Store Code'],
-                        'Store Name': row['Name'],
-                        'Employee': emp,
-                        'Role': role,
-                        'Furniture Points': 0,
-                        'Homeware Points': 0
-                    }
-                if row['LOB'] == 'Furniture':
-                    employees[key]['Furniture Points'] += row[inc_col]
-                else:
-                    employees[key]['Homeware Points'] += row[inc_col]
-
-    summary_df = pd.DataFrame(list(employees.values()))
-
-    if len(summary_df) > 0:
-        summary_df['Total Points'] = summary_df['Furniture Points'] + summary_df['Homeware Points']
-        summary_df = summary_df.round(2)
-        summary_df = summary_df.sort_values(['Store Name', 'Total Points'], ascending=[True, False])
-
-    return summary_df[['Store Code', 'Store Name', 'Employee', 'Role',
-                       'Furniture Points', 'Homeware Points', 'Total Points']]
+    return summarize_employee_points(employee_lob_points(df))[SUMMARY_COLUMNS]
 
 # ============================================================================
 # QUALIFIER TRACKER
@@ -162,84 +135,208 @@ def create_dummy_targets(stores):
         'Homeware Bills Target': 100
     } for store in stores])
 
-def create_qualifier_tracker(df, targets_df):
-    """Calculate store performance vs targets"""
-    store_perf = df.groupby(['Store Code', 'Name', 'LOB']).agg({
+def store_performance(df):
+    """Distinct bills and sales (without GST) per store and LOB"""
+    return df.groupby(['Store Code', 'Name', 'LOB']).agg({
         'Bill No': 'nunique',
         'Sum of Sales value Without GST': 'sum'
-    }).reset_index()
+    })
 
+def create_qualifier_tracker(df, targets_df):
+    """Calculate store performance vs targets"""
+    return track_qualifiers(store_performance(df), targets_df)
+
+def track_qualifiers(store_perf, targets_df):
+    """Compare per-store performance (see store_performance) with targets"""
+    store_perf = store_perf.reset_index()
     store_perf['AOV'] = (store_perf['Sum of Sales value Without GST'] / store_perf['Bill No']).round(0)
     store_perf.rename(columns={'Bill No': 'Actual Bills', 'Name': 'Store Name'}, inplace=True)
 
-    tracker = []
-    for _, row in store_perf.iterrows():
-        target_row = targets_df[targets_df['Store Name'] == row['Store Name']]
-
-        if len(target_row) > 0:
-            target = target_row.iloc[0]
-            lob = row['LOB']
-
-            if lob == 'Furniture':
-                aov_target = target['Furniture AOV Target']
-                bills_target = target['Furniture Bills Target']
-            else:
-                aov_target = target['Homeware AOV Target']
-                bills_target = target['Homeware Bills Target']
-
-            aov_pct = (row['AOV'] / aov_target * 100).round(1)
-            bills_pct = (row['Actual Bills'] / bills_target * 100).round(1)
-
-            if row['AOV'] >= aov_target and row['Actual Bills'] >= bills_target:
-                status = 'met_both'
-            elif row['AOV'] >= aov_target:
-                status = 'aov_met'
-            elif row['Actual Bills'] >= bills_target:
-                status = 'bills_met'
-            else:
-                status = 'both_short'
-
-            tracker.append({
-                'Store Code': row['Store Code'],
-                'Store Name': row['Store Name'],
-                'LOB': lob,
-                'Actual AOV': int(row['AOV']),
-                'Target AOV': int(aov_target),
-                'AOV Achievement %': aov_pct,
-                'Actual Bills': int(row['Actual Bills']),
-                'Target Bills': int(bills_target),
-                'Bills Achievement %': bills_pct,
-                'Qualifier Status': status
-            })
-
-    tracker_df = pd.DataFrame(tracker)
-    if len(tracker_df) > 0:
-        tracker_df = tracker_df.sort_values(['Store Name', 'LOB'])
+    # Tidy targets: one row per store (first wins) with the Furniture/Homeware pairs
+    targets = targets_df.drop_duplicates('Store Name', keep='first')[[
+        'Store Name', 'Furniture AOV Target', 'Furniture Bills Target',
+        'Homeware AOV Target', 'Homeware Bills Target'
+    ]]
+    tracker_df = store_perf.merge(targets, on='Store Name', how='left')
+    tracker_df = tracker_df[tracker_df['Furniture AOV Target'].notna()].reset_index(drop=True)
+
+    # Furniture rows use Furniture targets, everything else uses Homeware targets
+    is_furniture = tracker_df['LOB'] == 'Furniture'
+    aov_target = tracker_df['Furniture AOV Target'].where(is_furniture, tracker_df['Homeware AOV Target'])
+    bills_target = tracker_df['Furniture Bills Target'].where(is_furniture, tracker_df['Homeware Bills Target'])
+
+    aov_met = tracker_df['AOV'] >= aov_target
+    bills_met = tracker_df['Actual Bills'] >= bills_target
+    status = np.select(
+        [aov_met & bills_met, aov_met, bills_met],
+        ['met_both', 'aov_met', 'bills_met'],
+        'both_short'
+    )
+
+    tracker_df = pd.DataFrame({
+        'Store Code': tracker_df['Store Code'],
+        'Store Name': tracker_df['Store Name'],
+        'LOB': tracker_df['LOB'],
+        'Actual AOV': tracker_df['AOV'].astype(int),
+        'Target AOV': aov_target.astype(int),
+        'AOV Achievement %': (tracker_df['AOV'] / aov_target * 100).round(1),
+        'Actual Bills': tracker_df['Actual Bills'].astype(int),
+        'Target Bills': bills_target.astype(int),
+        'Bills Achievement %': (tracker_df['Actual Bills'] / bills_target * 100).round(1),
+        'Qualifier Status': status
+    })
+    tracker_df = tracker_df.sort_values(['Store Name', 'LOB'])
 
     return tracker_df
 
+# ============================================================================
+# PARALLEL EXECUTION
+# ============================================================================
+
+# Columns shipped to the workers: text columns as integer codes, numbers as is
+PARTITION_CODED_COLUMNS = ['Store Code', 'Name', 'LOB', 'Bill No', 'Salesman', 'SM', 'DM']
+PARTITION_NUMERIC_COLUMNS = ['Sum of NET SALES VALUE', 'Sum of Sales value Without GST']
+
+_worker_uniques = None
+
+def calculate_partition(df, month=None):
+    """
+    Incentives plus the per-store aggregates for a set of whole stores
+
+    Every aggregate is grouped by store, so results for disjoint sets of
+    stores can simply be concatenated.
+
+    Returns: (df with incentive columns, employee points, store performance)
+    """
+    df = process_calculations(df, month)
+    return df, employee_lob_points(df), store_performance(df)
+
+def partition_stores(store_codes, n_parts):
+    """
+    Split row positions into n_parts groups of whole stores with similar row counts
+
+    Stores are assigned largest first to the currently smallest partition;
+    rows keep their original order within each partition.
+    """
+    codes, _ = pd.factorize(store_codes, use_na_sentinel=False)
+    rows_per_store = np.bincount(codes)
+
+    part_rows = np.zeros(n_parts, dtype=np.int64)
+    store_part = np.empty(len(rows_per_store), dtype=np.int64)
+    for store in np.argsort(-rows_per_store, kind='stable'):
+        part = int(np.argmin(part_rows))
+        store_part[store] = part
+        part_rows[part] += rows_per_store[store]
+
+    row_part = store_part[codes]
+    return [np.flatnonzero(row_part == part) for part in range(n_parts) if part_rows[part]]
+
+def _init_worker(uniques):
+    """Receive the shared code -> value tables once per worker process"""
+    global _worker_uniques
+    _worker_uniques = uniques
+
+def _calculate_partition_arrays(codes, numbers, month):
+    """Worker entry point: rebuild the partition from arrays and calculate it"""
+    columns = {col: _worker_uniques[col].take(codes[col]) for col in codes}
+    columns.update(numbers)
+    df, points, store_perf = calculate_partition(pd.DataFrame(columns), month)
+    return df[INCENTIVE_COLUMNS].to_numpy(), points, store_perf
+
+def calculate_parallel(df, month=None, workers=None, progress=None):
+    """
+    calculate_partition over store partitions in a process pool
+
+    Each worker gets compact arrays (text columns factorized into integer
+    codes, with the code tables sent once per worker) instead of a pickled
+    DataFrame. Results are merged in the same order the serial path produces.
+    progress(rows) is called with the rows calculated so far as partitions finish.
+    """
+    workers = workers or CALC_WORKERS or os.cpu_count() or 1
+    month = month or datetime.now().strftime("%Y-%m")
+
+    codes, uniques = {}, {}
+    for col in PARTITION_CODED_COLUMNS:
+        codes[col], uniques[col] = pd.factorize(df[col], use_na_sentinel=False)
+        codes[col] = codes[col].astype(np.int32)
+        uniques[col] = np.asarray(uniques[col])
+    numbers = {col: df[col].to_numpy() for col in PARTITION_NUMERIC_COLUMNS}
+
+    partitions = partition_stores(df['Store Code'], workers)
+    incentives = np.empty((len(df), len(INCENTIVE_COLUMNS)))
+    points, store_perf = [], []
+
+    with ProcessPoolExecutor(max_workers=len(partitions), initializer=_init_worker, initargs=(uniques,)) as pool:
+        futures = [
+            pool.submit(
+                _calculate_partition_arrays,
+                {col: values[rows] for col, values in codes.items()},
+                {col: values[rows] for col, values in numbers.items()},
+                month
+            )
+            for rows in partitions
+        ]
+        done = 0
+        for rows, future in zip(partitions, futures):
+            part_incentives, part_points, part_perf = future.result()
+            incentives[rows] = part_incentives
+            points.append(part_points)
+            store_perf.append(part_perf)
+            done += len(rows)
+            if progress:
+                progress(done)
+
+    for i, col in enumerate(INCENTIVE_COLUMNS):
+        df[col] = incentives[:, i]
+
+    # Groups never span partitions, so sorting the concatenation gives the serial groupby order
+    return df, pd.concat(points).sort_index(), pd.concat(store_perf).sort_index()
+
+def calculate_all(df, month=None, workers=None, progress=None):
+    """Run calculate_partition serially, or in parallel for large files when workers allow it"""
+    workers = workers or CALC_WORKERS or os.cpu_count() or 1
+    if workers > 1 and len(df) >= CALC_PARALLEL_MIN_ROWS and df['Store Code'].nunique() > 1:
+        return calculate_parallel(df, month, workers, progress)
+    return calculate_partition(df, month)
+
 # ============================================================================
 # MAIN PROCESSING FUNCTION
 # ============================================================================
 
-def process_incentives(input_file, output_file=None, sheet_name='Sales Report - Hometown (2)'):
+def process_incentives(input_file, output_file=None, sheet_name=SALES_SHEET_NAME, month=None, workers=None,
+                       progress=None):
     """
     Main processing function for API integration
+    month (YYYY-MM) selects the commission rule version; defaults to the current month
+    workers overrides CALC_WORKERS (1 = always serial)
+    progress(stage, rows_done, rows_total) is called as each step starts and
+    as calculation partitions finish (rows_total is None while loading)
     Returns: (df, summary_df, tracker_df, targets_df)
     """
+    report = progress or (lambda stage, rows_done, rows_total: None)
+
     # Process
+    report('loading', 0, None)
     df = load_sales_data(input_file, sheet_name)
-    df = process_calculations(df)
-    summary_df = create_employee_summary(df)
+    total = len(df)
+    report('calculating', 0, total)
+    df, points, store_perf = calculate_all(df, month, workers, lambda rows: report('calculating', rows, total))
+    report('summarizing', total, total)
+    summary_df = summarize_employee_points(points)[SUMMARY_COLUMNS]
     targets_df = create_dummy_targets(sorted(df['Name'].unique()))
-    tracker_df = create_qualifier_tracker(df, targets_df)
+    tracker_df = track_qualifiers(store_perf, targets_df)
 
     # Optionally save output
     if output_file:
-        with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Detailed Transactions', index=False)
-            summary_df.to_excel(writer, sheet_name='Employee Points Summary', index=False)
-            tracker_df.to_excel(writer, sheet_name='Daily Qualifier Tracker', index=False)
-            targets_df.to_excel(writer, sheet_name='Monthly Targets', index=False)
+        write_output(output_file, df, summary_df, tracker_df, targets_df)
 
     return df, summary_df, tracker_df, targets_df
+
+def write_output(output_file, df, summary_df, tracker_df, targets_df):
+    """Write the output workbook (path or binary file object)"""
+    write_workbook(output_file, {
+        'Detailed Transactions': df,
+        'Employee Points Summary': summary_df,
+        'Daily Qualifier Tracker': tracker_df,
+        'Monthly Targets': targets_df
+    })
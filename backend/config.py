@@ -14,10 +14,49 @@ DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{BASE_DIR}/data/database/ho
 UPLOAD_DIR = BASE_DIR / "data" / "uploads"
 OUTPUT_DIR = BASE_DIR / "data" / "outputs"
 
+# Uploads are copied to disk in UPLOAD_CHUNK_SIZE pieces and rejected past
+# MAX_UPLOAD_BYTES (up front when Content-Length declares more, otherwise once
+# received); UPLOAD_VALIDATE_HEADER checks the columns before accepting a file
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 1024 * 1024))
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", 200 * 1024 * 1024))
+UPLOAD_VALIDATE_HEADER = os.getenv("UPLOAD_VALIDATE_HEADER", "1") == "1"
+
 # API settings
 API_HOST = os.getenv("API_HOST", "127.0.0.1")
 API_PORT = int(os.getenv("API_PORT", 8000))
 
+# Calculation processes per job (0 = the CPUs shared evenly between the job
+# workers, 1 = always serial); files smaller than CALC_PARALLEL_MIN_ROWS are
+# calculated serially
+CALC_WORKERS = int(os.getenv("CALC_WORKERS", 0))
+CALC_PARALLEL_MIN_ROWS = int(os.getenv("CALC_PARALLEL_MIN_ROWS", 200_000))
+
+# Rows per executemany/COPY batch when saving job results
+RESULT_INSERT_BATCH_SIZE = int(os.getenv("RESULT_INSERT_BATCH_SIZE", 10_000))
+
+# Where job results go: "parquet" (columnar files under data/outputs/results,
+# rollups in the database) or "database" (every row in the database tables)
+RESULT_STORE = os.getenv("RESULT_STORE", "parquet")
+
+# JSON and Arrow responses at least this large are gzip/zstd compressed
+# for clients that accept it
+RESPONSE_COMPRESSION_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", 1024))
+
+# In-process cache of completed-job responses (total body size, in bytes)
+RESPONSE_CACHE_BYTES = int(os.getenv("RESPONSE_CACHE_BYTES", 64 * 1024 * 1024))
+
+# Job workers started with the API (0 = run `python -m backend.jobs` separately)
+# and how often idle workers poll the queue, in seconds
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", 1.0))
+
+# Claims by workers on other hosts are requeued when a pool starts once older
+# than this many seconds (0 = never); claims from the pool's own host always are
+JOB_CLAIM_TIMEOUT = int(os.getenv("JOB_CLAIM_TIMEOUT", 6 * 60 * 60))
+
+# How often the API reads the progress of jobs someone is watching, in seconds
+PROGRESS_POLL_INTERVAL = float(os.getenv("PROGRESS_POLL_INTERVAL", 0.25))
+
 # Streamlit settings
 STREAMLIT_PORT = int(os.getenv("STREAMLIT_PORT", 8501))
 API_BASE_URL = os.getenv("API_BASE_URL", f"http://{API_HOST}:{API_PORT}/api/v1")
@@ -0,0 +1,404 @@
+"""
+Job queue and worker pool
+
+/process/{file_id} only records a job in the job_queue table. Worker
+processes, each with its own database sessions, claim queued jobs (highest
+priority first, then oldest) and run the calculation, so heavy pandas work
+never runs inside the API server process.
+
+Workers are started with the API (JOB_WORKERS) or on their own:
+    python -m backend.jobs --workers 4
+Run one pool per host: a starting pool requeues every job still claimed by
+a worker on its host.
+"""
+import argparse
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+
+from .calculator import process_incentives, write_output
+from . import result_store
+from .config import CALC_WORKERS, JOB_CLAIM_TIMEOUT, JOB_POLL_INTERVAL, JOB_WORKERS, OUTPUT_DIR, RESULT_STORE
+from .database import SessionLocal
+from .models import Job, JobQueue, Upload
+from .persistence import delete_job_rows, save_job_results, save_job_rollups
+
+class JobCancelled(Exception):
+    """Raised inside a running job once cancellation has been requested"""
+
+# ============================================================================
+# QUEUE
+# ============================================================================
+
+def enqueue_job(db, file_id, priority=0):
+    """Create a queued job for an uploaded file; returns the job id"""
+    job_id = str(uuid.uuid4())
+    db.add(Job(id=job_id, file_id=file_id, status="queued", progress=0))
+    db.flush()
+    db.add(JobQueue(job_id=job_id, priority=priority, enqueued_at=datetime.now()))
+    db.commit()
+    return job_id
+
+def claim_next_job(db, worker_id):
+    """
+    Claim the next unclaimed job for worker_id; returns its id or None
+
+    The claim is a conditional UPDATE, so when two workers race for the same
+    row only one of them gets it and the other moves on to the next job.
+    """
+    while True:
+        job_id = db.execute(
+            select(JobQueue.job_id)
+            .where(JobQueue.claimed_at.is_(None))
+            .order_by(JobQueue.priority.desc(), JobQueue.enqueued_at)
+            .limit(1)
+        ).scalar()
+        if job_id is None:
+            db.rollback()
+            return None
+
+        now = datetime.now()
+        claimed = db.execute(
+            update(JobQueue)
+            .where(JobQueue.job_id == job_id, JobQueue.claimed_at.is_(None))
+            .values(claimed_by=worker_id, claimed_at=now)
+        ).rowcount
+        if claimed:
+            db.execute(update(Job).where(Job.id == job_id).values(status="processing", started_at=now))
+            db.commit()
+            return job_id
+        db.rollback()
+
+def cancel_job(db, job_id):
+    """
+    Cancel a job; returns its status afterwards
+
+    Queued jobs are cancelled straight away. Running jobs are flagged and
+    stop (discarding their results) at the next progress update.
+    """
+    job = db.get(Job, job_id)
+    if job is None or job.status not in ("queued", "processing"):
+        return job.status if job else None
+
+    removed = db.query(JobQueue).filter(
+        JobQueue.job_id == job_id, JobQueue.claimed_at.is_(None)
+    ).delete(synchronize_session=False)
+    if removed:
+        job.status = "cancelled"
+        job.progress = 0
+        job.completed_at = datetime.now()
+    else:
+        db.query(JobQueue).filter(JobQueue.job_id == job_id).update(
+            {JobQueue.cancel_requested: True}, synchronize_session=False
+        )
+    db.commit()
+    return job.status
+
+def requeue_jobs(db, worker_ids):
+    """Put jobs claimed by the given (dead) workers back in the queue"""
+    claimed = [row[0] for row in db.execute(
+        select(JobQueue.job_id).where(JobQueue.claimed_by.in_(worker_ids))
+    )]
+    if not claimed:
+        return []
+
+    db.execute(
+        update(JobQueue).where(JobQueue.job_id.in_(claimed)).values(claimed_by=None, claimed_at=None)
+    )
+    db.execute(update(Job).where(Job.id.in_(claimed)).values(
+        status="queued", progress=0, stage=None, rows_processed=None
+    ))
+    db.commit()
+    return claimed
+
+def requeue_stale_jobs(db, timeout=JOB_CLAIM_TIMEOUT):
+    """
+    Put back jobs whose worker died without releasing them (crash, OOM kill, restart)
+
+    Called by a worker pool before it starts its workers, so every claim from
+    this host is left over from an earlier pool and is requeued. (Worker ids
+    carry a per-start token rather than relying on PIDs, which a restarted
+    container hands out again.) Claims from other hosts are requeued once
+    older than timeout seconds (0 = never).
+    """
+    host = socket.gethostname()
+    cutoff = datetime.now() - timedelta(seconds=timeout) if timeout else None
+    stale = set()
+    for worker_id, claimed_at in db.execute(
+        select(JobQueue.claimed_by, JobQueue.claimed_at).where(JobQueue.claimed_at.is_not(None))
+    ):
+        if worker_id.split(":", 1)[0] == host or (cutoff is not None and claimed_at < cutoff):
+            stale.add(worker_id)
+    db.rollback()
+    return requeue_jobs(db, list(stale)) if stale else []
+
+# ============================================================================
+# RUNNING JOBS
+# ============================================================================
+
+# Progress (percent) when each stage starts; calculating advances towards
+# summarizing as partitions finish
+STAGE_PROGRESS = {'loading': 5, 'calculating': 15, 'summarizing': 45, 'writing output': 50, 'saving': 80}
+
+def _set_progress(db, job_id, stage, rows_done=None, rows_total=None):
+    """Commit job stage and progress, unless the job has been cancelled in the meantime"""
+    cancel_requested = db.execute(
+        select(JobQueue.cancel_requested).where(JobQueue.job_id == job_id)
+    ).scalar()
+    if cancel_requested:
+        raise JobCancelled()
+
+    progress = STAGE_PROGRESS[stage]
+    if stage == 'calculating' and rows_total:
+        progress += (STAGE_PROGRESS['summarizing'] - progress) * rows_done // rows_total
+    db.execute(update(Job).where(Job.id == job_id).values(
+        stage=stage, progress=progress, rows_processed=rows_done
+    ))
+    db.commit()
+
+def _discard_results(db, job_id, output_path):
+    """Remove whatever a failed or cancelled job left behind"""
+    db.rollback()
+    delete_job_rows(db, job_id)
+    result_store.delete_job_results(job_id)
+    output_path.unlink(missing_ok=True)
+
+def calc_workers_per_job(job_workers):
+    """CALC_WORKERS, or an even share of the CPUs between job_workers concurrent jobs"""
+    return CALC_WORKERS or max(1, (os.cpu_count() or 1) // max(job_workers, 1))
+
+def run_job(job_id, calc_workers=None):
+    """
+    Calculate incentives for a claimed job and store the results, in fresh sessions
+
+    calc_workers caps the job's calculation processes (default: CALC_WORKERS,
+    or one per CPU).
+
+    Progress is committed on a session of its own. The output workbook is
+    written before any result rows are saved, and the rows are committed
+    together with the completed status, so a job that fails or is cancelled
+    leaves no results behind.
+    """
+    db = SessionLocal()
+    progress_db = SessionLocal()
+    output_path = OUTPUT_DIR / f"{job_id}_Hometown_Incentives.xlsx"
+    try:
+        job = db.get(Job, job_id)
+        if job is None:
+            return
+        try:
+            # Load and process data
+            upload = db.get(Upload, job.file_id)
+            df, summary_df, tracker_df, targets_df = process_incentives(
+                upload.file_path, workers=calc_workers,
+                progress=lambda *step: _set_progress(progress_db, job_id, *step)
+            )
+
+            # Generate output Excel
+            _set_progress(progress_db, job_id, 'writing output', len(df), len(df))
+            write_output(output_path, df, summary_df, tracker_df, targets_df)
+            _set_progress(progress_db, job_id, 'saving', len(df), len(df))
+
+            # Save results as Parquet (rollups in the database), or every row
+            # in the database with batched inserts; committed below with the status
+            if RESULT_STORE == "parquet":
+                result_store.write_job_results(job_id, df, summary_df, tracker_df)
+                save_job_rollups(db, job_id, df, summary_df)
+            else:
+                save_job_results(db, job_id, df, summary_df, tracker_df)
+
+            # Update job status
+            db.refresh(job)
+            job.status = "completed"
+            job.progress = 100
+            job.stage = None
+            job.completed_at = datetime.now()
+            job.total_transactions = len(df)
+            job.total_incentives = float(df['Ince Amt'].sum())
+            job.employees_count = len(summary_df)
+            job.stores_count = int(df['Name'].nunique())
+
+        except JobCancelled:
+            _discard_results(db, job_id, output_path)
+            job.status = "cancelled"
+            job.progress = 0
+            job.completed_at = datetime.now()
+
+        except Exception as e:
+            _discard_results(db, job_id, output_path)
+            job.status = "failed"
+            job.error = str(e)
+            job.progress = 0
+
+        db.query(JobQueue).filter(JobQueue.job_id == job_id).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        progress_db.close()
+        db.close()
+
+# ============================================================================
+# WORKERS
+# ============================================================================
+
+def worker_loop(worker_id, stop_event, poll_interval=JOB_POLL_INTERVAL, calc_workers=None):
+    """Claim and run jobs until stop_event is set, polling when the queue is empty"""
+    while not stop_event.is_set():
+        db = SessionLocal()
+        try:
+            job_id = claim_next_job(db, worker_id)
+        except Exception as e:
+            print(f"Worker {worker_id} could not claim a job: {e}")
+            job_id = None
+        finally:
+            db.close()
+
+        if job_id is None:
+            stop_event.wait(poll_interval)
+        else:
+            run_job(job_id, calc_workers)
+
+def _worker_id(prefix, pid):
+    return f"{prefix}:{pid}"
+
+def _worker_main(prefix, stop_event, poll_interval, calc_workers):
+    # Ctrl+C reaches the whole process group; let the pool decide when workers stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    worker_loop(_worker_id(prefix, os.getpid()), stop_event, poll_interval, calc_workers)
+
+class WorkerPool:
+    """
+    A fixed number of worker processes running worker_loop
+
+    Workers are regular (non-daemon) processes so the calculation can still
+    fan out to its own process pool; the CPUs are shared between the workers
+    (calc_workers_per_job) so concurrent jobs do not oversubscribe them.
+
+    Worker ids are host:token:pid, with a fresh token per start() and the
+    worker's own pid. A monitor thread requeues the jobs of workers that
+    exit unexpectedly (crash, OOM kill) and starts replacements. Each worker
+    gets its own stop event: a process killed while waiting on a shared one
+    would leave it unusable for the others.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, poll_interval=JOB_POLL_INTERVAL):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.processes = {}
+        self._context = multiprocessing.get_context('spawn')
+        self._stop_events = {}
+        self._stopping = threading.Event()
+        self._prefix = None
+        self._monitor = None
+
+    def start(self):
+        if not self.workers:
+            return
+
+        # Jobs left claimed by workers that died without a clean stop()
+        db = SessionLocal()
+        try:
+            requeued = requeue_stale_jobs(db)
+            if requeued:
+                print(f"Requeued {len(requeued)} job(s) left by dead workers")
+        except Exception as e:
+            print(f"Could not requeue stale jobs: {e}")
+        finally:
+            db.close()
+
+        self._prefix = f"{socket.gethostname()}:{uuid.uuid4().hex[:12]}"
+        for i in range(self.workers):
+            self._spawn(f"incentive-worker-{i}")
+        self._monitor = threading.Thread(target=self._watch, name="incentive-worker-monitor", daemon=True)
+        self._monitor.start()
+
+    def _spawn(self, name):
+        stop_event = self._context.Event()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(self._prefix, stop_event, self.poll_interval, calc_workers_per_job(self.workers)),
+            name=name
+        )
+        process.start()
+        worker_id = _worker_id(self._prefix, process.pid)
+        self.processes[worker_id] = process
+        self._stop_events[worker_id] = stop_event
+
+    def _watch(self):
+        while not self._stopping.wait(self.poll_interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Could not check job workers: {e}")
+
+    def check(self):
+        """Requeue the jobs of workers that exited while the pool is running, and replace them"""
+        dead = [worker_id for worker_id, process in self.processes.items() if not process.is_alive()]
+        if not dead or self._stopping.is_set():
+            return []
+
+        db = SessionLocal()
+        try:
+            requeued = requeue_jobs(db, dead)
+        finally:
+            db.close()
+        for worker_id in dead:
+            process = self.processes.pop(worker_id)
+            self._stop_events.pop(worker_id)
+            print(f"Worker {worker_id} exited with code {process.exitcode}, starting a replacement")
+            self._spawn(process.name)
+        return requeued
+
+    def stop(self, timeout=30):
+        """Let workers finish their current job, then terminate any still running after timeout"""
+        self._stopping.set()
+        if self._monitor is not None:
+            self._monitor.join()
+            self._monitor = None
+        for stop_event in self._stop_events.values():
+            stop_event.set()
+        for process in self.processes.values():
+            process.join(timeout)
+
+        killed = []
+        for worker_id, process in self.processes.items():
+            if process.is_alive():
+                process.terminate()
+                process.join()
+                killed.append(worker_id)
+
+        # Their transactions died with them; put the jobs back for the next start
+        if killed:
+            db = SessionLocal()
+            try:
+                requeue_jobs(db, killed)
+            finally:
+                db.close()
+        self.processes = {}
+        self._stop_events = {}
+        self._stopping.clear()
+
+if __name__ == "__main__":
+    from .database import init_db
+
+    parser = argparse.ArgumentParser(description="Run incentive job workers")
+    parser.add_argument('--workers', type=int, default=JOB_WORKERS or 1)
+    parser.add_argument('--poll-interval', type=float, default=JOB_POLL_INTERVAL)
+    args = parser.parse_args()
+
+    init_db()
+    pool = WorkerPool(args.workers, args.poll_interval)
+    pool.start()
+    print(f"Started {args.workers} job worker(s), press Ctrl+C to stop")
+    try:
+        # The pool's monitor thread replaces workers that die
+        pool._monitor.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.stop()
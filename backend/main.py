@@ -1,20 +1,36 @@
 """
 Main FastAPI application
 """
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from .api import upload, process, data
 from .database import init_db
-from .config import API_HOST, API_PORT
+from .jobs import WorkerPool
+from .response_cache import cache_response
+from .responses import compress_response
+from .config import API_HOST, API_PORT, JOB_WORKERS
 
 # Initialize database
 init_db()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the job worker pool alongside the API (unless JOB_WORKERS is 0)"""
+    pool = WorkerPool(JOB_WORKERS)
+    pool.start()
+    try:
+        yield
+    finally:
+        pool.stop()
+
 # Create FastAPI app
 app = FastAPI(
     title="Hometown Incentive API",
     description="Backend API for Hometown Sales Incentive Calculator",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware (allow Streamlit to call API)
@@ -24,8 +40,26 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+@app.middleware("http")
+async def limit_upload_size(request, call_next):
+    """Refuse uploads whose declared size is too large before their body is read"""
+    if request.url.path.endswith("/upload") and upload.declared_too_large(request.headers.get("content-length")):
+        return JSONResponse(status_code=413, content={"detail": upload.TOO_LARGE_DETAIL})
+    return await call_next(request)
+
+@app.middleware("http")
+async def compress(request, call_next):
+    """Compress JSON and Arrow responses for clients that accept gzip or zstd"""
+    return await compress_response(request, await call_next(request))
+
+@app.middleware("http")
+async def cache(request, call_next):
+    """Serve completed-job data and downloads with ETags, 304s and an in-process cache"""
+    return await cache_response(request, call_next)
+
 # Include routers
 app.include_router(upload.router, prefix="/api/v1", tags=["upload"])
 app.include_router(process.router, prefix="/api/v1", tags=["process"])
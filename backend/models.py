@@ -1,7 +1,7 @@
 """
 SQLAlchemy ORM models for database tables
 """
-from sqlalchemy import Column, String, Integer, Float, DateTime, ForeignKey, Text, Index
+from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, ForeignKey, Text, Index
 from datetime import datetime
 from .database import Base
 
@@ -21,8 +21,10 @@ class Job(Base):
 
     id = Column(String, primary_key=True)
     file_id = Column(String, ForeignKey("uploads.id"), nullable=False)
-    status = Column(String, nullable=False, default="processing")  # processing, completed, failed
+    status = Column(String, nullable=False, default="queued")  # queued, processing, completed, failed, cancelled
     progress = Column(Integer, default=0)
+    stage = Column(String, nullable=True)  # loading, calculating, summarizing, saving, writing output
+    rows_processed = Column(Integer, nullable=True)
     started_at = Column(DateTime, default=datetime.now)
     completed_at = Column(DateTime, nullable=True)
     error = Column(Text, nullable=True)
@@ -31,6 +33,21 @@ class Job(Base):
     employees_count = Column(Integer, nullable=True)
     stores_count = Column(Integer, nullable=True)
 
+class JobQueue(Base):
+    """Jobs waiting for or claimed by a worker (rows are removed when the job finishes)"""
+    __tablename__ = "job_queue"
+
+    job_id = Column(String, ForeignKey("jobs.id"), primary_key=True)
+    priority = Column(Integer, nullable=False, default=0)  # higher runs first
+    enqueued_at = Column(DateTime, nullable=False, default=datetime.now)
+    claimed_by = Column(String, nullable=True)
+    claimed_at = Column(DateTime, nullable=True)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+
+    __table_args__ = (
+        Index('idx_queue_next', 'claimed_at', 'priority', 'enqueued_at'),
+    )
+
 class Transaction(Base):
     """Individual sales transactions"""
     __tablename__ = "transactions"
@@ -53,9 +70,14 @@ class Transaction(Base):
     sm_inc_amt = Column(Float)
     dm_inc_amt = Column(Float)
 
+    # Every index leads with job_id and ends with id, so filtered and sorted
+    # pages of one job can be read with keyset pagination
     __table_args__ = (
-        Index('idx_transactions_job', 'job_id'),
-        Index('idx_transactions_store_lob', 'store_code', 'lob'),
+        Index('idx_transactions_job_id', 'job_id', 'id'),
+        Index('idx_transactions_job_store_lob', 'job_id', 'store_code', 'lob', 'id'),
+        Index('idx_transactions_job_salesman', 'job_id', 'salesman', 'id'),
+        Index('idx_transactions_job_ince', 'job_id', 'ince_amt', 'id'),
+        Index('idx_transactions_job_sales', 'job_id', 'net_sales_value', 'id'),
     )
 
 class EmployeeSummary(Base):
@@ -96,3 +118,23 @@ class QualifierTracker(Base):
     __table_args__ = (
         Index('idx_tracker_job', 'job_id'),
     )
+
+class JobRollup(Base):
+    """Per-job totals by store, LOB, role and sales date (see backend/rollups.py)"""
+    __tablename__ = "job_rollups"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    job_id = Column(String, ForeignKey("jobs.id"), nullable=False)
+    dimension = Column(String, nullable=False)  # total, store, lob, role, date
+    key = Column(String, nullable=False)  # store code, LOB, role or sales date ('' for total)
+    label = Column(String, nullable=True)  # store name
+    lines = Column(Integer)
+    bills = Column(Integer)
+    sales_with_gst = Column(Float)
+    sales_without_gst = Column(Float)
+    incentive = Column(Float)
+    employees = Column(Integer, nullable=True)
+
+    __table_args__ = (
+        Index('idx_rollups_job_dimension', 'job_id', 'dimension'),
+    )
@@ -0,0 +1,107 @@
+"""
+Bulk persistence of job results
+
+Result frames are converted column by column and written with batched
+inserts (executemany), or with COPY FROM STDIN when the database is
+PostgreSQL (see utils.bulk, shared with the Streamlit app's line tables).
+Nothing here commits: the caller's session owns the transaction, so a
+job's rows are either all saved or not at all.
+"""
+from utils.bulk import frame_columns, write_rows
+
+from .config import RESULT_INSERT_BATCH_SIZE
+from .models import Transaction, EmployeeSummary, QualifierTracker, JobRollup
+from .rollups import job_rollups
+
+# Table column -> (frame column, type); str columns are stringified like str(value),
+# text columns are stored as they are and count columns as int (NaN becomes NULL in both)
+TRANSACTION_COLUMNS = {
+    'store_code': ('Store Code', str),
+    'store_name': ('Name', 'text'),
+    'sales_doc': ('Sales_Doc', str),
+    'sales_date': ('Sales Date', str),
+    'lob': ('LOB', 'text'),
+    'bill_no': ('Bill No', str),
+    'salesman': ('Salesman', 'text'),
+    'net_sales_value': ('Sum of NET SALES VALUE', float),
+    'sales_without_gst': ('Sum of Sales value Without GST', float),
+    'sm': ('SM', 'text'),
+    'dm': ('DM', 'text'),
+    'ince_amt': ('Ince Amt', float),
+    'pe_inc_amt': ('PE Inc amt', float),
+    'sm_inc_amt': ('SM Inc Amt', float),
+    'dm_inc_amt': ('DM Inc Amt', float)
+}
+
+SUMMARY_COLUMNS = {
+    'store_code': ('Store Code', str),
+    'store_name': ('Store Name', 'text'),
+    'employee': ('Employee', 'text'),
+    'role': ('Role', 'text'),
+    'furniture_points': ('Furniture Points', float),
+    'homeware_points': ('Homeware Points', float),
+    'total_points': ('Total Points', float)
+}
+
+TRACKER_COLUMNS = {
+    'store_code': ('Store Code', str),
+    'store_name': ('Store Name', 'text'),
+    'lob': ('LOB', 'text'),
+    'actual_aov': ('Actual AOV', int),
+    'target_aov': ('Target AOV', int),
+    'aov_achievement': ('AOV Achievement %', float),
+    'actual_bills': ('Actual Bills', int),
+    'target_bills': ('Target Bills', int),
+    'bills_achievement': ('Bills Achievement %', float),
+    'status': ('Qualifier Status', 'text')
+}
+
+ROLLUP_COLUMNS = {
+    'dimension': ('dimension', 'text'),
+    'key': ('key', 'text'),
+    'label': ('label', 'text'),
+    'lines': ('lines', int),
+    'bills': ('bills', int),
+    'sales_with_gst': ('sales_with_gst', float),
+    'sales_without_gst': ('sales_without_gst', float),
+    'incentive': ('incentive', float),
+    'employees': ('employees', 'count')
+}
+
+def result_columns(df, columns, job_id):
+    """
+    Convert a result frame into table columns
+
+    Returns a dict of table column -> list of Python values, converted the
+    same way as building one ORM object per row.
+    """
+    return frame_columns(df, columns, {'job_id': [job_id] * len(df)})
+
+def save_frame(connection, model, df, columns, job_id, batch_size=None):
+    """Write one result frame into model's table (COPY on PostgreSQL, executemany elsewhere)"""
+    if len(df) == 0:
+        return
+    data = result_columns(df, columns, job_id)
+    write_rows(connection, model.__tablename__, data, batch_size or RESULT_INSERT_BATCH_SIZE)
+
+def save_job_results(db, job_id, df, summary_df, tracker_df, batch_size=None):
+    """
+    Write transactions, employee summary, qualifier tracker and rollups for a job
+
+    Uses the session's connection, so the rows join the session's current
+    transaction; the caller commits.
+    """
+    connection = db.connection()
+    save_frame(connection, Transaction, df, TRANSACTION_COLUMNS, job_id, batch_size)
+    save_frame(connection, EmployeeSummary, summary_df, SUMMARY_COLUMNS, job_id, batch_size)
+    save_frame(connection, QualifierTracker, tracker_df, TRACKER_COLUMNS, job_id, batch_size)
+    save_job_rollups(db, job_id, df, summary_df, batch_size)
+
+def save_job_rollups(db, job_id, df, summary_df, batch_size=None):
+    """Write only the rollups of a job (its rows live in the result store); the caller commits"""
+    save_frame(db.connection(), JobRollup, job_rollups(df, summary_df), ROLLUP_COLUMNS, job_id, batch_size)
+
+def delete_job_rows(db, job_id):
+    """Delete every saved row of a job (results and rollups); the caller commits"""
+    for model in (Transaction, EmployeeSummary, QualifierTracker, JobRollup):
+        db.query(model).filter(model.job_id == job_id).delete(synchronize_session=False)
@@ -0,0 +1,115 @@
+"""
+Job progress events
+
+Workers record each job's stage, percent and rows processed in the jobs
+table as the job advances. Inside the API process a single ProgressHub
+reads every watched job in one query per PROGRESS_POLL_INTERVAL and pushes
+changes to the subscribers of that job, so the database load stays the same
+however many clients are watching.
+"""
+import asyncio
+from datetime import datetime
+
+from fastapi.concurrency import run_in_threadpool
+
+from .config import PROGRESS_POLL_INTERVAL
+from .database import SessionLocal
+from .models import Job
+from .schemas import JobResult
+
+FINISHED = ("completed", "failed", "cancelled")
+
+def job_status(job):
+    """Status of a job as returned by /jobs/{job_id} and sent in progress events"""
+    end = job.completed_at if job.status in FINISHED else datetime.now()
+    status = {
+        "job_id": job.id,
+        "status": job.status,
+        "progress": job.progress,
+        "stage": job.stage,
+        "rows_processed": job.rows_processed,
+        "elapsed_seconds": (
+            round((end - job.started_at).total_seconds(), 1)
+            if job.status != "queued" and job.started_at and end else None
+        )
+    }
+
+    if job.status == "completed":
+        status["result"] = JobResult(
+            total_transactions=job.total_transactions,
+            total_incentives=job.total_incentives,
+            employees_count=job.employees_count,
+            stores_count=job.stores_count
+        )
+    elif job.status == "failed":
+        status["error"] = job.error
+
+    return status
+
+def read_statuses(job_ids):
+    """Current status of the given jobs (missing jobs are left out)"""
+    db = SessionLocal()
+    try:
+        return {job.id: job_status(job) for job in db.query(Job).filter(Job.id.in_(job_ids))}
+    finally:
+        db.close()
+
+def _change_key(status):
+    # Elapsed time alone changing is not worth an event
+    return status and {k: v for k, v in status.items() if k != "elapsed_seconds"}
+
+class ProgressHub:
+    """
+    Fans job status changes out to asyncio queues, one per subscriber
+
+    The polling task runs only while someone is subscribed. Each subscriber
+    first gets the job's current status (the one passed in by the first
+    subscriber), then every change; None is sent when the job disappears.
+    """
+
+    def __init__(self, interval=PROGRESS_POLL_INTERVAL):
+        self.interval = interval
+        self.subscribers = {}
+        self.latest = {}
+        self._task = None
+
+    def subscribe(self, job_id, status):
+        queue = asyncio.Queue()
+        self.subscribers.setdefault(job_id, set()).add(queue)
+        self.latest.setdefault(job_id, status)
+        queue.put_nowait(self.latest[job_id])
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return queue
+
+    def unsubscribe(self, job_id, queue):
+        queues = self.subscribers.get(job_id, set())
+        queues.discard(queue)
+        if not queues:
+            self.subscribers.pop(job_id, None)
+            self.latest.pop(job_id, None)
+
+    async def _run(self):
+        while self.subscribers:
+            job_ids = list(self.subscribers)
+            try:
+                statuses = await run_in_threadpool(read_statuses, job_ids)
+            except Exception as e:
+                print(f"Could not read job progress: {e}")
+                statuses = None
+
+            if statuses is not None:
+                for job_id in job_ids:
+                    self._publish(job_id, statuses.get(job_id))
+            await asyncio.sleep(self.interval)
+
+    def _publish(self, job_id, status):
+        if job_id not in self.subscribers:
+            return
+        if job_id in self.latest and _change_key(self.latest[job_id]) == _change_key(status):
+            return
+        self.latest[job_id] = status
+        for queue in self.subscribers[job_id]:
+            queue.put_nowait(status)
+
+hub = ProgressHub()
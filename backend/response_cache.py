@@ -0,0 +1,129 @@
+"""
+HTTP caching for completed jobs
+
+The results of a completed job never change, so its data and download
+responses carry a strong ETag and Cache-Control: immutable, and requests
+with a matching If-None-Match get 304 Not Modified. Serialized bodies are
+kept in an in-process LRU (RESPONSE_CACHE_BYTES in total) keyed by job,
+endpoint, query parameters and negotiated format/encoding, so repeated
+requests skip the database and serialization entirely.
+"""
+import hashlib
+import re
+
+from fastapi import Response
+from fastapi.concurrency import run_in_threadpool
+
+from utils.lru import SizedLRU
+
+from .config import RESPONSE_CACHE_BYTES
+from .database import SessionLocal
+from .models import Job
+from .responses import content_encoding, table_format
+
+CACHE_CONTROL = "max-age=31536000, immutable"
+
+# Per-job GET endpoints whose responses are cached (job_id in the query string)
+CACHED_PATHS = {
+    "/api/v1/data/summary", "/api/v1/data/tracker", "/api/v1/data/transactions",
+    "/api/v1/data/statistics", "/api/v1/data/rollups"
+}
+DOWNLOAD_PATH = re.compile(r"^/api/v1/download/(?P<job_id>[^/]+)$")
+
+# Bodies larger than this share of the cache are not kept (their ETag still is)
+MAX_ENTRY_SHARE = 8
+
+class ResponseCache(SizedLRU):
+    """LRU of (etag, headers, body) entries with a cap on the total body size"""
+
+    def __init__(self, max_bytes=RESPONSE_CACHE_BYTES):
+        super().__init__(max_bytes)
+
+    def put(self, key, etag, headers, body):
+        if body is not None and len(body) > self.max_bytes // MAX_ENTRY_SHARE:
+            body = None
+        return super().put(key, (etag, headers, body), len(body or b""))
+
+cache = ResponseCache()
+
+# Job ids known to be completed (a completed job stays completed)
+completed_jobs = set()
+
+def _is_completed(job_id):
+    db = SessionLocal()
+    try:
+        job = db.get(Job, job_id)
+        return job is not None and job.status == "completed"
+    finally:
+        db.close()
+
+async def is_completed(job_id):
+    if job_id not in completed_jobs and await run_in_threadpool(_is_completed, job_id):
+        completed_jobs.add(job_id)
+    return job_id in completed_jobs
+
+def cached_job_id(request):
+    """The job a cacheable GET request is for, or None"""
+    if request.method != "GET":
+        return None
+    if request.url.path in CACHED_PATHS:
+        return request.query_params.get("job_id")
+    match = DOWNLOAD_PATH.match(request.url.path)
+    return match.group("job_id") if match else None
+
+def _etag_matches(request, etag):
+    if_none_match = request.headers.get("if-none-match")
+    return if_none_match is not None and (
+        if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]
+    )
+
+def _not_modified(etag, headers):
+    return Response(status_code=304, headers={
+        "etag": etag, "cache-control": CACHE_CONTROL, **{k: v for k, v in headers.items() if k == "vary"}
+    })
+
+async def cache_response(request, call_next):
+    """Serve completed-job responses from the cache, with ETags and 304s"""
+    job_id = cached_job_id(request)
+    if job_id is None:
+        return await call_next(request)
+
+    # CORS echoes the Origin back, so it is part of the key too
+    key = (
+        request.url.path, tuple(sorted(request.query_params.multi_items())),
+        table_format(request), content_encoding(request), request.headers.get("origin")
+    )
+    entry = cache.get(key)
+    if entry is not None:
+        etag, headers, body = entry
+        if _etag_matches(request, etag):
+            return _not_modified(etag, headers)
+        if body is not None:
+            return Response(body, headers=headers)
+
+    # Checked before the response is built, so nothing from a running job is kept
+    if not await is_completed(job_id):
+        return await call_next(request)
+    response = await call_next(request)
+    if response.status_code != 200:
+        return response
+
+    headers = {k: v for k, v in response.headers.items() if k != "content-length"}
+    headers["cache-control"] = CACHE_CONTROL
+    if request.url.path in CACHED_PATHS:
+        headers["vary"] = ", ".join(filter(None, [headers.get("vary"), "Accept"]))
+    if "etag" in headers:
+        # File downloads come with their own ETag and are streamed, not kept
+        etag, body = headers["etag"], None
+    else:
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        headers["etag"] = etag
+    cache.put(key, etag, headers, body)
+
+    if _etag_matches(request, etag):
+        return _not_modified(etag, headers)
+    if body is None:
+        response.headers["cache-control"] = CACHE_CONTROL
+        return response
+    return Response(body, headers=headers)
@@ -0,0 +1,140 @@
+"""
+Response formats for tabular data
+
+Data endpoints answer with JSON by default. Clients that send
+Accept: application/vnd.apache.arrow.stream (or application/vnd.apache.parquet)
+get the same rows as one Arrow IPC stream (or Parquet file) instead, which
+pandas reads without parsing per-row JSON. JSON and Arrow bodies are
+compressed with zstd or gzip when the client accepts it; Parquet is already
+compressed inside the file.
+"""
+import gzip
+import importlib
+import typing
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from fastapi import Response
+
+from .config import RESPONSE_COMPRESSION_MIN_BYTES
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+PARQUET = "application/vnd.apache.parquet"
+TABLE_FORMATS = [ARROW_STREAM, PARQUET]
+
+# Media types worth compressing on the wire
+COMPRESSIBLE = ["application/json", ARROW_STREAM]
+
+ARROW_TYPES = {str: pa.string(), float: pa.float64(), int: pa.int64()}
+
+def _load_zstd():
+    """The first zstd module available (Python 3.14, its backport, or zstandard), or None"""
+    for name in ["compression.zstd", "backports.zstd", "zstandard"]:
+        try:
+            return importlib.import_module(name)
+        except ImportError:
+            continue
+    return None
+
+zstd = _load_zstd()
+
+# ============================================================================
+# TABLE FORMATS
+# ============================================================================
+
+def _media_types(header):
+    """Media types (or encodings) listed in an Accept-style header, in order"""
+    return [part.split(";")[0].strip().lower() for part in (header or "").split(",")]
+
+def table_format(request):
+    """The binary table format the client asks for, or None for JSON"""
+    for media_type in _media_types(request.headers.get("accept")):
+        if media_type in TABLE_FORMATS:
+            return media_type
+    return None
+
+def model_schema(model):
+    """Arrow schema with the fields of a response model (Optional[x] becomes nullable x)"""
+    fields = []
+    for name, field in model.model_fields.items():
+        annotation = field.annotation
+        if typing.get_origin(annotation) is typing.Union:
+            annotation = next(arg for arg in typing.get_args(annotation) if arg is not type(None))
+        fields.append(pa.field(name, ARROW_TYPES[annotation]))
+    return pa.schema(fields)
+
+def to_table(results, model):
+    """Arrow table of the model's fields from an Arrow table or a list of ORM rows"""
+    schema = model_schema(model)
+    if isinstance(results, pa.Table):
+        return results.select(schema.names).cast(schema)
+    return pa.Table.from_pylist(
+        [{name: getattr(row, name) for name in schema.names} for row in results], schema
+    )
+
+def table_body(table, media_type):
+    """Serialize a table as an Arrow IPC stream or a Parquet file"""
+    sink = pa.BufferOutputStream()
+    if media_type == PARQUET:
+        pq.write_table(table, sink, compression='zstd')
+    else:
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def table_response(request, results, model, headers=None):
+    """
+    Return results in the format the client asked for
+
+    Arrow/Parquet requests get a Response built here (with headers); JSON
+    requests get results back as plain rows for FastAPI to validate and
+    serialize with the endpoint's response_model, so the caller must set
+    headers on its own Response in that case.
+    """
+    media_type = table_format(request)
+    if media_type is None:
+        return results.to_pylist() if isinstance(results, pa.Table) else results
+    return Response(table_body(to_table(results, model), media_type), media_type=media_type, headers=headers)
+
+# ============================================================================
+# COMPRESSION
+# ============================================================================
+
+def content_encoding(request):
+    """zstd or gzip, whichever the client accepts (zstd preferred), or None"""
+    accepted = _media_types(request.headers.get("accept-encoding"))
+    if zstd is not None and "zstd" in accepted:
+        return "zstd"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+def compress(body, encoding):
+    if encoding == "zstd":
+        return zstd.compress(body, 3)
+    return gzip.compress(body, compresslevel=5)
+
+async def compress_response(request, response):
+    """
+    Compress a JSON or Arrow response body for clients that accept it
+
+    Bodies smaller than RESPONSE_COMPRESSION_MIN_BYTES, other media types and
+    responses that are already encoded are passed through.
+    """
+    media_type = (response.headers.get("content-type") or "").split(";")[0]
+    if media_type not in COMPRESSIBLE or "content-encoding" in response.headers:
+        return response
+
+    vary = ", ".join(filter(None, [response.headers.get("vary"), "Accept-Encoding"]))
+    encoding = content_encoding(request)
+    if encoding is None:
+        response.headers["vary"] = vary
+        return response
+
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    headers = {k: v for k, v in response.headers.items() if k != "content-length"}
+    headers["vary"] = vary
+    if len(body) >= RESPONSE_COMPRESSION_MIN_BYTES:
+        body = compress(body, encoding)
+        headers["content-encoding"] = encoding
+    return Response(body, status_code=response.status_code, headers=headers, background=response.background)
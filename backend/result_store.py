@@ -0,0 +1,240 @@
+"""
+Columnar result store
+
+Each completed job keeps its transactions, employee summary and qualifier
+tracker as zstd-compressed Parquet files under OUTPUT_DIR/results/<job_id>,
+with the same column names as the database tables. Queries go through
+pyarrow.dataset, which reads only the requested columns and skips row
+groups whose statistics rule out the filter, and aggregate with Arrow's
+group_by, so no database round trip per row is needed.
+
+Transactions are also kept as an LZ4-compressed Arrow IPC file of small
+record batches, so a page of rows can be read by id without decoding whole
+row groups.
+"""
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from .config import OUTPUT_DIR
+from .persistence import TRANSACTION_COLUMNS, SUMMARY_COLUMNS, TRACKER_COLUMNS
+
+RESULTS_DIR = OUTPUT_DIR / "results"
+
+# Dataset name -> column conversions (see backend/persistence.py)
+DATASETS = {
+    'transactions': TRANSACTION_COLUMNS,
+    'summary': SUMMARY_COLUMNS,
+    'tracker': TRACKER_COLUMNS
+}
+
+ROW_GROUP_SIZE = 64 * 1024
+
+# Rows per record batch in transactions.arrow, the unit read when fetching rows by id
+ROW_BATCH_SIZE = 1024
+
+ARROW_TYPES = {str: pa.string(), 'text': pa.string(), float: pa.float64(), int: pa.int64()}
+
+# Transaction columns that can be grouped by in aggregate queries
+GROUP_COLUMNS = ['store_code', 'store_name', 'lob', 'salesman', 'sm', 'dm', 'sales_date']
+
+def job_dir(job_id):
+    return RESULTS_DIR / job_id
+
+def has_results(job_id):
+    """True if the job's results were written to the result store"""
+    return (job_dir(job_id) / "transactions.parquet").exists()
+
+def to_arrow(df, columns):
+    """Convert a result frame into an Arrow table with the database column names and types"""
+    arrays = {}
+    for name, (source, kind) in columns.items():
+        values = df[source]
+        if kind is str:
+            values = values.astype(object).map(str)
+        elif kind == 'text':
+            # Codes such as Salesman can be numbers; keep missing ones missing
+            values = values.astype(object).map(str, na_action='ignore')
+        else:
+            values = values.astype(kind)
+        # from_pandas stores NaN as null, as the database does
+        arrays[name] = pa.array(values.to_numpy(dtype=object if kind == 'text' else None),
+                                ARROW_TYPES[kind], from_pandas=True)
+    return pa.table(arrays)
+
+def schema(name, columns):
+    """Arrow schema of the given columns of a dataset"""
+    types = {name: ARROW_TYPES[kind] for name, (_, kind) in DATASETS[name].items()}
+    types['id'] = pa.int64()
+    return pa.schema([(column, types[column]) for column in columns])
+
+def _temp_dirs(job_id):
+    return RESULTS_DIR.glob(f".{job_id}.*.tmp")
+
+def write_job_results(job_id, df, summary_df, tracker_df):
+    """
+    Write a job's result frames as Parquet; transactions get a 1-based id in row order
+
+    The files are written into a temporary directory next to the job's one,
+    which is renamed into place once all of them are complete, so readers
+    (and has_results) never see a partly written job.
+    """
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    temp_dir = Path(tempfile.mkdtemp(prefix=f".{job_id}.", suffix=".tmp", dir=RESULTS_DIR))
+    try:
+        for name, frame in [('transactions', df), ('summary', summary_df), ('tracker', tracker_df)]:
+            table = to_arrow(frame, DATASETS[name])
+            if name == 'transactions':
+                table = table.add_column(0, 'id', pa.array(range(1, len(frame) + 1), pa.int64()))
+            pq.write_table(table, temp_dir / f"{name}.parquet", compression='zstd', row_group_size=ROW_GROUP_SIZE)
+            if name == 'transactions':
+                options = pa.ipc.IpcWriteOptions(compression='lz4')
+                with pa.ipc.new_file(temp_dir / "transactions.arrow", table.schema, options=options) as writer:
+                    for batch in table.to_batches(max_chunksize=ROW_BATCH_SIZE):
+                        writer.write_batch(batch)
+
+        # A rerun (e.g. of a requeued job) replaces what an earlier attempt left
+        shutil.rmtree(job_dir(job_id), ignore_errors=True)
+        os.replace(temp_dir, job_dir(job_id))
+    except BaseException:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        raise
+
+def delete_job_results(job_id):
+    shutil.rmtree(job_dir(job_id), ignore_errors=True)
+    for temp_dir in _temp_dirs(job_id):
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+def scan(job_ids, name, columns=None, filter=None):
+    """Read a dataset of one or more jobs, pushing the column selection and filter down to Parquet"""
+    if isinstance(job_ids, str):
+        job_ids = [job_ids]
+    paths = [str(job_dir(job_id) / f"{name}.parquet") for job_id in job_ids if has_results(job_id)]
+    if not paths:
+        return None
+    return ds.dataset(paths, format='parquet').to_table(columns=columns, filter=filter)
+
+def _combine(conditions):
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return expression
+
+def equality_filter(**values):
+    """Filter expression matching every given column value that is set (None = no filter)"""
+    return _combine(ds.field(column) == value for column, value in values.items() if value)
+
+def transaction_filter(store_code=None, lob=None, salesman=None, sm=None, dm=None,
+                       sales_dates=None, min_incentive=None, max_incentive=None):
+    """Build a dataset filter expression from transaction filters (None = no filter)"""
+    conditions = [equality_filter(store_code=store_code, lob=lob, salesman=salesman, sm=sm, dm=dm)]
+    if sales_dates is not None:
+        conditions.append(ds.field('sales_date').isin(sales_dates))
+    if min_incentive is not None:
+        conditions.append(ds.field('ince_amt') >= min_incentive)
+    if max_incentive is not None:
+        conditions.append(ds.field('ince_amt') <= max_incentive)
+    return _combine(condition for condition in conditions if condition is not None)
+
+def query_transactions(job_id, filter=None, sort='id', descending=False, after=None, limit=100):
+    """
+    One page of transactions, in (sort, id) order, starting after the (value, id) pair after
+
+    Only the sort key and id of the matching rows are read to find the page;
+    the full columns are then read for its ids alone (see read_transaction_rows).
+    Returns an Arrow table (including id).
+    """
+    if after is not None:
+        value, row_id = after
+        if sort == 'id':
+            condition = ds.field('id') < row_id if descending else ds.field('id') > row_id
+        elif descending:
+            condition = (ds.field(sort) < value) | ((ds.field(sort) == value) & (ds.field('id') < row_id))
+        else:
+            condition = (ds.field(sort) > value) | ((ds.field(sort) == value) & (ds.field('id') > row_id))
+        filter = condition if filter is None else filter & condition
+
+    order = 'descending' if descending else 'ascending'
+    keys = [('id', order)] if sort == 'id' else [(sort, order), ('id', order)]
+
+    table = scan(job_id, 'transactions', columns=[column for column, _ in keys], filter=filter)
+    if table is None:
+        return None
+    if sort == 'id':
+        # Scans keep file order, which is id order
+        table = table.slice(max(len(table) - limit, 0)) if descending else table.slice(0, limit)
+    elif len(table) > limit:
+        # Few distinct sort values leave most rows tied on the slow id tie-break,
+        # so first drop the rows past the limit-th sort value
+        edge = table[sort].take(pc.select_k_unstable(table.select([sort]), limit, sort_keys=keys[:1]))
+        if edge.null_count == 0:
+            if descending:
+                table = table.filter(pc.greater_equal(table[sort], pc.min(edge)))
+            else:
+                table = table.filter(pc.less_equal(table[sort], pc.max(edge)))
+        # Pick the first rows without sorting the whole scan
+        table = table.take(pc.select_k_unstable(table, limit, sort_keys=keys))
+    return read_transaction_rows(job_id, table['id'].to_numpy()).sort_by(keys)
+
+def read_transaction_rows(job_id, ids):
+    """
+    Full transaction rows for an array of ids, as an Arrow table in id order
+
+    Ids are row numbers, so the record batch of transactions.arrow holding
+    each one is known and only those batches are read.
+    """
+    with pa.memory_map(str(job_dir(job_id) / "transactions.arrow")) as source:
+        reader = pa.ipc.open_file(source)
+        batches = [reader.get_batch(int(index)) for index in np.unique((ids - 1) // ROW_BATCH_SIZE)]
+        table = pa.Table.from_batches(batches, reader.schema)
+        return table.filter(pc.is_in(table['id'], value_set=pa.array(ids)))
+
+def query_table(job_id, name, filter=None):
+    """All rows of a job's summary or tracker dataset matching filter, as an Arrow table"""
+    return scan(job_id, name, filter=filter)
+
+def aggregate_columns(by):
+    """Transaction columns read by aggregate_transactions"""
+    return list(dict.fromkeys(by + ['bill_no', 'net_sales_value', 'sales_without_gst', 'ince_amt']))
+
+def aggregate_transactions(job_ids, by, filter=None, rows=None):
+    """
+    Totals per group of transactions across one or more jobs
+
+    rows optionally adds transactions read from elsewhere (jobs saved to the
+    database), as row dicts with aggregate_columns(by).
+
+    Returns row dicts with the by columns plus lines, bills (distinct bill
+    numbers), sales_with_gst, sales_without_gst and incentive, sorted by the
+    group columns.
+    """
+    columns = aggregate_columns(by)
+    tables = [scan(job_ids, 'transactions', columns=columns, filter=filter)]
+    if rows:
+        tables.append(pa.Table.from_pylist(rows, schema('transactions', columns)))
+    tables = [table for table in tables if table is not None and len(table)]
+    if not tables:
+        return []
+    table = pa.concat_tables(tables)
+
+    result = table.group_by(by).aggregate([
+        ([], 'count_all'),
+        ('bill_no', 'count_distinct'),
+        ('net_sales_value', 'sum'),
+        ('sales_without_gst', 'sum'),
+        ('ince_amt', 'sum')
+    ])
+    result = result.select(by + [
+        'count_all', 'bill_no_count_distinct', 'net_sales_value_sum', 'sales_without_gst_sum', 'ince_amt_sum'
+    ]).rename_columns(by + ['lines', 'bills', 'sales_with_gst', 'sales_without_gst', 'incentive'])
+
+    if by:
+        result = result.sort_by([(column, 'ascending') for column in by])
+    return result.to_pylist()
@@ -0,0 +1,75 @@
+"""
+Per-job rollups
+
+Totals by store, LOB, role and sales date are computed once from the result
+frames when a job is saved and stored in job_rollups, so statistics are read
+from a few rows per store instead of re-aggregating every transaction.
+"""
+import pandas as pd
+
+DIMENSIONS = ['total', 'store', 'lob', 'role', 'date']
+
+ROLLUP_COLUMNS = ['dimension', 'key', 'label', 'lines', 'bills', 'sales_with_gst',
+                  'sales_without_gst', 'incentive', 'employees']
+
+# Role -> (transaction column naming the employee, incentive column)
+ROLE_COLUMNS = {'PE': ('Salesman', 'PE Inc amt'), 'SM': ('SM', 'SM Inc Amt'), 'DM': ('DM', 'DM Inc Amt')}
+
+def _totals(df, keys, incentive_col='Ince Amt'):
+    """Lines, distinct bills, sales and incentive per group (one overall row if keys is empty)"""
+    if not keys:
+        df = df.assign(_all='')
+        keys = ['_all']
+    return df.groupby(keys, sort=True).agg(
+        lines=('LOB', 'size'),
+        bills=('Bill No', 'nunique'),
+        sales_with_gst=('Sum of NET SALES VALUE', 'sum'),
+        sales_without_gst=('Sum of Sales value Without GST', 'sum'),
+        incentive=(incentive_col, 'sum')
+    ).reset_index()
+
+def job_rollups(df, summary_df):
+    """
+    Compute the rollup rows of a job
+
+    Args:
+        df: Transactions with incentive columns
+        summary_df: Employee summary (for employee counts)
+
+    Returns:
+        DataFrame with ROLLUP_COLUMNS. Role rows cover the lines where the
+        role is filled in and carry that role's share of the incentive.
+    """
+    total = _totals(df, [])
+    total['key'] = ''
+    total['employees'] = len(summary_df)
+
+    store = _totals(df, ['Store Code', 'Name'])
+    store['key'] = store['Store Code'].astype(str)
+    store['label'] = store['Name']
+    store['employees'] = store['key'].map(summary_df['Store Code'].astype(str).value_counts()).fillna(0)
+
+    lob = _totals(df, ['LOB'])
+    lob['key'] = lob['LOB']
+    lob['employees'] = [
+        int((summary_df[f'{name} Points'] > 0).sum()) if f'{name} Points' in summary_df else None
+        for name in lob['LOB']
+    ]
+
+    role = pd.concat([
+        _totals(df[df[employee_col] != '-'], [], incentive_col).assign(key=name)
+        for name, (employee_col, incentive_col) in ROLE_COLUMNS.items()
+    ], ignore_index=True)
+    role['employees'] = role['key'].map(summary_df['Role'].value_counts()).fillna(0)
+
+    # Dates are DD/MM/YYYY text, so order them by the day they stand for
+    date = _totals(df, ['Sales Date'])
+    date['key'] = date['Sales Date'].astype(str)
+    date['day'] = pd.to_datetime(date['key'], dayfirst=True, errors='coerce')
+    date = date.sort_values('day', kind='stable')
+
+    rollups = pd.concat([
+        frame.assign(dimension=dimension)
+        for dimension, frame in zip(DIMENSIONS, [total, store, lob, role, date])
+    ], ignore_index=True)
+    return rollups.reindex(columns=ROLLUP_COLUMNS)
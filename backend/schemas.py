@@ -11,6 +11,7 @@ class UploadResponse(BaseModel):
     filename: str
     upload_time: datetime
     file_size: int
+    sha256: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -29,6 +30,9 @@ class JobStatusResponse(BaseModel):
     job_id: str
     status: str
     progress: int
+    stage: Optional[str] = None
+    rows_processed: Optional[int] = None
+    elapsed_seconds: Optional[float] = None
     result: Optional[JobResult] = None
     error: Optional[str] = None
 
@@ -97,6 +101,34 @@ class HistoryItem(BaseModel):
     class Config:
         from_attributes = True
 
+class RollupItem(BaseModel):
+    dimension: str
+    key: str
+    label: Optional[str] = None
+    lines: int
+    bills: int
+    sales_with_gst: float
+    sales_without_gst: float
+    incentive: float
+    employees: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+class AggregateItem(BaseModel):
+    store_code: Optional[str] = None
+    store_name: Optional[str] = None
+    lob: Optional[str] = None
+    salesman: Optional[str] = None
+    sm: Optional[str] = None
+    dm: Optional[str] = None
+    sales_date: Optional[str] = None
+    lines: int
+    bills: int
+    sales_with_gst: float
+    sales_without_gst: float
+    incentive: float
+
 class StatisticsResponse(BaseModel):
     total_sales: float
     total_incentives: float
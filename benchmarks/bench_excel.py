@@ -0,0 +1,102 @@
+"""
+Excel output benchmark
+Writes the four-sheet output workbook of a synthetic job with pandas'
+openpyxl writer (the old path) and with utils.export (XlsxWriter in
+constant_memory mode), and reports seconds, rows/sec, file size and peak RSS
+for each. Every writer runs in a fresh process, so peak RSS is per writer.
+
+Usage:
+    python benchmarks/bench_excel.py
+    python benchmarks/bench_excel.py --sizes 100000 --writers xlsxwriter
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.calculator import process_incentives
+from generate_export import make_export, write_export
+
+MONTH = '2026-01'
+WRITERS = ['openpyxl', 'xlsxwriter']
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB (None where unavailable)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def write_openpyxl(output_file, sheets):
+    with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
+        for name, df in sheets.items():
+            df.to_excel(writer, sheet_name=name, index=False)
+
+def write_xlsxwriter(output_file, sheets):
+    from utils.export import write_workbook
+    write_workbook(output_file, sheets)
+
+def run_writer(writer, frames_path, output_file):
+    """Load the output frames and write them with one writer (in a fresh process)"""
+    frames = pd.read_pickle(frames_path)
+    start = time.perf_counter()
+    {'openpyxl': write_openpyxl, 'xlsxwriter': write_xlsxwriter}[writer](output_file, frames)
+    seconds = time.perf_counter() - start
+    return {
+        'writer': writer,
+        'seconds': round(seconds, 3),
+        'size_mb': round(os.path.getsize(output_file) / (1024 * 1024), 1),
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+def run(sizes, writers, seed):
+    context = multiprocessing.get_context('spawn')
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        for n_rows in sizes:
+            path = write_export(make_export(n_rows, month=MONTH, seed=seed),
+                                Path(work_dir) / f'export_{n_rows}.parquet')
+            df, summary_df, tracker_df, targets_df = process_incentives(str(path))
+            frames_path = Path(work_dir) / f'frames_{n_rows}.pkl'
+            pd.to_pickle({
+                'Detailed Transactions': df,
+                'Employee Points Summary': summary_df,
+                'Daily Qualifier Tracker': tracker_df,
+                'Monthly Targets': targets_df
+            }, frames_path)
+            del df, summary_df, tracker_df, targets_df
+
+            print(f"\n{n_rows:,} rows")
+            print(f"{'writer':<12} {'seconds':>10} {'rows/sec':>12} {'size (MB)':>10} {'peak RSS (MB)':>15}")
+            for writer in writers:
+                output_file = Path(work_dir) / f'output_{n_rows}_{writer}.xlsx'
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                    result = pool.submit(run_writer, writer, str(frames_path), str(output_file)).result()
+                rate = f"{round(n_rows / result['seconds']):,}" if result['seconds'] else '-'
+                rss = result['peak_rss_mb'] if result['peak_rss_mb'] is not None else '-'
+                print(f"{writer:<12} {result['seconds']:>10.3f} {rate:>12} {result['size_mb']:>10} {rss:>15}")
+                output_file.unlink()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--writers', choices=WRITERS, nargs='+', default=WRITERS)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    run(args.sizes, args.writers, args.seed)
@@ -0,0 +1,87 @@
+"""
+Incentive engine benchmark
+Compares the row-wise calculate_incentives (df.apply) with the vectorized
+engine, checking that both produce bit-for-bit identical columns.
+
+Usage:
+    python benchmarks/bench_incentives.py
+    python benchmarks/bench_incentives.py --sizes 10000 100000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils import calculator as utils_calculator
+from backend import calculator as backend_calculator
+
+INCENTIVE_COLS = ['Ince Amt', 'PE Inc amt', 'SM Inc Amt', 'DM Inc Amt']
+
+def make_transactions(n_rows, seed=42):
+    """Build a synthetic transaction frame that hits every slab edge"""
+    rng = np.random.default_rng(seed)
+
+    # Mix slab boundaries in with random values so edge handling is exercised
+    edges = np.array([0, 5000, 10000, 20000, 40000, 80000], dtype=float)
+    sales_with_gst = np.round(rng.uniform(-5000, 150000, n_rows), 2)
+    on_edge = rng.random(n_rows) < 0.1
+    sales_with_gst[on_edge] = rng.choice(edges, on_edge.sum())
+
+    store_codes = rng.integers(1000, 1100, n_rows)
+    names = np.array([f'Person {i}' for i in range(400)] + ['No Name', '-', ' '], dtype=object)
+    salesman = rng.choice(names, n_rows)
+    dm = rng.choice(np.concatenate([names[:40], ['-', '-', '-', '']]), n_rows)
+
+    return pd.DataFrame({
+        'Store Code': store_codes,
+        'Name': np.char.add('Store ', store_codes.astype(str)).astype(object),
+        'Sales_Doc': 'ORDER',
+        'Sales Date': '01/01/2026',
+        'LOB': rng.choice(['Furniture', 'Homeware', 'Other'], n_rows, p=[0.45, 0.45, 0.1]),
+        'Bill No': rng.integers(2_600_000_000, 2_600_000_000 + max(n_rows // 3, 1), n_rows),
+        'Salesman': salesman,
+        'Sum of NET SALES VALUE': sales_with_gst,
+        'Sum of Sales value Without GST': np.round(sales_with_gst / 1.18, 2),
+        'SM': np.char.add('Manager ', (store_codes % 50).astype(str)).astype(object),
+        'DM': dm
+    })
+
+def assert_identical(expected, actual):
+    """Fail unless every incentive column matches bit-for-bit"""
+    for col in INCENTIVE_COLS:
+        left = expected[col].to_numpy(dtype=float)
+        right = actual[col].to_numpy(dtype=float)
+        if not np.array_equal(left.view(np.int64), right.view(np.int64)):
+            mismatches = np.flatnonzero(left.view(np.int64) != right.view(np.int64))
+            raise AssertionError(f"{col}: {len(mismatches)} rows differ (first at row {mismatches[0]})")
+
+def run(sizes):
+    for module in [utils_calculator, backend_calculator]:
+        print(f"\n{module.__name__}")
+        print(f"{'rows':>10} {'row-wise (s)':>14} {'vectorized (s)':>16} {'speedup':>10}")
+
+        for n_rows in sizes:
+            df = make_transactions(n_rows)
+
+            start = time.perf_counter()
+            expected = df.apply(module.calculate_incentives, axis=1)
+            row_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            actual = module.calculate_incentives_vectorized(df)
+            vec_time = time.perf_counter() - start
+
+            assert_identical(expected, actual)
+            print(f"{n_rows:>10,} {row_time:>14.3f} {vec_time:>16.4f} {row_time / vec_time:>9.0f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+    run(args.sizes)
@@ -0,0 +1,77 @@
+"""
+Ingestion benchmark and parity check
+Loads synthetic exports (with text bill numbers mixed in, as in the real BI
+export) through utils.ingest.load_sales_frame with a chunk size that splits
+the file into several chunks, and through the old whole-file pd.read_excel /
+pd.read_csv path. Fails unless both give the same frame (the baseline's
+identifier columns read as text) and the same Actual Bills per store and LOB,
+then reports seconds for each.
+
+Usage:
+    python benchmarks/bench_ingest.py
+    python benchmarks/bench_ingest.py --sizes 100000 --formats csv --chunk-size 10000
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.calculator import calculate_qualifier_metrics
+from utils.ingest import REQUIRED_COLUMNS, identifiers_as_text, load_sales_frame, prepare_sales_frame
+from generate_export import SHEET_NAME, make_export, write_export
+
+MONTH = '2026-01'
+FORMATS = ['xlsx', 'csv']
+
+def read_baseline(path, file_format):
+    """The whole-file read the chunked ingestion replaced"""
+    if file_format == 'xlsx':
+        df = pd.read_excel(path, sheet_name=SHEET_NAME)
+    else:
+        df = pd.read_csv(path, encoding='utf-8-sig')
+    return prepare_sales_frame(df[REQUIRED_COLUMNS].copy())
+
+def assert_same_bills(expected, actual):
+    """Fail unless Actual Bills (and so AOV and qualification) match for every store and LOB"""
+    left = calculate_qualifier_metrics(expected).set_index(['Store Name', 'LOB'])['Actual Bills']
+    right = calculate_qualifier_metrics(actual).set_index(['Store Name', 'LOB'])['Actual Bills']
+    pd.testing.assert_series_equal(left.sort_index(), right.sort_index())
+
+def run(sizes, formats, chunk_size, text_bill_share, seed):
+    with tempfile.TemporaryDirectory() as work_dir:
+        for n_rows in sizes:
+            df = make_export(n_rows, text_bill_share=text_bill_share, month=MONTH, seed=seed)
+            print(f"\n{n_rows:,} rows, chunks of {chunk_size:,}")
+            print(f"{'format':<8} {'baseline (s)':>13} {'chunked (s)':>12} {'bills':>8}")
+
+            for file_format in formats:
+                path = write_export(df, Path(work_dir) / f'export_{n_rows}.{file_format}')
+
+                start = time.perf_counter()
+                expected = read_baseline(path, file_format)
+                base_time = time.perf_counter() - start
+
+                start = time.perf_counter()
+                actual = load_sales_frame(str(path), SHEET_NAME, chunk_size=chunk_size, use_cache=False)
+                chunk_time = time.perf_counter() - start
+
+                assert_same_bills(expected, actual)
+                pd.testing.assert_frame_equal(identifiers_as_text(expected), actual)
+                print(f"{file_format:<8} {base_time:>13.3f} {chunk_time:>12.3f} {actual['Bill No'].nunique():>8,}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[20_000, 100_000])
+    parser.add_argument('--formats', choices=FORMATS, nargs='+', default=FORMATS)
+    parser.add_argument('--chunk-size', type=int, default=7_000)
+    parser.add_argument('--text-bill-share', type=float, default=0.85)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    run(args.sizes, args.formats, args.chunk_size, args.text_bill_share, args.seed)
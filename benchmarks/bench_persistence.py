@@ -0,0 +1,148 @@
+"""
+Job result persistence benchmark
+Compares saving job results one ORM object per row (the original
+process_incentives_background loop) with the batched bulk path in
+backend/persistence.py, and checks both store the same rows.
+
+Runs against a temporary SQLite file, plus PostgreSQL when --postgres-url
+is given (the bulk path uses COPY there). Tables are recreated for every
+size.
+
+Usage:
+    python benchmarks/bench_persistence.py
+    python benchmarks/bench_persistence.py --sizes 10000 100000 --postgres-url postgresql://localhost/bench
+"""
+import argparse
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import pandas as pd
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.calculator import process_incentives
+from backend.database import Base
+from backend.models import Upload, Job, Transaction, EmployeeSummary, QualifierTracker
+from backend.persistence import save_job_results
+from generate_export import make_export, write_export
+
+MONTH = '2026-01'
+
+def save_job_results_orm(db, job_id, df, summary_df, tracker_df):
+    """Original per-row ORM implementation, kept as the reference"""
+    for _, row in df.iterrows():
+        db.add(Transaction(
+            job_id=job_id,
+            store_code=str(row['Store Code']),
+            store_name=row['Name'],
+            sales_doc=str(row['Sales_Doc']),
+            sales_date=str(row['Sales Date']),
+            lob=row['LOB'],
+            bill_no=str(row['Bill No']),
+            salesman=row['Salesman'],
+            net_sales_value=float(row['Sum of NET SALES VALUE']),
+            sales_without_gst=float(row['Sum of Sales value Without GST']),
+            sm=row['SM'],
+            dm=row['DM'],
+            ince_amt=float(row['Ince Amt']),
+            pe_inc_amt=float(row['PE Inc amt']),
+            sm_inc_amt=float(row['SM Inc Amt']),
+            dm_inc_amt=float(row['DM Inc Amt'])
+        ))
+
+    for _, row in summary_df.iterrows():
+        db.add(EmployeeSummary(
+            job_id=job_id,
+            store_code=str(row['Store Code']),
+            store_name=row['Store Name'],
+            employee=row['Employee'],
+            role=row['Role'],
+            furniture_points=float(row['Furniture Points']),
+            homeware_points=float(row['Homeware Points']),
+            total_points=float(row['Total Points'])
+        ))
+
+    for _, row in tracker_df.iterrows():
+        db.add(QualifierTracker(
+            job_id=job_id,
+            store_code=str(row['Store Code']),
+            store_name=row['Store Name'],
+            lob=row['LOB'],
+            actual_aov=int(row['Actual AOV']),
+            target_aov=int(row['Target AOV']),
+            aov_achievement=float(row['AOV Achievement %']),
+            actual_bills=int(row['Actual Bills']),
+            target_bills=int(row['Target Bills']),
+            bills_achievement=float(row['Bills Achievement %']),
+            status=row['Qualifier Status']
+        ))
+
+def stored_rows(db, job_id):
+    """Everything saved for a job, without the surrogate ids"""
+    frames = []
+    for model in [Transaction, EmployeeSummary, QualifierTracker]:
+        table = model.__table__
+        columns = [c for c in table.columns if c.name not in ('id', 'job_id')]
+        query = select(*columns).where(table.c.job_id == job_id).order_by(table.c.id)
+        frames.append(pd.DataFrame(db.execute(query).all(), columns=[c.name for c in columns]))
+    return frames
+
+def timed_save(Session, save, results):
+    """Save results for a new job in one transaction; returns (seconds, job_id)"""
+    with Session() as db:
+        file_id, job_id = str(uuid.uuid4()), str(uuid.uuid4())
+        db.add(Upload(id=file_id, filename='bench.parquet', file_path='bench.parquet'))
+        db.flush()
+        db.add(Job(id=job_id, file_id=file_id, status='processing'))
+        db.commit()
+
+        start = time.perf_counter()
+        save(db, job_id, *results)
+        db.commit()
+        return time.perf_counter() - start, job_id
+
+def run(sizes, urls):
+    with tempfile.TemporaryDirectory() as work_dir:
+        for name, url in urls:
+            url = url or f"sqlite:///{Path(work_dir) / 'bench.db'}"
+            engine = create_engine(url)
+            Session = sessionmaker(bind=engine)
+
+            print(f"\n{name}")
+            print(f"{'rows':>10} {'ORM per row (s)':>16} {'bulk (s)':>10} {'speedup':>10}")
+
+            for n_rows in sizes:
+                path = write_export(make_export(n_rows, month=MONTH), Path(work_dir) / f'export_{n_rows}.parquet')
+                df, summary_df, tracker_df, _ = process_incentives(str(path), month=MONTH, workers=1)
+                results = (df, summary_df, tracker_df)
+
+                Base.metadata.drop_all(engine)
+                Base.metadata.create_all(engine)
+                orm_time, orm_job = timed_save(Session, save_job_results_orm, results)
+                bulk_time, bulk_job = timed_save(Session, save_job_results, results)
+
+                with Session() as db:
+                    for expected, actual in zip(stored_rows(db, orm_job), stored_rows(db, bulk_job)):
+                        pd.testing.assert_frame_equal(expected, actual)
+
+                print(f"{n_rows:>10,} {orm_time:>16.3f} {bulk_time:>10.3f} {orm_time / bulk_time:>9.1f}x")
+
+            Base.metadata.drop_all(engine)
+            engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--postgres-url', help="Also benchmark this (disposable) PostgreSQL database")
+    args = parser.parse_args()
+
+    urls = [('SQLite', None)]
+    if args.postgres_url:
+        urls.append(('PostgreSQL', args.postgres_url))
+    run(args.sizes, urls)
@@ -0,0 +1,160 @@
+"""
+Calculation pipeline benchmark
+Times each stage of the Streamlit pipeline (process_file from a cold and a
+warm parse cache, create_employee_summary, calculate_qualifier_metrics and
+apply_qualifier_logic) on synthetic exports from generate_export.py, and
+reports seconds, rows/sec and peak RSS per stage.
+
+Each size runs in a fresh process, so peak RSS is per size. Results can be
+saved as JSON and compared against an earlier run to spot regressions.
+
+Usage:
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --sizes 10000 100000 --format csv --output bench.json
+    python benchmarks/bench_pipeline.py --compare bench.json
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils import cache as parse_cache
+from utils.calculator import (
+    apply_qualifier_logic, calculate_qualifier_metrics, create_employee_summary, process_file
+)
+from generate_export import FORMATS, SHEET_NAME, make_export, write_export
+
+MONTH = '2026-01'
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB (None where unavailable)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def make_targets(qualifier_df):
+    """Targets just below actuals for every other store and just above for the rest"""
+    targets = {}
+    for i, (store, lobs) in enumerate(qualifier_df.groupby('Store Name')):
+        factor = 0.9 if i % 2 == 0 else 1.1
+        targets[store] = {
+            row['LOB']: {'aov': row['Actual AOV'] * factor, 'bills': int(row['Actual Bills'] * factor)}
+            for _, row in lobs.iterrows()
+        }
+    return targets
+
+def run_stages(path, n_rows):
+    """Run every stage once on one export (in a fresh process) and time it"""
+    results = []
+
+    def timed(stage, func, *args):
+        start = time.perf_counter()
+        value = func(*args)
+        seconds = time.perf_counter() - start
+        results.append({
+            'stage': stage,
+            'seconds': round(seconds, 4),
+            'rows_per_sec': round(n_rows / seconds) if seconds else None,
+            'peak_rss_mb': peak_rss_mb()
+        })
+        return value
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        # Private parse cache, so the cold run really parses and leaves nothing behind
+        parse_cache.CACHE_DIR = Path(cache_dir)
+        df = timed('process_file (cold)', process_file, path, SHEET_NAME, MONTH)
+        df = timed('process_file (cached)', process_file, path, SHEET_NAME, MONTH)
+
+    summary_df = timed('create_employee_summary', create_employee_summary, df)
+    qualifier_df = timed('calculate_qualifier_metrics', calculate_qualifier_metrics, df)
+    targets = make_targets(qualifier_df)
+    timed('apply_qualifier_logic', apply_qualifier_logic, summary_df, qualifier_df, targets)
+
+    return results
+
+def run(sizes, file_format, seed):
+    runs = []
+    context = multiprocessing.get_context('spawn')
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        for n_rows in sizes:
+            path = write_export(make_export(n_rows, month=MONTH, seed=seed),
+                                Path(work_dir) / f'export_{n_rows}.{file_format}')
+
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                stages = pool.submit(run_stages, str(path), n_rows).result()
+
+            print(f"\n{n_rows:,} rows ({file_format})")
+            print(f"{'stage':<30} {'seconds':>10} {'rows/sec':>14} {'peak RSS (MB)':>15}")
+            for result in stages:
+                rate = f"{result['rows_per_sec']:,}" if result['rows_per_sec'] else '-'
+                rss = result['peak_rss_mb'] if result['peak_rss_mb'] is not None else '-'
+                print(f"{result['stage']:<30} {result['seconds']:>10.4f} {rate:>14} {rss:>15}")
+
+            runs.append({'rows': n_rows, 'stages': stages})
+
+    return {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'format': file_format,
+        'seed': seed,
+        'runs': runs
+    }
+
+def compare(baseline, current):
+    """Print the time ratio of every stage against a baseline report (>1 = slower)"""
+    base_times = {
+        (run['rows'], stage['stage']): stage['seconds']
+        for run in baseline['runs'] for stage in run['stages']
+    }
+
+    print(f"\nCompared with baseline from {baseline.get('created_at', '?')} ({baseline.get('format', '?')})")
+    print(f"{'rows':>10} {'stage':<30} {'baseline (s)':>13} {'now (s)':>10} {'ratio':>8}")
+    for run in current['runs']:
+        for stage in run['stages']:
+            before = base_times.get((run['rows'], stage['stage']))
+            if before is None:
+                continue
+            ratio = stage['seconds'] / before if before else float('inf')
+            print(f"{run['rows']:>10,} {stage['stage']:<30} {before:>13.4f} {stage['seconds']:>10.4f} {ratio:>7.2f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--format', choices=FORMATS, default='parquet',
+                        help="Export format to parse (xlsx is slow to write at 1M rows)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Save the results as JSON")
+    parser.add_argument('--compare', help="Earlier JSON results to compare against")
+    args = parser.parse_args()
+
+    report = run(args.sizes, args.format, args.seed)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved results to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(json.load(f), report)
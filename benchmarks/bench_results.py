@@ -0,0 +1,106 @@
+"""
+Result store benchmark
+Saves one synthetic job both ways (every row in a temporary SQLite
+database, and as Parquet in the result store) and compares the storage
+size and the p50/p95 latency of /data/aggregate queries on each.
+
+Usage:
+    python benchmarks/bench_results.py
+    python benchmarks/bench_results.py --rows 1000000 --repeat 20
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+# Point the backend at a throwaway database before it is imported
+WORK_DIR = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{Path(WORK_DIR) / 'bench.db'}"
+os.environ["JOB_WORKERS"] = "0"
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastapi.testclient import TestClient
+
+from backend import result_store
+from backend.calculator import process_incentives
+from backend.database import SessionLocal, init_db
+from backend.main import app
+from backend.models import Job, Upload
+from backend.persistence import save_job_results, save_job_rollups
+from generate_export import make_export, write_export
+
+MONTH = '2026-01'
+
+CASES = [
+    ('total', {}),
+    ('by store', {'by': ['store_code']}),
+    ('by LOB and date', {'by': ['lob', 'sales_date']}),
+    ('Homeware by salesman', {'by': ['salesman'], 'lob': 'Homeware'})
+]
+
+def load_jobs(n_rows):
+    """Calculate one synthetic job and save it to the database and the result store"""
+    path = write_export(make_export(n_rows, month=MONTH), Path(WORK_DIR) / 'export.parquet')
+    df, summary_df, tracker_df, _ = process_incentives(str(path), month=MONTH, workers=1)
+
+    init_db()
+    db = SessionLocal()
+    try:
+        file_id, database_job, parquet_job = str(uuid.uuid4()), str(uuid.uuid4()), str(uuid.uuid4())
+        db.add(Upload(id=file_id, filename=path.name, file_path=str(path)))
+        db.flush()
+        for job_id in (database_job, parquet_job):
+            db.add(Job(id=job_id, file_id=file_id, status='completed'))
+        db.flush()
+        save_job_results(db, database_job, df, summary_df, tracker_df)
+        db.commit()
+        database_size = Path(WORK_DIR, 'bench.db').stat().st_size
+
+        result_store.write_job_results(parquet_job, df, summary_df, tracker_df)
+        save_job_rollups(db, parquet_job, df, summary_df)
+        db.commit()
+    finally:
+        db.close()
+    return database_job, parquet_job, database_size
+
+def percentiles(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return np.percentile(times, 50) * 1000, np.percentile(times, 95) * 1000
+
+def run(n_rows, repeat):
+    database_job, parquet_job, database_size = load_jobs(n_rows)
+    parquet_size = sum(f.stat().st_size for f in result_store.job_dir(parquet_job).iterdir())
+    client = TestClient(app)
+
+    try:
+        print(f"\nStorage, {n_rows:,} rows")
+        print(f"  SQLite tables  {database_size / 1024 / 1024:>8.1f} MB")
+        print(f"  Parquet files  {parquet_size / 1024 / 1024:>8.1f} MB")
+
+        print(f"\n{'query':<24} {'SQL p50':>10} {'SQL p95':>10} {'Parquet p50':>12} {'Parquet p95':>12}  (ms)")
+        for name, params in CASES:
+            timings = []
+            for job_id in (database_job, parquet_job):
+                request = {'job_id': job_id, **params}
+                timings += percentiles(lambda: client.get('/api/v1/data/aggregate', params=request), repeat)
+            print(f"{name:<24} {timings[0]:>10.1f} {timings[1]:>10.1f} {timings[2]:>12.1f} {timings[3]:>12.1f}")
+    finally:
+        result_store.delete_job_results(parquet_job)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+    run(args.rows, args.repeat)
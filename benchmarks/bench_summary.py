@@ -0,0 +1,80 @@
+"""
+Employee summary benchmark
+Compares the original iterrows-based create_employee_summary with the
+groupby/pivot implementation and checks both return the same frame.
+
+Usage:
+    python benchmarks/bench_summary.py
+    python benchmarks/bench_summary.py --sizes 10000 100000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.calculator import calculate_incentives_vectorized, create_employee_summary
+from bench_incentives import make_transactions
+
+def create_employee_summary_loop(df):
+    """Original dict + iterrows implementation, kept as the reference"""
+    employees = {}
+
+    for role, col in [('PE', 'Salesman'), ('SM', 'SM'), ('DM', 'DM')]:
+        inc_col = 'PE Inc amt' if role == 'PE' else f'{role} Inc Amt'
+        data = df.groupby(['Store Code', 'Name', col, 'LOB'])[inc_col].sum().reset_index()
+
+        for _, row in data.iterrows():
+            emp = row[col]
+            if emp != '-' and row[inc_col] > 0:
+                key = (row['Store Code'], row['Name'], emp, role)
+                if key not in employees:
+                    employees[key] = {
+                        'Store Code': row['Store Code'],
+                        'Store Name': row['Name'],
+                        'Employee': emp,
+                        'Role': role,
+                        'Furniture Points': 0,
+                        'Homeware Points': 0
+                    }
+                if row['LOB'] == 'Furniture':
+                    employees[key]['Furniture Points'] += row[inc_col]
+                else:
+                    employees[key]['Homeware Points'] += row[inc_col]
+
+    summary_df = pd.DataFrame(list(employees.values()))
+
+    if len(summary_df) > 0:
+        summary_df['Total Points'] = summary_df['Furniture Points'] + summary_df['Homeware Points']
+        summary_df = summary_df.round(2)
+        summary_df = summary_df.sort_values(['Store Name', 'Total Points'], ascending=[True, False])
+
+    return summary_df
+
+def run(sizes):
+    print(f"{'rows':>10} {'employees':>10} {'iterrows (s)':>14} {'groupby (s)':>13} {'speedup':>10}")
+
+    for n_rows in sizes:
+        df = make_transactions(n_rows)
+        df = df.join(calculate_incentives_vectorized(df))
+
+        start = time.perf_counter()
+        expected = create_employee_summary_loop(df)
+        loop_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = create_employee_summary(df)
+        vec_time = time.perf_counter() - start
+
+        pd.testing.assert_frame_equal(expected, actual, check_dtype=False)
+        print(f"{n_rows:>10,} {len(actual):>10,} {loop_time:>14.3f} {vec_time:>13.4f} {loop_time / vec_time:>9.0f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+    run(args.sizes)
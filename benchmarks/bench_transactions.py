@@ -0,0 +1,123 @@
+"""
+Transaction paging benchmark
+Loads one synthetic job into a temporary SQLite database and compares the
+p50/p95 latency of /data/transactions pages at increasing depth, paged
+with OFFSET (the original query) and with the keyset cursor, with and
+without filters and sorting.
+
+Usage:
+    python benchmarks/bench_transactions.py
+    python benchmarks/bench_transactions.py --rows 500000 --repeat 50
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+# Point the backend at a throwaway database before it is imported
+WORK_DIR = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{Path(WORK_DIR) / 'bench.db'}"
+os.environ["JOB_WORKERS"] = "0"
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastapi.testclient import TestClient
+
+from backend.calculator import process_incentives
+from backend.database import SessionLocal, init_db
+from backend.main import app
+from backend.models import Job, Transaction, Upload
+from backend.persistence import save_job_results
+from generate_export import make_export, write_export
+
+MONTH = '2026-01'
+PAGE_SIZE = 100
+
+CASES = [
+    ('by id', {}),
+    ('Homeware, by incentive desc', {'lob': 'Homeware', 'sort': 'ince_amt', 'descending': True}),
+    ('incentive >= 100', {'min_incentive': 100})
+]
+
+def load_job(n_rows):
+    """Calculate and save one synthetic job; returns its id"""
+    path = write_export(make_export(n_rows, month=MONTH), Path(WORK_DIR) / 'export.parquet')
+    df, summary_df, tracker_df, _ = process_incentives(str(path), month=MONTH, workers=1)
+
+    init_db()
+    db = SessionLocal()
+    try:
+        file_id, job_id = str(uuid.uuid4()), str(uuid.uuid4())
+        db.add(Upload(id=file_id, filename=path.name, file_path=str(path)))
+        db.flush()
+        db.add(Job(id=job_id, file_id=file_id, status='completed'))
+        db.flush()
+        save_job_results(db, job_id, df, summary_df, tracker_df)
+        db.commit()
+    finally:
+        db.close()
+    return job_id
+
+def offset_page(job_id, depth):
+    """The original OFFSET query"""
+    db = SessionLocal()
+    try:
+        return db.query(Transaction).filter(
+            Transaction.job_id == job_id
+        ).offset(depth).limit(PAGE_SIZE).all()
+    finally:
+        db.close()
+
+def cursor_at(client, job_id, params, depth):
+    """Walk pages up to depth and return the cursor found there (None past the last page)"""
+    cursor = None
+    for _ in range(depth // 1000):
+        response = client.get('/api/v1/data/transactions',
+                              params={'job_id': job_id, 'limit': 1000, 'cursor': cursor, **params})
+        cursor = response.headers.get('X-Next-Cursor')
+        if cursor is None:
+            break
+    return cursor
+
+def percentiles(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return np.percentile(times, 50) * 1000, np.percentile(times, 95) * 1000
+
+def run(n_rows, repeat):
+    job_id = load_job(n_rows)
+    depths = [d for d in [0, 10_000, 50_000, 100_000, 190_000, 490_000, 990_000] if d < n_rows]
+    client = TestClient(app)
+
+    print(f"\nOFFSET query, {n_rows:,} rows")
+    print(f"{'depth':>10} {'p50 (ms)':>10} {'p95 (ms)':>10}")
+    for depth in depths:
+        p50, p95 = percentiles(lambda: offset_page(job_id, depth), repeat)
+        print(f"{depth:>10,} {p50:>10.2f} {p95:>10.2f}")
+
+    for name, params in CASES:
+        print(f"\nKeyset endpoint, {name}")
+        print(f"{'depth':>10} {'p50 (ms)':>10} {'p95 (ms)':>10}")
+        for depth in depths:
+            cursor = cursor_at(client, job_id, params, depth)
+            if depth and cursor is None:
+                break
+            request = {'job_id': job_id, 'limit': PAGE_SIZE, 'cursor': cursor, **params}
+            p50, p95 = percentiles(lambda: client.get('/api/v1/data/transactions', params=request), repeat)
+            print(f"{depth:>10,} {p50:>10.2f} {p95:>10.2f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--repeat', type=int, default=30)
+    args = parser.parse_args()
+    run(args.rows, args.repeat)
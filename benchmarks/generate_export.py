@@ -0,0 +1,177 @@
+"""
+Synthetic BI export generator
+Builds sales exports shaped like the Hometown BI report (same columns, sheet
+name and value types as IncentiveWorking_Krishiv.xlsx) at any size, with
+knobs for store count, staff per store, LOB mix, DM coverage, "No Name"
+rows and text bill numbers. Sales values are log-normal per LOB, with a
+share of rows placed on and just around the commission slab thresholds.
+
+Usage:
+    python benchmarks/generate_export.py 100000 -o data/synthetic_100k.parquet
+    python benchmarks/generate_export.py 10000 -o data/synthetic_10k.xlsx --stores 20 --no-name-share 0.5
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.rules import get_rule_version
+
+SHEET_NAME = 'Sales Report - Hometown (2)'
+FORMATS = ['xlsx', 'csv', 'parquet']
+
+CITIES = [
+    'Bhubaneshwar Janpath', 'Nashik City Center Mall', 'Aurangabad-Prozone Mall',
+    'Vizag CMR Central Mall', 'GUWAHATI Lachit Nagar', 'Pune Kharadi', 'Thane Viviana',
+    'Noida Sector 18', 'Ahmedabad SG Highway', 'Kolkata Rajarhat', 'Jaipur WTP', 'Indore C21'
+]
+FIRST_NAMES = [
+    'RANJAN', 'KRUSHNA', 'GYANA', 'Alok', 'RATHINDRA', 'Priya', 'Suresh', 'Anita',
+    'Rahul', 'Deepak', 'Kavita', 'Manoj', 'Sneha', 'Vikas', 'Pooja', 'Amit'
+]
+LAST_NAMES = [
+    'SAMAL', 'BEHERA', 'DAS', 'Sahoo', 'SARKAR', 'Patil', 'Sharma', 'Iyer',
+    'Nair', 'Gupta', 'Reddy', 'Joshi', 'Mishra', 'Kulkarni', 'Singh', 'Rao'
+]
+
+# Median sales value (with GST) and log-normal spread per LOB, from the sample export
+LOB_VALUES = {'Furniture': (32000.0, 0.9), 'Homeware': (1600.0, 1.1)}
+GST_FACTORS = [1.05, 1.12, 1.18, 1.28]
+
+def slab_thresholds(month=None):
+    """Slab thresholds per LOB from the commission rules in force for month"""
+    return {
+        lob: np.array([slab['up_to'] for slab in slabs if 'up_to' in slab], dtype=float)
+        for lob, slabs in get_rule_version(month)['lobs'].items()
+    }
+
+def _names(rng, n, prefix=''):
+    first = rng.choice(FIRST_NAMES, n)
+    last = rng.choice(LAST_NAMES, n)
+    return np.char.add(np.char.add(np.char.add(prefix, first), ' '), last).astype(object)
+
+def make_export(n_rows, stores=14, salespeople_per_store=8, furniture_share=0.15,
+                dm_share=0.85, no_name_share=0.35, edge_share=0.1, text_bill_share=0.0,
+                month=None, seed=42):
+    """
+    Build a synthetic BI export with the REQUIRED_COLUMNS of a real one
+
+    Args:
+        n_rows: Number of transaction lines
+        stores: Number of stores (rows are spread unevenly across them)
+        salespeople_per_store: Named salespeople per store
+        furniture_share: Share of Furniture lines (the rest are Homeware)
+        dm_share: Share of lines with a DM (the rest have DM '-')
+        no_name_share: Share of lines with Salesman 'No Name'
+        edge_share: Share of lines placed on or one paisa around a slab threshold
+        text_bill_share: Share of bills numbered like '4PBN1234' instead of an
+            integer (the sample export mixes both, about 0.85 text)
+        month: Month (YYYY-MM) whose slab thresholds are used; also sets the sales dates
+        seed: Random seed, so the same arguments always give the same export
+    """
+    rng = np.random.default_rng(seed)
+
+    # Stores: some much busier than others
+    store_codes = 6000 + np.sort(rng.choice(np.arange(1, 10 * stores + 1), stores, replace=False))
+    store_names = np.array([
+        f'HT {CITIES[i % len(CITIES)]}' + (f' {i // len(CITIES) + 1}' if i >= len(CITIES) else '')
+        for i in range(stores)
+    ], dtype=object)
+    weights = rng.lognormal(0, 0.5, stores)
+    store = np.sort(rng.choice(stores, n_rows, p=weights / weights.sum()))
+
+    # Staff: a roster of salespeople and one SM per store, two DMs per store
+    roster = _names(rng, stores * salespeople_per_store).reshape(stores, salespeople_per_store)
+    salesman = roster[store, rng.integers(0, salespeople_per_store, n_rows)]
+    salesman[rng.random(n_rows) < no_name_share] = 'No Name'
+    sm = _names(rng, stores)[store]
+    dm = _names(rng, 2 * stores).reshape(stores, 2)[store, rng.integers(0, 2, n_rows)]
+    dm[rng.random(n_rows) >= dm_share] = '-'
+
+    # Values: log-normal per LOB, with a share pinned to the slab thresholds
+    lob = np.where(rng.random(n_rows) < furniture_share, 'Furniture', 'Homeware').astype(object)
+    sales_with_gst = np.empty(n_rows)
+    on_edge = rng.random(n_rows) < edge_share
+    for name, edges in slab_thresholds(month).items():
+        rows = lob == name
+        median, sigma = LOB_VALUES[name]
+        sales_with_gst[rows] = rng.lognormal(np.log(median), sigma, rows.sum())
+        rows &= on_edge
+        sales_with_gst[rows] = rng.choice(edges, rows.sum()) + rng.choice([-0.01, 0.0, 0.01], rows.sum())
+    sales_with_gst = np.round(sales_with_gst, 2)
+    sales_without_gst = np.round(sales_with_gst / rng.choice(GST_FACTORS, n_rows), 2)
+
+    # Bills: mostly one line each, some spanning two lines of the same store
+    new_bill = rng.random(n_rows) >= 0.01
+    new_bill[0] = True
+    bill = np.cumsum(new_bill)
+    bill_no = 2_603_600_000 + bill
+    if text_bill_share:
+        # Every line of a bill shares its number, text or integer
+        text_bill = (rng.random(bill[-1] + 1) < text_bill_share)[bill]
+        bill_no = bill_no.astype(object)
+        bill_no[text_bill] = np.char.add('4PBN', bill[text_bill].astype(str))
+
+    month = month or pd.Timestamp.now().strftime('%Y-%m')
+    days = pd.Period(month).days_in_month
+    sales_date = pd.to_datetime(month + '-01') + pd.to_timedelta(rng.integers(0, days, n_rows), unit='D')
+
+    return pd.DataFrame({
+        'Store Code': store_codes[store],
+        'Name': store_names[store],
+        'Sales_Doc': np.where(lob == 'Furniture', 'ORDER', 'SALE').astype(object),
+        'Sales Date': sales_date.strftime('%d/%m/%Y').astype(object),
+        'LOB': lob,
+        'Bill No': bill_no,
+        'Salesman': salesman,
+        'Sum of NET SALES VALUE': sales_with_gst,
+        'Sum of Sales value Without GST': sales_without_gst,
+        'SM': sm,
+        'DM': dm
+    })
+
+def write_export(df, path, file_format=None):
+    """Write an export as xlsx (BI sheet name), CSV or Parquet; the format defaults to the file suffix"""
+    path = Path(path)
+    file_format = file_format or path.suffix.lstrip('.').lower()
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    if file_format == 'xlsx':
+        df.to_excel(path, sheet_name=SHEET_NAME, index=False)
+    elif file_format == 'csv':
+        df.to_csv(path, index=False)
+    elif file_format == 'parquet':
+        df.to_parquet(path, index=False)
+    else:
+        raise ValueError(f"Unsupported export format '{file_format}', use one of {FORMATS}")
+    return path
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('rows', type=int)
+    parser.add_argument('-o', '--output', required=True, help="Output file (.xlsx, .csv or .parquet)")
+    parser.add_argument('--format', choices=FORMATS, help="Override the format implied by the suffix")
+    parser.add_argument('--stores', type=int, default=14)
+    parser.add_argument('--salespeople-per-store', type=int, default=8)
+    parser.add_argument('--furniture-share', type=float, default=0.15)
+    parser.add_argument('--dm-share', type=float, default=0.85)
+    parser.add_argument('--no-name-share', type=float, default=0.35)
+    parser.add_argument('--edge-share', type=float, default=0.1)
+    parser.add_argument('--text-bill-share', type=float, default=0.0)
+    parser.add_argument('--month', help="YYYY-MM (defaults to the current month)")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    df = make_export(
+        args.rows, stores=args.stores, salespeople_per_store=args.salespeople_per_store,
+        furniture_share=args.furniture_share, dm_share=args.dm_share,
+        no_name_share=args.no_name_share, edge_share=args.edge_share, text_bill_share=args.text_bill_share,
+        month=args.month, seed=args.seed
+    )
+    path = write_export(df, args.output, args.format)
+    print(f"Wrote {len(df):,} rows to {path}")
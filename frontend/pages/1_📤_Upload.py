@@ -2,17 +2,19 @@
 Upload Page - File upload and processing
 """
 import streamlit as st
-import pandas as pd
 import sys
 from pathlib import Path
-import time
 from datetime import datetime
 
-# Add parent directory to path
+# Add parent directory to path (and the project root, for the shared readers in utils)
 sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from services.api_client import APIClient
 from config import API_BASE_URL
+from utils.ingest import missing_columns, read_header, read_preview
+
+SALES_SHEET_NAME = 'Sales Report - Hometown (2)'
 
 # Page config
 st.set_page_config(page_title="Upload - Hometown", page_icon="📤", layout="wide")
@@ -27,8 +29,9 @@ st.title("📤 Upload Sales Data")
 
 st.markdown("""
 Upload your Excel file containing sales data to calculate incentives.
+CSV, Parquet and Arrow exports from the BI tool are also accepted and process much faster.
 
-**Required Sheet**: `Sales Report - Hometown (2)`
+**Required Sheet** (Excel only): `Sales Report - Hometown (2)`
 
 **Required Columns**:
 - Store Code, Name, Sales_Doc, Sales Date
@@ -41,8 +44,8 @@ st.divider()
 
 # File uploader
 uploaded_file = st.file_uploader(
-    "Choose an Excel file (.xlsx)",
-    type=['xlsx'],
+    "Choose a sales file (.xlsx, .csv, .parquet, .arrow)",
+    type=['xlsx', 'csv', 'parquet', 'arrow', 'feather'],
     help="Upload the BI export with 'Sales Report - Hometown (2)' sheet"
 )
 
@@ -53,18 +56,13 @@ if uploaded_file:
     # Validate file
     try:
         with st.spinner("Validating file..."):
-            preview = pd.read_excel(uploaded_file, sheet_name='Sales Report - Hometown (2)', nrows=5)
-
-            required_cols = [
-                'Store Code', 'Name', 'Sales_Doc', 'Sales Date', 'LOB', 'Bill No', 'Salesman',
-                'Sum of NET SALES VALUE', 'Sum of Sales value Without GST', 'SM', 'DM'
-            ]
-
-            missing_cols = [col for col in required_cols if col not in preview.columns]
+            # Format from the file's first bytes; only the header row is read
+            missing_cols = missing_columns(read_header(uploaded_file, SALES_SHEET_NAME))
 
             if missing_cols:
                 st.error(f"❌ Missing required columns: {', '.join(missing_cols)}")
             else:
+                preview = read_preview(uploaded_file, SALES_SHEET_NAME, nrows=5)
                 st.success("✅ File validated successfully!")
 
                 # Preview table
@@ -91,16 +89,20 @@ if uploaded_file:
                         # Step 2: Trigger processing
                         with st.spinner("Starting processing..."):
                             job_id = api_client.process(file_id)
-                            st.success(f"✅ Processing started (Job ID: {job_id[:8]}...)")
+                            st.success(f"✅ Processing queued (Job ID: {job_id[:8]}...)")
 
-                        # Step 3: Poll status
+                        # Step 3: Follow progress as the server pushes it
                         progress_bar = st.progress(0)
                         status_text = st.empty()
 
-                        while True:
-                            status = api_client.get_status(job_id)
+                        for status in api_client.watch(job_id):
                             progress_bar.progress(status['progress'])
-                            status_text.text(f"Status: {status['status']} ({status['progress']}%)")
+                            details = [status['stage'] or status['status'], f"{status['progress']}%"]
+                            if status['rows_processed'] is not None:
+                                details.append(f"{status['rows_processed']:,} rows")
+                            if status['elapsed_seconds'] is not None:
+                                details.append(f"{status['elapsed_seconds']:.0f}s")
+                            status_text.text(f"Status: {' · '.join(details)}")
 
                             if status['status'] == 'completed':
                                 progress_bar.progress(100)
@@ -137,7 +139,9 @@ if uploaded_file:
                                 st.error(f"❌ Processing failed: {status.get('error', 'Unknown error')}")
                                 break
 
-                            time.sleep(1)
+                            elif status['status'] == 'cancelled':
+                                st.warning("⚠️ Processing was cancelled")
+                                break
 
                     except Exception as e:
                         st.error(f"❌ Error: {str(e)}")
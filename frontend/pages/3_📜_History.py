@@ -96,6 +96,12 @@ try:
                     elif upload['status'] == 'processing':
                         st.info("⏳ Processing...")
 
+                    elif upload['status'] == 'queued':
+                        st.info("🕒 Queued")
+
+                    elif upload['status'] == 'cancelled':
+                        st.warning("🚫 Cancelled")
+
                     elif upload['status'] == 'failed':
                         st.error("❌ Failed")
 
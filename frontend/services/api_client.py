@@ -1,18 +1,82 @@
 """
 API Client for communicating with FastAPI backend
 """
+import json
+import sys
 import requests
-from typing import Optional, Dict, List
+from pathlib import Path
+from typing import Optional, Dict, Iterator, List, Tuple
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from io import BytesIO
+from urllib3.util.request import ACCEPT_ENCODING
+
+# Add project root to path for the shared utils
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from utils.lru import SizedLRU
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+PARQUET = "application/vnd.apache.parquet"
+
+# Ask data endpoints for Arrow (JSON from older servers), compressed with
+# whatever urllib3 can decode (zstd when its zstd module is installed)
+TABLE_HEADERS = {"Accept": f"{ARROW_STREAM}, application/json;q=0.5", "Accept-Encoding": ACCEPT_ENCODING}
+
+def read_frame(response: requests.Response) -> pd.DataFrame:
+    """Decode an Arrow, Parquet or JSON table response into a DataFrame"""
+    media_type = response.headers.get("Content-Type", "").split(";")[0]
+    if media_type == ARROW_STREAM:
+        table = pa.ipc.open_stream(pa.py_buffer(response.content)).read_all()
+    elif media_type == PARQUET:
+        table = pq.read_table(pa.BufferReader(response.content))
+    else:
+        data = response.json()
+        return pd.DataFrame(data) if data else pd.DataFrame()
+    # Frees each Arrow column as soon as it has been converted
+    return table.to_pandas(split_blocks=True, self_destruct=True)
 
 class APIClient:
-    def __init__(self, base_url: str = "http://127.0.0.1:8000/api/v1"):
+    def __init__(self, base_url: str = "http://127.0.0.1:8000/api/v1", cache_bytes: int = 64 * 1024 * 1024):
         self.base_url = base_url
+        self.cache_bytes = cache_bytes
+        self._cache = SizedLRU(cache_bytes)  # request -> last response with an ETag
+
+    def _get(self, path: str, params: Optional[dict] = None, headers: Optional[dict] = None) -> requests.Response:
+        """
+        GET with a conditional-request cache
+
+        Responses with an ETag are kept (up to cache_bytes, least recently
+        used first out). Immutable ones (completed jobs) are reused without a
+        request; others are revalidated with If-None-Match.
+        """
+        url = f"{self.base_url}{path}"
+        key = (
+            url,
+            tuple(sorted((k, str(v)) for k, v in (params or {}).items() if v is not None)),
+            tuple(sorted((headers or {}).items()))
+        )
+        cached = self._cache.get(key)
+        if cached is not None:
+            if "immutable" in cached.headers.get("Cache-Control", ""):
+                return cached
+            headers = {**(headers or {}), "If-None-Match": cached.headers["ETag"]}
+
+        response = requests.get(url, params=params, headers=headers)
+        if response.status_code == 304 and cached is not None:
+            return cached
+        response.raise_for_status()
+
+        if "ETag" in response.headers:
+            self._cache.put(key, response, len(response.content))
+        else:
+            self._cache.pop(key)
+        return response
 
     def upload(self, file) -> str:
         """Upload a file and return file_id"""
-        files = {"file": (file.name, file, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")}
+        files = {"file": (file.name, file, getattr(file, "type", None) or "application/octet-stream")}
         response = requests.post(f"{self.base_url}/upload", files=files)
         response.raise_for_status()
         return response.json()["file_id"]
@@ -23,52 +87,71 @@ class APIClient:
         response.raise_for_status()
         return response.json()["job_id"]
 
+    def cancel(self, job_id: str) -> str:
+        """Cancel a queued or running job and return its status"""
+        response = requests.post(f"{self.base_url}/jobs/{job_id}/cancel")
+        response.raise_for_status()
+        return response.json()["status"]
+
     def get_status(self, job_id: str) -> dict:
         """Get job status"""
         response = requests.get(f"{self.base_url}/jobs/{job_id}")
         response.raise_for_status()
         return response.json()
 
+    def watch(self, job_id: str) -> Iterator[dict]:
+        """Yield the job's status as the server pushes it, until the job completes, fails or is cancelled"""
+        # The server sends a keep-alive comment every 15s, so a minute of silence means it is gone
+        with requests.get(f"{self.base_url}/jobs/{job_id}/events", stream=True, timeout=(5, 60)) as response:
+            response.raise_for_status()
+            data = []
+            for line in response.iter_lines(decode_unicode=True):
+                if line.startswith("data:"):
+                    data.append(line[5:].strip())
+                elif not line and data:
+                    yield json.loads("\n".join(data))
+                    data = []
+
     def get_summary(self, job_id: str, **filters) -> pd.DataFrame:
         """Get employee summary data"""
         params = {"job_id": job_id, **filters}
-        response = requests.get(f"{self.base_url}/data/summary", params=params)
-        response.raise_for_status()
-        data = response.json()
-        if data:
-            return pd.DataFrame(data)
-        return pd.DataFrame()
+        return read_frame(self._get("/data/summary", params, TABLE_HEADERS))
 
     def get_tracker(self, job_id: str) -> pd.DataFrame:
         """Get qualifier tracker data"""
-        response = requests.get(f"{self.base_url}/data/tracker", params={"job_id": job_id})
-        response.raise_for_status()
-        data = response.json()
+        return read_frame(self._get("/data/tracker", {"job_id": job_id}, TABLE_HEADERS))
+
+    def get_transactions(self, job_id: str, limit: int = 100, cursor: Optional[str] = None, **filters) -> Tuple[pd.DataFrame, Optional[str]]:
+        """Get one page of transaction data and the cursor of the next page (None on the last page)"""
+        params = {"job_id": job_id, "limit": limit, "cursor": cursor, **filters}
+        response = self._get("/data/transactions", params, TABLE_HEADERS)
+        return read_frame(response), response.headers.get("X-Next-Cursor")
+
+    def get_statistics(self, job_id: str) -> dict:
+        """Get aggregate statistics"""
+        return self._get("/data/statistics", {"job_id": job_id}).json()
+
+    def get_rollups(self, job_id: str, dimension: Optional[str] = None) -> pd.DataFrame:
+        """Get per-job totals by store, LOB, role or sales date"""
+        params = {"job_id": job_id, "dimension": dimension}
+        data = self._get("/data/rollups", params).json()
         if data:
             return pd.DataFrame(data)
         return pd.DataFrame()
 
-    def get_transactions(self, job_id: str, limit: int = 100, offset: int = 0) -> pd.DataFrame:
-        """Get transaction data"""
-        params = {"job_id": job_id, "limit": limit, "offset": offset}
-        response = requests.get(f"{self.base_url}/data/transactions", params=params)
+    def get_aggregate(self, job_ids: List[str], by: Optional[List[str]] = None, **filters) -> pd.DataFrame:
+        """Get transaction totals across jobs, grouped by the given columns"""
+        params = {"job_id": job_ids, "by": by or [], **filters}
+        response = requests.get(f"{self.base_url}/data/aggregate", params=params)
         response.raise_for_status()
         data = response.json()
         if data:
             return pd.DataFrame(data)
         return pd.DataFrame()
 
-    def get_statistics(self, job_id: str) -> dict:
-        """Get aggregate statistics"""
-        response = requests.get(f"{self.base_url}/data/statistics", params={"job_id": job_id})
-        response.raise_for_status()
-        return response.json()
-
     def download(self, job_id: str) -> bytes:
         """Download output Excel file"""
-        response = requests.get(f"{self.base_url}/download/{job_id}")
-        response.raise_for_status()
-        return response.content
+        return self._get(f"/download/{job_id}").content
 
     def get_history(self, limit: int = 10, offset: int = 0) -> List[dict]:
         """Get upload history"""
@@ -4,14 +4,15 @@ Upload Page - File upload and processing
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-import io
 import sys
 from pathlib import Path
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from utils.calculator import process_file, create_employee_summary, calculate_qualifier_metrics
+from utils.incremental import process_snapshot
+from utils.ingest import read_header, read_preview, missing_columns
+from utils.export import workbook_bytes
 
 # Page config
 st.set_page_config(page_title="Upload - Hometown", page_icon="📤", layout="wide")
@@ -24,6 +25,7 @@ st.title("📤 Upload Sales Data")
 
 st.markdown("""
 Upload your Excel file containing sales data to calculate incentives.
+CSV, Parquet and Arrow exports from the BI tool are also accepted and load much faster.
 
 **Note**: The first sheet in your Excel file will be processed automatically.
 
@@ -38,8 +40,8 @@ st.divider()
 
 # File uploader
 uploaded_file = st.file_uploader(
-    "Choose an Excel file (.xlsx)",
-    type=['xlsx'],
+    "Choose a sales file (.xlsx, .csv, .parquet, .arrow)",
+    type=['xlsx', 'csv', 'parquet', 'arrow', 'feather'],
     help="Upload your sales data Excel file - the first sheet will be used"
 )
 
@@ -50,19 +52,13 @@ if uploaded_file:
     # Validate and process
     try:
         with st.spinner("Validating file..."):
-            # Quick validation - use first sheet
-            preview = pd.read_excel(uploaded_file, sheet_name=0, nrows=5)
-
-            required_cols = [
-                'Store Code', 'Name', 'Sales_Doc', 'Sales Date', 'LOB', 'Bill No', 'Salesman',
-                'Sum of NET SALES VALUE', 'Sum of Sales value Without GST', 'SM', 'DM'
-            ]
-
-            missing_cols = [col for col in required_cols if col not in preview.columns]
+            # Quick validation - read only the header row of the first sheet
+            missing_cols = missing_columns(read_header(uploaded_file))
 
             if missing_cols:
                 st.error(f"❌ Missing required columns: {', '.join(missing_cols)}")
             else:
+                preview = read_preview(uploaded_file, nrows=5)
                 st.success("✅ File validated successfully!")
 
                 # Preview table
@@ -100,6 +96,20 @@ if uploaded_file:
                     help="Check this only for the final month-end upload that should be used for actual payout calculations"
                 )
 
+                # Latest earlier upload of the same month, used for incremental processing
+                previous_upload = max(
+                    (u for u in st.session_state.uploads if u['month'] == selected_month),
+                    key=lambda u: u['timestamp'],
+                    default=None
+                )
+                incremental = False
+                if previous_upload is not None:
+                    incremental = st.checkbox(
+                        "⚡ Only process changes since the last upload",
+                        value=True,
+                        help=f"Reuse results from {previous_upload['filename']} and only calculate new or changed lines"
+                    )
+
                 # Show summary
                 month_display = datetime.strptime(selected_month, "%Y-%m").strftime("%B %Y")
                 final_indicator = " 🔒 **FINAL**" if is_final else " 📊 Progress Tracker"
@@ -119,11 +129,22 @@ if uploaded_file:
 
                         # Process file
                         with st.spinner("Processing file..."):
-                            df = process_file(uploaded_file)
-                            summary_df = create_employee_summary(df)
-                            qualifier_df = calculate_qualifier_metrics(df)
+                            result = process_snapshot(
+                                uploaded_file,
+                                previous=previous_upload if incremental else None,
+                                month=selected_month
+                            )
+                            df = result['transactions_df']
+                            summary_df = result['summary_df']
+                            qualifier_df = result['qualifier_df']
 
                         st.success("✅ Processing completed!")
+                        if incremental:
+                            st.info(
+                                f"⚡ {result['added_lines']:,} new/changed lines, "
+                                f"{result['removed_lines']:,} removed, "
+                                f"{result['unchanged_lines']:,} unchanged"
+                            )
 
                         # Store in session state
                         upload_data = {
@@ -136,6 +157,7 @@ if uploaded_file:
                             'transactions_df': df,
                             'summary_df': summary_df,
                             'qualifier_df': qualifier_df,
+                            'state': result['state'],  # Running totals for the next incremental upload (session only)
                             'total_transactions': len(df),
                             'total_incentives': float(df['Ince Amt'].sum()),
                             'employees_count': len(summary_df),
@@ -180,11 +202,10 @@ if uploaded_file:
                         st.subheader("📥 Download Results")
 
                         # Create Excel file
-                        output = io.BytesIO()
-                        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                            df.to_excel(writer, sheet_name='Detailed Transactions', index=False)
-                            summary_df.to_excel(writer, sheet_name='Employee Points Summary', index=False)
-                        output.seek(0)
+                        output = workbook_bytes({
+                            'Detailed Transactions': df,
+                            'Employee Points Summary': summary_df
+                        })
 
                         col1, col2 = st.columns([1, 2])
                         with col1:
@@ -16,6 +16,7 @@ from utils.charts import (
     create_role_distribution_chart,
     create_store_comparison_chart
 )
+from utils.database import upload_sales_total
 
 # Page config
 st.set_page_config(page_title="Dashboard - Hometown", page_icon="📊", layout="wide")
@@ -67,12 +68,11 @@ else:
     selected_upload = upload_options[selected_label]
 
     summary_df = selected_upload['summary_df']
-    df = selected_upload['transactions_df']
 
     # KPI Cards
     st.subheader("Overview")
     col1, col2, col3, col4, col5 = st.columns(5)
-    col1.metric("Total Sales", f"₹{df['Sum of Sales value Without GST'].sum():,.0f}")
+    col1.metric("Total Sales", f"₹{upload_sales_total(selected_upload):,.0f}")
     col2.metric("Total Incentives", f"₹{selected_upload['total_incentives']:,.2f}")
     col3.metric("Transactions", f"{selected_upload['total_transactions']:,}")
     col4.metric("Employees", selected_upload['employees_count'])
@@ -2,10 +2,10 @@
 History Page - View past uploads and download results
 """
 import streamlit as st
-import io
-import pandas as pd
 from datetime import datetime
 
+from utils.export import workbook_bytes
+
 # Page config
 st.set_page_config(page_title="History - Hometown", page_icon="📜", layout="wide")
 
@@ -72,11 +72,10 @@ else:
 
             with col2:
                 # Download button
-                output = io.BytesIO()
-                with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                    upload['transactions_df'].to_excel(writer, sheet_name='Detailed Transactions', index=False)
-                    upload['summary_df'].to_excel(writer, sheet_name='Employee Points Summary', index=False)
-                output.seek(0)
+                output = workbook_bytes({
+                    'Detailed Transactions': upload['transactions_df'],
+                    'Employee Points Summary': upload['summary_df']
+                })
 
                 st.download_button(
                     label="📥 Download Excel",
@@ -2,6 +2,7 @@
 Targets & Qualifier Tracker Page
 Manage targets and view qualification status
 """
+import copy
 import streamlit as st
 import pandas as pd
 import sys
@@ -13,11 +14,13 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 # Try multiple import methods for compatibility
 try:
     from utils.calculator import apply_qualifier_logic
+    from utils.export import workbook_bytes
 except ImportError:
     # For Streamlit Cloud
     import os
     sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     from utils.calculator import apply_qualifier_logic
+    from utils.export import workbook_bytes
 
 # Page config
 st.set_page_config(page_title="Targets - Hometown", page_icon="🎯", layout="wide")
@@ -29,6 +32,9 @@ if 'uploads' not in st.session_state:
 if 'targets' not in st.session_state:
     st.session_state.targets = {}  # Structure: targets[month][store][lob] = {aov, bills}
 
+if 'saved_targets' not in st.session_state:
+    st.session_state.saved_targets = {}  # Targets as stored in the database, same structure
+
 if 'selected_month' not in st.session_state:
     from datetime import datetime
     st.session_state.selected_month = datetime.now().strftime("%Y-%m")
@@ -209,25 +215,19 @@ else:
 
         if st.button("💾 Save All Targets", type="primary"):
             try:
-                from utils.database import save_targets
+                from utils.database import save_targets_bulk
 
                 # Save all targets for the selected target month to database
-                month_targets = st.session_state.targets.get(st.session_state.target_month, {})
-                saved_count = 0
-
-                for store_name, lobs in month_targets.items():
-                    for lob, values in lobs.items():
-                        save_targets(
-                            st.session_state.target_month,
-                            store_name,
-                            lob,
-                            values['aov'],
-                            values['bills']
-                        )
-                        saved_count += 1
-
-                st.success(f"✅ {saved_count} targets saved to database!")
-                st.balloons()
+                month = st.session_state.target_month
+                month_targets = st.session_state.targets.get(month, {})
+                saved_count = save_targets_bulk(month, month_targets, st.session_state.saved_targets.get(month))
+                st.session_state.saved_targets[month] = copy.deepcopy(month_targets)
+
+                if saved_count:
+                    st.success(f"✅ {saved_count} changed targets saved to database!")
+                    st.balloons()
+                else:
+                    st.info("ℹ️ No target changes to save.")
             except Exception as e:
                 st.error(f"⚠️ Failed to save targets to database: {e}")
                 st.info("Targets are still available in this session, but won't persist after refresh.")
@@ -416,12 +416,10 @@ else:
 
             # Download button
             st.divider()
-            import io
-            output = io.BytesIO()
-            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                display_df.to_excel(writer, sheet_name='Final Payables', index=False)
-                results_df.drop('Qualified', axis=1).to_excel(writer, sheet_name='Qualifier Status', index=False)
-            output.seek(0)
+            output = workbook_bytes({
+                'Final Payables': display_df,
+                'Qualifier Status': results_df.drop('Qualified', axis=1)
+            })
 
             st.download_button(
                 label="📥 Download Final Payables Report",
@@ -12,10 +12,12 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 try:
     from utils.calculator import apply_qualifier_logic
+    from utils.export import workbook_bytes
 except ImportError:
     import os
     sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     from utils.calculator import apply_qualifier_logic
+    from utils.export import workbook_bytes
 
 # Page config
 st.set_page_config(page_title="Monthly Summary - Hometown", page_icon="📊", layout="wide")
@@ -294,13 +296,11 @@ else:
             st.divider()
             st.subheader("📥 Download Monthly Summary")
 
-            import io
-            output = io.BytesIO()
-            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                final_display.to_excel(writer, sheet_name='Final Payouts', index=False)
-                qualifier_status_df.to_excel(writer, sheet_name='Qualifier Status', index=False)
-                monthly_summary.to_excel(writer, sheet_name='Accrued Points', index=False)
-            output.seek(0)
+            output = workbook_bytes({
+                'Final Payouts': final_display,
+                'Qualifier Status': qualifier_status_df,
+                'Accrued Points': monthly_summary
+            })
 
             st.download_button(
                 label="📥 Download Monthly Summary Excel",
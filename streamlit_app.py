@@ -2,8 +2,13 @@
 Hometown Incentive Calculator - Main Page
 Full-featured cloud version with PostgreSQL persistence
 """
+import copy
+
 import streamlit as st
-from utils.database import init_database, load_uploads, load_targets
+from utils.database import (
+    MIGRATION_BATCH_SIZE, connection_stats, distinct_values, init_database, load_uploads, load_targets,
+    migrate_uploads, pending_migrations
+)
 
 # Page config - MUST be first Streamlit command
 st.set_page_config(
@@ -26,6 +31,8 @@ if 'db_loaded' not in st.session_state:
         with st.spinner("Loading data from database..."):
             st.session_state.uploads = load_uploads()
             st.session_state.targets = load_targets()
+            # What is stored, so saving targets only writes what changed
+            st.session_state.saved_targets = copy.deepcopy(st.session_state.targets)
             st.session_state.db_loaded = True
 
             # Show success message with count
@@ -84,8 +91,8 @@ if st.session_state.uploads:
         # Aggregate stats for the month
         total_incentives = sum(u['total_incentives'] for u in month_uploads)
         total_transactions = sum(u['total_transactions'] for u in month_uploads)
-        unique_employees = len(set(emp for u in month_uploads for emp in u['summary_df']['Employee'].values))
-        unique_stores = len(set(store for u in month_uploads for store in u['transactions_df']['Name'].values))
+        unique_employees = len(distinct_values(month_uploads, 'summary_df', 'Employee'))
+        unique_stores = len(distinct_values(month_uploads, 'transactions_df', 'Name'))
 
         st.subheader("Month Aggregates")
         col1, col2, col3, col4 = st.columns(4)
@@ -195,3 +202,25 @@ with st.sidebar:
     if st.session_state.uploads:
         total_incentives = sum(u['total_incentives'] for u in st.session_state.uploads)
         st.metric("Total Incentives Calculated", f"₹{total_incentives:,.2f}")
+
+    db_stats = connection_stats.snapshot()
+    if db_stats['connections']:
+        st.metric(
+            "DB Connect Latency", f"{db_stats['avg_connect_ms']:.0f} ms",
+            help=f"{db_stats['connections']} connection(s) opened for {db_stats['checkouts']} database calls"
+        )
+
+    # Uploads saved by older versions are migrated on request, not on startup
+    if st.session_state.db_loaded and 'pending_migrations' not in st.session_state:
+        try:
+            st.session_state.pending_migrations = pending_migrations()
+        except Exception as e:
+            print(f"Error counting uploads to migrate: {e}")
+            st.session_state.pending_migrations = 0
+    if st.session_state.get('pending_migrations'):
+        st.caption(f"{st.session_state.pending_migrations} upload(s) saved by an older version")
+        if st.button("Migrate Older Uploads", help=f"Migrates up to {MIGRATION_BATCH_SIZE} uploads per click"):
+            with st.spinner("Migrating uploads..."):
+                st.session_state.pending_migrations = migrate_uploads()
+                st.session_state.uploads = load_uploads()
+            st.rerun()
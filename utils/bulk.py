@@ -0,0 +1,89 @@
+"""
+Bulk writes of DataFrames into database tables
+
+Shared by the backend's job results (backend/persistence.py) and the
+Streamlit app's upload line tables (utils/database.py). A frame is converted
+column by column into plain Python values, then written in batches with COPY
+FROM STDIN on PostgreSQL (psycopg2) and with executemany elsewhere. Nothing
+here commits: rows join the caller's transaction.
+"""
+import io
+
+import pandas as pd
+from sqlalchemy import text
+
+def frame_columns(df, columns, fixed=None):
+    """
+    Convert a frame into table columns
+
+    columns maps table column -> (frame column, kind): str columns are
+    stringified like str(value), 'text' columns are stored as they are and
+    'count' columns as int (NaN becomes NULL in both), any other kind is a
+    type to cast to. fixed holds ready-made columns (e.g. the owning job id)
+    that come first. Returns a dict of table column -> list of Python values.
+    """
+    data = dict(fixed or {})
+    for name, (source, kind) in columns.items():
+        values = df[source]
+        if kind is str:
+            data[name] = values.astype(object).map(str).tolist()
+        elif kind == 'text':
+            values = values.astype(object)
+            data[name] = values.where(values.notna(), None).tolist()
+        elif kind == 'count':
+            data[name] = [None if pd.isna(value) else int(value) for value in values.tolist()]
+        else:
+            data[name] = values.astype(kind).tolist()
+    return data
+
+def _batches(data, batch_size):
+    names = list(data)
+    n_rows = len(data[names[0]]) if names else 0
+    for start in range(0, n_rows, batch_size):
+        yield names, zip(*(data[name][start:start + batch_size] for name in names))
+
+def _column_list(names):
+    return ', '.join(f'"{name}"' for name in names)
+
+def insert_rows(connection, table, data, batch_size):
+    """Insert table columns with one executemany per batch"""
+    for names, rows in _batches(data, batch_size):
+        statement = text(
+            f"INSERT INTO {table} ({_column_list(names)}) VALUES ({', '.join(':' + name for name in names)})"
+        )
+        connection.execute(statement, [dict(zip(names, row)) for row in rows])
+
+def csv_value(value):
+    """One COPY CSV field: None is an unquoted empty field (NULL), strings are quoted"""
+    if value is None:
+        return ''
+    if isinstance(value, str):
+        return '"' + value.replace('"', '""') + '"'
+    return repr(value)
+
+def copy_rows(connection, table, data, batch_size):
+    """
+    Insert table columns with COPY FROM STDIN (psycopg2 connections only)
+
+    Rows are sent as CSV in batches of batch_size; unquoted empty fields are
+    NULL and quoted ones are empty strings.
+    """
+    cursor = connection.connection.dbapi_connection.cursor()
+    try:
+        for names, rows in _batches(data, batch_size):
+            buffer = io.StringIO()
+            buffer.writelines(','.join(map(csv_value, row)) + '\n' for row in rows)
+            buffer.seek(0)
+            cursor.copy_expert(f'COPY {table} ({_column_list(names)}) FROM STDIN WITH (FORMAT csv)', buffer)
+    finally:
+        cursor.close()
+
+def supports_copy(connection):
+    return connection.dialect.name == 'postgresql' and connection.dialect.driver == 'psycopg2'
+
+def write_rows(connection, table, data, batch_size):
+    """Write table columns into table (COPY on PostgreSQL, executemany elsewhere)"""
+    if supports_copy(connection):
+        copy_rows(connection, table, data, batch_size)
+    else:
+        insert_rows(connection, table, data, batch_size)
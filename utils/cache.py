@@ -0,0 +1,152 @@
+"""
+Content-addressed cache of parsed upload frames
+
+Parsed transaction frames are stored on disk keyed by the SHA-256 of the
+uploaded bytes, so re-uploading or reprocessing the same file skips parsing.
+Frames are written as uncompressed Feather (Arrow IPC) and memory-mapped on
+load. Object columns that Arrow cannot round-trip exactly (e.g. Bill No
+mixing numbers and text) go to a small pickle sidecar instead. Each file is
+written under a temporary name and renamed into place, the sidecar last; the
+Feather metadata records whether a sidecar belongs to the entry, so an entry
+whose sidecar is not there (yet) is a miss rather than a frame missing columns.
+
+The cache is bounded by PARSE_CACHE_MAX_BYTES; least recently used entries
+are evicted first.
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+from pathlib import Path
+
+import pyarrow as pa
+from pyarrow import feather
+
+from utils.lru import over_budget
+
+CACHE_DIR = Path(os.getenv(
+    "PARSE_CACHE_DIR",
+    Path(__file__).resolve().parent.parent / "data" / "cache"
+))
+CACHE_MAX_BYTES = int(os.getenv("PARSE_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+# Bump when ingestion changes what a parsed frame (or an entry) looks like
+CACHE_VERSION = 3
+
+# Feather schema metadata key: b'1' when the entry has a pickle sidecar
+SIDECAR_KEY = b'sidecar'
+
+_HASH_BLOCK = 1024 * 1024
+
+def content_key(source, *parts):
+    """SHA-256 of the file contents, combined with any extra key parts (e.g. sheet name)"""
+    digest = hashlib.sha256()
+    if hasattr(source, 'read'):
+        source.seek(0)
+        for block in iter(lambda: source.read(_HASH_BLOCK), b''):
+            digest.update(block)
+        source.seek(0)
+    else:
+        with open(source, 'rb') as f:
+            for block in iter(lambda: f.read(_HASH_BLOCK), b''):
+                digest.update(block)
+
+    digest.update(repr((CACHE_VERSION,) + parts).encode())
+    return digest.hexdigest()
+
+def _paths(key):
+    return CACHE_DIR / f"{key}.feather", CACHE_DIR / f"{key}.pkl"
+
+def _arrow_safe(series):
+    """True if the column survives a Feather round trip unchanged"""
+    if series.dtype != object:
+        return True
+    return series.map(type).eq(str).all()
+
+def get_frame(key):
+    """Return the cached frame for key, or None on a miss"""
+    feather_path, sidecar_path = _paths(key)
+    if not feather_path.exists():
+        return None
+
+    try:
+        table = feather.read_table(feather_path, memory_map=True)
+        has_sidecar = (table.schema.metadata or {}).get(SIDECAR_KEY) == b'1'
+        if has_sidecar and not sidecar_path.exists():
+            return None
+        df = table.to_pandas()
+        if has_sidecar:
+            with open(sidecar_path, 'rb') as f:
+                sidecar = pickle.load(f)
+            for col, values in sidecar['columns'].items():
+                df[col] = values
+            df = df[sidecar['order']]
+
+        # Mark as recently used for LRU eviction
+        os.utime(feather_path)
+        return df
+    except Exception as e:
+        print(f"Error reading parse cache entry {key}: {e}")
+        return None
+
+def put_frame(key, df):
+    """Store a frame under key and evict old entries if over budget"""
+    feather_path, sidecar_path = _paths(key)
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+        arrow_cols = [col for col in df.columns if _arrow_safe(df[col])]
+        other_cols = [col for col in df.columns if col not in arrow_cols]
+
+        table = pa.Table.from_pandas(df[arrow_cols].reset_index(drop=True))
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}), SIDECAR_KEY: b'1' if other_cols else b'0'
+        })
+        # Feather file first, then the sidecar it names (a miss until both are in place)
+        _write_replace(feather_path, lambda f: feather.write_feather(table, f, compression='uncompressed'))
+        if other_cols:
+            _write_replace(sidecar_path, lambda f: pickle.dump({
+                'columns': {col: df[col].to_numpy() for col in other_cols},
+                'order': list(df.columns)
+            }, f, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception as e:
+        print(f"Error writing parse cache entry {key}: {e}")
+        return
+
+    evict()
+
+def _write_replace(path, write):
+    """Write a file through write(f) under a temporary name, then rename it to path"""
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", suffix='.tmp', dir=path.parent)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+def evict(max_bytes=CACHE_MAX_BYTES):
+    """Delete least recently used entries until the cache fits in max_bytes"""
+    # The Feather file is written first, so a sidecar without one is an orphan
+    for sidecar_path in CACHE_DIR.glob('*.pkl'):
+        if not sidecar_path.with_suffix('.feather').exists():
+            sidecar_path.unlink(missing_ok=True)
+
+    entries = []
+    for feather_path in CACHE_DIR.glob('*.feather'):
+        sidecar_path = feather_path.with_suffix('.pkl')
+        try:
+            stat = feather_path.stat()
+            size = stat.st_size + (sidecar_path.stat().st_size if sidecar_path.exists() else 0)
+            entries.append((stat.st_mtime, size, (feather_path, sidecar_path)))
+        except FileNotFoundError:
+            continue
+
+    for feather_path, sidecar_path in over_budget(entries, max_bytes):
+        feather_path.unlink(missing_ok=True)
+        sidecar_path.unlink(missing_ok=True)
+
+def clear():
+    """Remove every cache entry"""
+    evict(max_bytes=0)
@@ -3,6 +3,8 @@ Calculation utilities
 """
 import pandas as pd
 from datetime import datetime
+from utils.ingest import load_sales_frame
+from utils.rules import apply_commission_rules
 
 def calculate_incentives(row):
     """Calculate incentive for a single transaction"""
@@ -62,32 +64,24 @@ def calculate_incentives(row):
         'DM Inc Amt': dm_incentive
     })
 
-def process_file(uploaded_file, sheet_name=None):
-    """Process uploaded Excel file"""
-    # Read file - use first sheet if no sheet name specified
-    if sheet_name is None:
-        df = pd.read_excel(uploaded_file, sheet_name=0, header=0)  # Use first sheet
-    else:
-        df = pd.read_excel(uploaded_file, sheet_name=sheet_name, header=0)
-
-    required_cols = [
-        'Store Code', 'Name', 'Sales_Doc', 'Sales Date', 'LOB', 'Bill No', 'Salesman',
-        'Sum of NET SALES VALUE', 'Sum of Sales value Without GST', 'SM', 'DM'
-    ]
-
-    missing_cols = [col for col in required_cols if col not in df.columns]
-    if missing_cols:
-        raise ValueError(f"Missing columns: {missing_cols}")
+def calculate_incentives_vectorized(df, month=None):
+    """
+    Calculate incentives for all transactions at once
 
-    df = df[required_cols].copy()
-    df['Sum of NET SALES VALUE'] = pd.to_numeric(df['Sum of NET SALES VALUE'], errors='coerce').fillna(0)
-    df['Sum of Sales value Without GST'] = pd.to_numeric(df['Sum of Sales value Without GST'], errors='coerce').fillna(0)
+    Applies the same slabs, "No Name" zeroing and DM split as
+    calculate_incentives, but over whole columns using the commission rule
+    version in force for month (YYYY-MM, defaults to the current month).
+    Returns a DataFrame with the four incentive columns, aligned to df.index.
+    """
+    return apply_commission_rules(df, month=month)
 
-    for col in ['Salesman', 'SM', 'DM']:
-        df[col] = df[col].fillna('-')
+def process_file(uploaded_file, sheet_name=None, month=None):
+    """Process uploaded Excel file using the commission rules in force for month (YYYY-MM)"""
+    # Stream only the required columns - use first sheet if no sheet name specified
+    df = load_sales_frame(uploaded_file, sheet_name)
 
     # Calculate incentives
-    incentive_cols = df.apply(calculate_incentives, axis=1)
+    incentive_cols = calculate_incentives_vectorized(df, month)
     df['Ince Amt'] = incentive_cols['Ince Amt']
     df['PE Inc amt'] = incentive_cols['PE Inc amt']
     df['SM Inc Amt'] = incentive_cols['SM Inc Amt']
@@ -95,41 +89,61 @@ def process_file(uploaded_file, sheet_name=None):
 
     return df
 
-def create_employee_summary(df):
-    """Create employee summary"""
-    employees = {}
-
-    for role, col in [('PE', 'Salesman'), ('SM', 'SM'), ('DM', 'DM')]:
-        inc_col = 'PE Inc amt' if role == 'PE' else f'{role} Inc Amt'
-        data = df.groupby(['Store Code', 'Name', col, 'LOB'])[inc_col].sum().reset_index()
-
-        for _, row in data.iterrows():
-            emp = row[col]
-            if emp != '-' and row[inc_col] > 0:
-                key = (row['Store Code'], row['Name'], emp, role)
-                if key not in employees:
-                    employees[key] = {
-                        'Store Code': row['Store Code'],
-                        'Store Name': row['Name'],
-                        'Employee': emp,
-                        'Role': role,
-                        'Furniture Points': 0,
-                        'Homeware Points': 0
-                    }
-                if row['LOB'] == 'Furniture':
-                    employees[key]['Furniture Points'] += row[inc_col]
-                else:
-                    employees[key]['Homeware Points'] += row[inc_col]
-
-    summary_df = pd.DataFrame(list(employees.values()))
-
-    if len(summary_df) > 0:
-        summary_df['Total Points'] = summary_df['Furniture Points'] + summary_df['Homeware Points']
-        summary_df = summary_df.round(2)
-        summary_df = summary_df.sort_values(['Store Name', 'Total Points'], ascending=[True, False])
+EMPLOYEE_KEYS = ['Role', 'Store Code', 'Store Name', 'Employee']
+
+def employee_lob_points(df):
+    """
+    Sum incentive points per employee, role and LOB
+
+    Returns a frame indexed by EMPLOYEE_KEYS + LOB with 'Points' (unrounded,
+    unfiltered) and 'Lines' (contributing transactions), sorted PE, SM, DM.
+    """
+    # Stack the three role columns into one long frame: one row per (transaction, role)
+    long_df = pd.concat([
+        pd.DataFrame({
+            'Store Code': df['Store Code'],
+            'Store Name': df['Name'],
+            'Employee': df[col],
+            'Role': role,
+            'LOB': df['LOB'],
+            'Points': df['PE Inc amt' if role == 'PE' else f'{role} Inc Amt']
+        })
+        for role, col in [('PE', 'Salesman'), ('SM', 'SM'), ('DM', 'DM')]
+    ], ignore_index=True)
+    long_df['Role'] = pd.Categorical(long_df['Role'], categories=['PE', 'SM', 'DM'])
+
+    return long_df.groupby(EMPLOYEE_KEYS + ['LOB'], observed=True).agg(
+        Points=('Points', 'sum'),
+        Lines=('Points', 'size')
+    )
+
+def summarize_employee_points(points):
+    """Turn per-employee/LOB points (see employee_lob_points) into the employee summary"""
+    # Drop placeholders and zero/negative points
+    data = points.reset_index()
+    data = data[(data['Employee'] != '-') & (data['Points'] > 0)]
+
+    # Pivot LOB into columns (anything other than Furniture counts as Homeware)
+    is_furniture = data['LOB'] == 'Furniture'
+    data = data.assign(**{
+        'Furniture Points': data['Points'].where(is_furniture, 0.0),
+        'Homeware Points': data['Points'].where(~is_furniture, 0.0)
+    })
+    summary_df = data.groupby(EMPLOYEE_KEYS, sort=False, observed=True)[
+        ['Furniture Points', 'Homeware Points']
+    ].sum().reset_index()
+    summary_df.insert(3, 'Role', summary_df.pop('Role').astype(str))
+
+    summary_df['Total Points'] = summary_df['Furniture Points'] + summary_df['Homeware Points']
+    summary_df = summary_df.round(2)
+    summary_df = summary_df.sort_values(['Store Name', 'Total Points'], ascending=[True, False])
 
     return summary_df
 
+def create_employee_summary(df):
+    """Create employee summary"""
+    return summarize_employee_points(employee_lob_points(df))
+
 def calculate_qualifier_metrics(df):
     """Calculate AOV and bill counts per store per LOB"""
     metrics = df.groupby(['Name', 'LOB']).agg({
@@ -138,6 +152,33 @@ def calculate_qualifier_metrics(df):
         'Sum of Sales value Without GST': 'sum'  # Keep for reference
     }).reset_index()
 
+    return _finish_qualifier_metrics(metrics)
+
+def qualifier_lob_totals(df):
+    """
+    Building blocks of the qualifier metrics that can be added and subtracted
+
+    Returns:
+        (sales, bills): sales sums and line counts per store/LOB, and line
+        counts per store/LOB/bill (the number of bills is its group count)
+    """
+    sales = df.groupby(['Name', 'LOB']).agg(**{
+        'Sum of NET SALES VALUE': ('Sum of NET SALES VALUE', 'sum'),
+        'Sum of Sales value Without GST': ('Sum of Sales value Without GST', 'sum'),
+        'Lines': ('LOB', 'size')
+    })
+    bills = df.groupby(['Name', 'LOB', 'Bill No'], sort=False).size().rename('Lines')
+    return sales, bills
+
+def qualifier_metrics_from_totals(sales, bills):
+    """Calculate qualifier metrics from qualifier_lob_totals output"""
+    bill_counts = bills.groupby(level=['Name', 'LOB']).size().rename('Bill No')
+    metrics = sales.drop(columns='Lines').join(bill_counts).reset_index()
+    metrics['Bill No'] = metrics['Bill No'].fillna(0).astype(int)
+
+    return _finish_qualifier_metrics(metrics)
+
+def _finish_qualifier_metrics(metrics):
     # AOV uses NET SALES VALUE (with GST)
     metrics['Actual AOV'] = (metrics['Sum of NET SALES VALUE'] / metrics['Bill No']).round(0)
     metrics.rename(columns={
@@ -149,6 +190,25 @@ def calculate_qualifier_metrics(df):
 
     return metrics[['Store Name', 'LOB', 'Actual AOV', 'Actual Bills', 'Total Sales With GST', 'Total Sales Without GST']]
 
+def targets_to_frame(targets_dict):
+    """
+    Flatten nested targets into a tidy frame
+
+    Args:
+        targets_dict: Dict with structure {store_name: {lob: {'aov': X, 'bills': Y}}}
+
+    Returns:
+        DataFrame with 'Store Name', 'LOB', 'Target AOV', 'Target Bills'
+    """
+    return pd.DataFrame(
+        [
+            (store, lob, values['aov'], values['bills'])
+            for store, lobs in targets_dict.items()
+            for lob, values in lobs.items()
+        ],
+        columns=['Store Name', 'LOB', 'Target AOV', 'Target Bills']
+    )
+
 def apply_qualifier_logic(summary_df, qualifier_df, targets_dict):
     """
     Apply qualifier logic to determine final payable incentives
@@ -162,48 +222,29 @@ def apply_qualifier_logic(summary_df, qualifier_df, targets_dict):
         summary_df with 'Final Payable' column added
     """
     summary_df = summary_df.copy()
-    summary_df['Final Payable Furniture'] = 0.0
-    summary_df['Final Payable Homeware'] = 0.0
-    summary_df['Final Payable Total'] = 0.0
-
-    # Build qualification status per store/LOB
-    qualified_stores = {}
-
-    for _, row in qualifier_df.iterrows():
-        store = row['Store Name']
-        lob = row['LOB']
-
-        if store in targets_dict and lob in targets_dict[store]:
-            target_aov = targets_dict[store][lob]['aov']
-            target_bills = targets_dict[store][lob]['bills']
-
-            aov_met = row['Actual AOV'] >= target_aov
-            bills_met = row['Actual Bills'] >= target_bills
-
-            qualified = aov_met and bills_met
 
-            if store not in qualified_stores:
-                qualified_stores[store] = {}
-            qualified_stores[store][lob] = qualified
-
-    # Apply qualifications to employee summary
-    for idx, row in summary_df.iterrows():
-        store = row['Store Name']
-
-        # Check Furniture qualification
-        if store in qualified_stores and 'Furniture' in qualified_stores[store]:
-            if qualified_stores[store]['Furniture']:
-                summary_df.at[idx, 'Final Payable Furniture'] = row['Furniture Points']
-
-        # Check Homeware qualification
-        if store in qualified_stores and 'Homeware' in qualified_stores[store]:
-            if qualified_stores[store]['Homeware']:
-                summary_df.at[idx, 'Final Payable Homeware'] = row['Homeware Points']
-
-        # Calculate total payable
-        summary_df.at[idx, 'Final Payable Total'] = (
-            summary_df.at[idx, 'Final Payable Furniture'] +
-            summary_df.at[idx, 'Final Payable Homeware']
-        )
+    # Build qualification status per store/LOB by joining metrics to targets
+    status = qualifier_df[['Store Name', 'LOB', 'Actual AOV', 'Actual Bills']].drop_duplicates(
+        ['Store Name', 'LOB'], keep='last'
+    ).merge(targets_to_frame(targets_dict), on=['Store Name', 'LOB'], how='inner')
+    status['Qualified'] = (
+        (status['Actual AOV'] >= status['Target AOV']) &
+        (status['Actual Bills'] >= status['Target Bills'])
+    )
+    qualified_stores = status.pivot(index='Store Name', columns='LOB', values='Qualified')
+
+    # Apply qualifications to employee summary (stores without targets get nothing)
+    for lob in ['Furniture', 'Homeware']:
+        if lob in qualified_stores.columns:
+            qualified = summary_df['Store Name'].map(qualified_stores[lob]).eq(True)
+        else:
+            qualified = pd.Series(False, index=summary_df.index)
+        summary_df[f'Final Payable {lob}'] = summary_df[f'{lob} Points'].where(qualified, 0.0).astype(float)
+
+    # Calculate total payable
+    summary_df['Final Payable Total'] = (
+        summary_df['Final Payable Furniture'] +
+        summary_df['Final Payable Homeware']
+    )
 
     return summary_df
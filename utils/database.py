@@ -1,12 +1,193 @@
 """
 Database utility for PostgreSQL operations
 """
+import io
+import json
+import os
+import threading
+import time
+
 import streamlit as st
+import numpy as np
 import pandas as pd
-import json
-from datetime import datetime
-from sqlalchemy import create_engine, text
-from sqlalchemy.pool import NullPool
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import bindparam, create_engine, event, text
+
+from utils.bulk import frame_columns, write_rows
+from utils.lru import SizedLRU
+
+# Memory budget of the process-wide cache of upload frames
+UPLOAD_CACHE_MAX_BYTES = int(os.getenv("UPLOAD_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+# Upload dict key -> (Parquet BYTEA column, legacy JSONB column) it is stored in
+FRAME_COLUMNS = {
+    'transactions_df': ('transactions_parquet', 'transactions_data'),
+    'summary_df': ('summary_parquet', 'summary_data'),
+    'qualifier_df': ('qualifier_parquet', 'qualifier_data')
+}
+
+# Parquet schema metadata key listing the columns stored as JSON text
+JSON_COLUMNS_KEY = b'json_columns'
+
+# Normalized upload-line tables: frame key -> (table, {table column: (frame column, type)}).
+# Column names match the backend's result tables; str columns are stringified,
+# text columns stored as they are (NaN becomes NULL in both).
+LINE_TABLES = {
+    'transactions_df': ('upload_transactions', {
+        'store_code': ('Store Code', str),
+        'store_name': ('Name', 'text'),
+        'sales_doc': ('Sales_Doc', str),
+        'sales_date': ('Sales Date', str),
+        'lob': ('LOB', 'text'),
+        'bill_no': ('Bill No', str),
+        'salesman': ('Salesman', 'text'),
+        'net_sales_value': ('Sum of NET SALES VALUE', float),
+        'sales_without_gst': ('Sum of Sales value Without GST', float),
+        'sm': ('SM', 'text'),
+        'dm': ('DM', 'text'),
+        'ince_amt': ('Ince Amt', float),
+        'pe_inc_amt': ('PE Inc amt', float),
+        'sm_inc_amt': ('SM Inc Amt', float),
+        'dm_inc_amt': ('DM Inc Amt', float)
+    }),
+    'summary_df': ('upload_employee_summary', {
+        'store_code': ('Store Code', str),
+        'store_name': ('Store Name', 'text'),
+        'employee': ('Employee', 'text'),
+        'role': ('Role', 'text'),
+        'furniture_points': ('Furniture Points', float),
+        'homeware_points': ('Homeware Points', float),
+        'total_points': ('Total Points', float)
+    }),
+    'qualifier_df': ('upload_qualifier_metrics', {
+        'store_name': ('Store Name', 'text'),
+        'lob': ('LOB', 'text'),
+        'actual_aov': ('Actual AOV', float),
+        'actual_bills': ('Actual Bills', int),
+        'sales_with_gst': ('Total Sales With GST', float),
+        'sales_without_gst': ('Total Sales Without GST', float)
+    })
+}
+SQL_TYPES = {str: 'TEXT', 'text': 'TEXT', float: 'DOUBLE PRECISION', int: 'INTEGER'}
+
+# Indexes for per-upload store/employee lookups and month listings
+LINE_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_uploads_month_final ON uploads (month, is_final)",
+    "CREATE INDEX IF NOT EXISTS ix_upload_transactions_store ON upload_transactions (upload_id, store_name)",
+    "CREATE INDEX IF NOT EXISTS ix_upload_transactions_salesman ON upload_transactions (upload_id, salesman)",
+    "CREATE INDEX IF NOT EXISTS ix_upload_employee_summary_store ON upload_employee_summary (upload_id, store_name)",
+    "CREATE INDEX IF NOT EXISTS ix_upload_employee_summary_employee ON upload_employee_summary (upload_id, employee)",
+    "CREATE INDEX IF NOT EXISTS ix_upload_qualifier_metrics_store ON upload_qualifier_metrics (upload_id, store_name)"
+]
+
+# Rows per COPY (or executemany) batch when writing upload lines
+LINE_BATCH_SIZE = 50_000
+
+# Uploads saved by older versions brought up to date per migrate_uploads call
+MIGRATION_BATCH_SIZE = 20
+
+# Connection pool settings; each can be overridden under [database] in secrets
+POOL_DEFAULTS = {
+    'pool_size': 5,
+    'max_overflow': 10,
+    'pool_recycle': 1800,  # seconds; stay under server and proxy idle timeouts
+    'pool_timeout': 30,
+    'pool_pre_ping': True
+}
+
+class ConnectionStats:
+    """
+    Counts pool checkouts and times new database connections
+
+    A checkout served from the pool costs nothing; a new connection pays the
+    TCP, TLS and authentication round trips that connect_ms measures.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checkouts = 0
+        self.connections = 0
+        self.connect_seconds = 0.0
+        self.last_connect_seconds = None
+
+    def watch(self, engine):
+        @event.listens_for(engine, "do_connect")
+        def start_connect(dialect, connection_record, cargs, cparams):
+            connection_record.info['connect_started'] = time.perf_counter()
+
+        @event.listens_for(engine, "connect")
+        def end_connect(dbapi_connection, connection_record):
+            started = connection_record.info.pop('connect_started', None)
+            if started is not None:
+                self.record_connect(time.perf_counter() - started)
+
+        @event.listens_for(engine, "checkout")
+        def checkout(dbapi_connection, connection_record, connection_proxy):
+            with self.lock:
+                self.checkouts += 1
+
+    def record_connect(self, seconds):
+        with self.lock:
+            self.connections += 1
+            self.connect_seconds += seconds
+            self.last_connect_seconds = seconds
+
+    def snapshot(self):
+        """Checkouts, new connections and their average/last latency in ms"""
+        with self.lock:
+            return {
+                'checkouts': self.checkouts,
+                'connections': self.connections,
+                'avg_connect_ms': (
+                    round(self.connect_seconds / self.connections * 1000, 1) if self.connections else None
+                ),
+                'last_connect_ms': (
+                    round(self.last_connect_seconds * 1000, 1) if self.last_connect_seconds is not None else None
+                )
+            }
+
+connection_stats = ConnectionStats()
+
+class FrameCache(SizedLRU):
+    """
+    LRU of DataFrames keyed by (upload id, frame name), capped by memory size
+
+    Module state is shared by every Streamlit session in the server process,
+    so sessions opening the same upload fetch and hold its frames once.
+    """
+
+    def __init__(self, max_bytes=UPLOAD_CACHE_MAX_BYTES):
+        super().__init__(max_bytes)
+
+    def put(self, key, frame):
+        # A frame bigger than the whole budget is returned but not kept
+        return super().put(key, frame, int(frame.memory_usage(index=True, deep=True).sum()))
+
+    def discard_upload(self, upload_id):
+        self.discard(lambda key: key[0] == upload_id)
+
+frame_cache = FrameCache()
+
+class StoredUpload(dict):
+    """
+    Upload dict from load_uploads: metadata up front, frames on first access
+
+    upload['summary_df'] etc. go through load_upload_frame (and its cache)
+    instead of being stored in the dict, so evicted frames are freed even
+    while the session keeps its upload list.
+    """
+
+    def __missing__(self, key):
+        if key in FRAME_COLUMNS:
+            return load_upload_frame(self['id'], key)
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in FRAME_COLUMNS or dict.__contains__(self, key)
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
 
 def get_database_url():
     """Get database URL from Streamlit secrets"""
@@ -16,17 +197,35 @@ def get_database_url():
         st.error("⚠️ Database connection not configured. Please add database URL to secrets.")
         st.stop()
 
+def get_pool_settings():
+    """Connection pool settings: POOL_DEFAULTS overridden by keys under [database] in secrets"""
+    try:
+        database = st.secrets["database"]
+    except Exception:
+        database = {}
+    return {name: type(default)(database.get(name, default)) for name, default in POOL_DEFAULTS.items()}
+
+@st.cache_resource(show_spinner=False)
+def _create_engine(url, pool_size, max_overflow, pool_recycle, pool_timeout, pool_pre_ping):
+    """One engine (and connection pool) per URL and settings for the whole server process"""
+    engine = create_engine(
+        url,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_recycle=pool_recycle,
+        pool_timeout=pool_timeout,
+        pool_pre_ping=pool_pre_ping,
+        connect_args={
+            "connect_timeout": 10,
+        }
+    )
+    connection_stats.watch(engine)
+    return engine
+
 def get_db_connection():
-    """Create database engine"""
+    """Get the shared, pooled database engine"""
     try:
-        engine = create_engine(
-            get_database_url(),
-            poolclass=NullPool,
-            connect_args={
-                "connect_timeout": 10,
-            }
-        )
-        return engine
+        return _create_engine(get_database_url(), **get_pool_settings())
     except Exception as e:
         st.error(f"Failed to connect to database: {e}")
         st.stop()
@@ -52,10 +251,47 @@ def init_database():
                 transactions_data JSONB,
                 summary_data JSONB,
                 qualifier_data JSONB,
+                transactions_parquet BYTEA,
+                summary_parquet BYTEA,
+                qualifier_parquet BYTEA,
+                lines_loaded BOOLEAN NOT NULL DEFAULT FALSE,
                 created_at TIMESTAMP DEFAULT NOW()
             )
         """))
 
+        # Tables created before frames were stored as Parquet and in the line
+        # tables (ALTER TABLE locks the table even when there is nothing to add,
+        # so check first)
+        existing = set(conn.execute(text(
+            "SELECT column_name FROM information_schema.columns WHERE table_name = 'uploads'"
+        )).scalars())
+        added_columns = {parquet_column: 'BYTEA' for parquet_column, _ in FRAME_COLUMNS.values()}
+        added_columns['lines_loaded'] = 'BOOLEAN NOT NULL DEFAULT FALSE'
+        for column, column_type in added_columns.items():
+            if column not in existing:
+                conn.execute(text(f"ALTER TABLE uploads ADD COLUMN IF NOT EXISTS {column} {column_type}"))
+
+        # Create upload-line tables (one row per transaction line, employee and
+        # store x LOB of each upload) and their indexes
+        existing_tables = set(conn.execute(text(
+            "SELECT table_name FROM information_schema.tables WHERE table_name IN :tables"
+        ).bindparams(bindparam('tables', expanding=True)), {
+            'tables': [table for table, _ in LINE_TABLES.values()]
+        }).scalars())
+        if len(existing_tables) < len(LINE_TABLES):
+            for table, columns in LINE_TABLES.values():
+                column_defs = "".join(f"{name} {SQL_TYPES[kind]}, " for name, (_, kind) in columns.items())
+                conn.execute(text(f"""
+                    CREATE TABLE IF NOT EXISTS {table} (
+                        upload_id INTEGER NOT NULL REFERENCES uploads(id) ON DELETE CASCADE,
+                        line_no INTEGER NOT NULL,
+                        {column_defs}
+                        PRIMARY KEY (upload_id, line_no)
+                    )
+                """))
+            for statement in LINE_INDEXES:
+                conn.execute(text(statement))
+
         # Create targets table
         conn.execute(text("""
             CREATE TABLE IF NOT EXISTS targets (
@@ -73,25 +309,66 @@ def init_database():
 
         conn.commit()
 
+def _json_value(value):
+    if isinstance(value, np.generic):
+        value = value.item()
+    return json.dumps(value, default=str)
+
+def frame_to_parquet(df):
+    """
+    Serialize a DataFrame (without its index) as zstd-compressed Parquet bytes
+
+    Object columns Arrow cannot type (e.g. Bill No mixing numbers and text)
+    are stored as one JSON value per row, so every value keeps its type.
+    """
+    df = df.reset_index(drop=True)
+    json_columns = []
+    for col in df.columns:
+        if df[col].dtype != object:
+            continue
+        try:
+            pa.array(df[col], from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            json_columns.append(col)
+
+    if json_columns:
+        df = df.assign(**{col: df[col].map(_json_value) for col in json_columns})
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **table.schema.metadata, JSON_COLUMNS_KEY: json.dumps(json_columns).encode()
+    })
+
+    sink = pa.BufferOutputStream()
+    pq.write_table(table, sink, compression='zstd')
+    return sink.getvalue().to_pybytes()
+
+def frame_from_parquet(data):
+    """DataFrame from frame_to_parquet bytes"""
+    table = pq.read_table(pa.BufferReader(data))
+    df = table.to_pandas()
+    for col in json.loads((table.schema.metadata or {}).get(JSON_COLUMNS_KEY, b'[]')):
+        df[col] = df[col].map(json.loads)
+    return df
+
 def save_upload(upload_data):
     """Save upload to database"""
     engine = get_db_connection()
 
-    # Convert DataFrames to JSON
-    transactions_json = upload_data['transactions_df'].to_json(orient='records')
-    summary_json = upload_data['summary_df'].to_json(orient='records')
-    qualifier_json = upload_data['qualifier_df'].to_json(orient='records')
+    # Convert DataFrames to compressed Parquet
+    transactions_parquet = frame_to_parquet(upload_data['transactions_df'])
+    summary_parquet = frame_to_parquet(upload_data['summary_df'])
+    qualifier_parquet = frame_to_parquet(upload_data['qualifier_df'])
 
     with engine.connect() as conn:
         result = conn.execute(text("""
             INSERT INTO uploads (
                 filename, upload_timestamp, month, data_as_of_date, is_final,
                 total_transactions, total_incentives, employees_count, stores_count,
-                transactions_data, summary_data, qualifier_data
+                transactions_parquet, summary_parquet, qualifier_parquet, lines_loaded
             ) VALUES (
                 :filename, :upload_timestamp, :month, :data_as_of_date, :is_final,
                 :total_transactions, :total_incentives, :employees_count, :stores_count,
-                CAST(:transactions_data AS jsonb), CAST(:summary_data AS jsonb), CAST(:qualifier_data AS jsonb)
+                :transactions_parquet, :summary_parquet, :qualifier_parquet, TRUE
             ) RETURNING id
         """), {
             'filename': upload_data['filename'],
@@ -103,23 +380,50 @@ def save_upload(upload_data):
             'total_incentives': float(upload_data['total_incentives']),
             'employees_count': upload_data['employees_count'],
             'stores_count': upload_data['stores_count'],
-            'transactions_data': transactions_json,
-            'summary_data': summary_json,
-            'qualifier_data': qualifier_json
+            'transactions_parquet': transactions_parquet,
+            'summary_parquet': summary_parquet,
+            'qualifier_parquet': qualifier_parquet
         })
+        upload_id = result.fetchone()[0]
+
+        # Lines go in the same transaction, so an upload is saved whole or not at all
+        for name in LINE_TABLES:
+            save_lines(conn, name, upload_data[name], upload_id)
         conn.commit()
-        return result.fetchone()[0]
+        return upload_id
+
+def save_lines(conn, name, df, upload_id):
+    """
+    Write one upload frame into its line table
+
+    Uses COPY FROM STDIN (CSV, in batches of LINE_BATCH_SIZE) on psycopg2 and
+    executemany elsewhere. Runs in the caller's transaction; nothing is committed.
+    """
+    table, columns = LINE_TABLES[name]
+    data = frame_columns(df, columns, {'upload_id': [upload_id] * len(df), 'line_no': list(range(len(df)))})
+    write_rows(conn, table, data, LINE_BATCH_SIZE)
+
+def _to_frame(data):
+    """DataFrame from a JSONB column (psycopg2 returns dicts/lists, other drivers a JSON string)"""
+    if isinstance(data, str):
+        return pd.read_json(io.StringIO(data), orient='records')
+    return pd.DataFrame(data)
 
 def load_uploads():
-    """Load all uploads from database"""
+    """
+    List all uploads from database, newest first
+
+    Only the metadata columns are read. Each upload's transactions_df,
+    summary_df and qualifier_df are fetched the first time they are used
+    (see StoredUpload), so opening the app does not depend on history size.
+    """
     engine = get_db_connection()
 
     with engine.connect() as conn:
         result = conn.execute(text("""
             SELECT
                 id, filename, upload_timestamp, month, data_as_of_date, is_final,
-                total_transactions, total_incentives, employees_count, stores_count,
-                transactions_data, summary_data, qualifier_data
+                total_transactions, total_incentives, employees_count, stores_count, lines_loaded
             FROM uploads
             ORDER BY upload_timestamp DESC
         """))
@@ -127,30 +431,7 @@ def load_uploads():
         uploads = []
         for row in result:
             try:
-                # Convert JSONB (dict/list) back to DataFrames
-                # PostgreSQL JSONB returns Python dict/list, not JSON string
-                transactions_data = row[10]
-                summary_data = row[11]
-                qualifier_data = row[12]
-
-                # If data is already a dict/list, convert directly to DataFrame
-                # If it's a string, parse it first
-                if isinstance(transactions_data, str):
-                    transactions_df = pd.read_json(transactions_data, orient='records')
-                else:
-                    transactions_df = pd.DataFrame(transactions_data)
-
-                if isinstance(summary_data, str):
-                    summary_df = pd.read_json(summary_data, orient='records')
-                else:
-                    summary_df = pd.DataFrame(summary_data)
-
-                if isinstance(qualifier_data, str):
-                    qualifier_df = pd.read_json(qualifier_data, orient='records')
-                else:
-                    qualifier_df = pd.DataFrame(qualifier_data)
-
-                uploads.append({
+                uploads.append(StoredUpload({
                     'id': row[0],
                     'filename': row[1],
                     'timestamp': row[2],
@@ -161,10 +442,8 @@ def load_uploads():
                     'total_incentives': float(row[7]),
                     'employees_count': row[8],
                     'stores_count': row[9],
-                    'transactions_df': transactions_df,
-                    'summary_df': summary_df,
-                    'qualifier_df': qualifier_df
-                })
+                    'lines_loaded': row[10]
+                }))
             except Exception as e:
                 # Log error but continue with other uploads
                 print(f"Error loading upload {row[0]}: {e}")
@@ -172,6 +451,141 @@ def load_uploads():
 
         return uploads
 
+def load_upload_frame(upload_id, name):
+    """
+    One stored frame of an upload ('transactions_df', 'summary_df' or 'qualifier_df')
+
+    Frames are shared through a process-wide cache, so callers must not modify
+    them in place (copy first).
+    """
+    key = (upload_id, name)
+    frame = frame_cache.get(key)
+    if frame is not None:
+        return frame
+
+    parquet_column, json_column = FRAME_COLUMNS[name]
+    engine = get_db_connection()
+    with engine.connect() as conn:
+        parquet_data, json_data = conn.execute(
+            text(f"SELECT {parquet_column}, {json_column} FROM uploads WHERE id = :id"), {'id': upload_id}
+        ).one()
+
+    # Rows not yet migrated by migrate_uploads still have JSON
+    frame = frame_from_parquet(parquet_data) if parquet_data is not None else _to_frame(json_data)
+    frame_cache.put(key, frame)
+    return frame
+
+def upload_sales_total(upload):
+    """Sales value without GST of an upload, summed in SQL when its lines are in the line tables"""
+    if not upload.get('lines_loaded'):
+        return float(upload['transactions_df']['Sum of Sales value Without GST'].sum())
+
+    engine = get_db_connection()
+    with engine.connect() as conn:
+        total = conn.execute(
+            text("SELECT SUM(sales_without_gst) FROM upload_transactions WHERE upload_id = :id"),
+            {'id': upload['id']}
+        ).scalar()
+    return float(total or 0)
+
+def distinct_values(uploads, name, column):
+    """
+    Distinct values of one frame column across uploads (e.g. every employee of a month)
+
+    Uploads whose lines are in the line tables are queried with one SELECT
+    DISTINCT on the (upload_id, ...) indexes; others (e.g. not yet saved)
+    are read from their frames.
+    """
+    table, columns = LINE_TABLES[name]
+    table_column = next(key for key, (source, _) in columns.items() if source == column)
+
+    values = set()
+    stored_ids = [upload['id'] for upload in uploads if upload.get('lines_loaded')]
+    if stored_ids:
+        engine = get_db_connection()
+        with engine.connect() as conn:
+            values.update(conn.execute(
+                text(f"SELECT DISTINCT {table_column} FROM {table} WHERE upload_id IN :ids")
+                .bindparams(bindparam('ids', expanding=True)),
+                {'ids': stored_ids}
+            ).scalars())
+    for upload in uploads:
+        if not upload.get('lines_loaded'):
+            values.update(upload[name][column].values)
+    return values
+
+_migration_lock = threading.Lock()
+
+# Uploads with a frame still stored as JSONB
+_JSON_PENDING = " OR ".join(
+    f"({parquet_column} IS NULL AND {json_column} IS NOT NULL)"
+    for parquet_column, json_column in FRAME_COLUMNS.values()
+)
+
+def pending_migrations():
+    """Number of uploads saved by older versions that migrate_uploads has not finished"""
+    engine = get_db_connection()
+    with engine.connect() as conn:
+        return conn.execute(text(
+            f"SELECT COUNT(*) FROM uploads WHERE NOT lines_loaded OR {_JSON_PENDING}"
+        )).scalar()
+
+def migrate_uploads(limit=MIGRATION_BATCH_SIZE):
+    """
+    Bring up to limit uploads saved by older versions up to date (None = all)
+
+    Frames still stored as JSONB are converted to Parquet (and their JSON
+    cleared), then uploads without line rows get them from their frames.
+    Not run on startup: until an upload is migrated the pages read it through
+    the JSON and frame fallbacks. Run it from the sidebar, a batch at a time,
+    or all at once with `python -m utils.database --migrate`. Each upload is
+    migrated in its own transaction, so an interrupted migration simply
+    continues on the next call. Returns the number of uploads still pending.
+    """
+    with _migration_lock:
+        _migrate_frames(limit)
+        _load_missing_lines(limit)
+    return pending_migrations()
+
+def _migrate_frames(limit):
+    engine = get_db_connection()
+    with engine.connect() as conn:
+        upload_ids = conn.execute(text(f"SELECT id FROM uploads WHERE {_JSON_PENDING} ORDER BY id")).scalars().all()
+
+    for upload_id in upload_ids[:limit]:
+        try:
+            with engine.begin() as conn:
+                for parquet_column, json_column in FRAME_COLUMNS.values():
+                    json_data = conn.execute(
+                        text(f"SELECT {json_column} FROM uploads WHERE id = :id AND {parquet_column} IS NULL"),
+                        {'id': upload_id}
+                    ).scalar()
+                    if json_data is None:
+                        continue
+                    conn.execute(
+                        text(f"UPDATE uploads SET {parquet_column} = :data, {json_column} = NULL WHERE id = :id"),
+                        {'id': upload_id, 'data': frame_to_parquet(_to_frame(json_data))}
+                    )
+        except Exception as e:
+            print(f"Error migrating upload {upload_id} to Parquet: {e}")
+
+def _load_missing_lines(limit):
+    engine = get_db_connection()
+    with engine.connect() as conn:
+        upload_ids = conn.execute(text("SELECT id FROM uploads WHERE NOT lines_loaded ORDER BY id")).scalars().all()
+
+    for upload_id in upload_ids[:limit]:
+        try:
+            # Read before the transaction starts, so it does not hold a second connection
+            frames = {name: load_upload_frame(upload_id, name) for name in LINE_TABLES}
+            with engine.begin() as conn:
+                for name, (table, _) in LINE_TABLES.items():
+                    conn.execute(text(f"DELETE FROM {table} WHERE upload_id = :id"), {'id': upload_id})
+                    save_lines(conn, name, frames[name], upload_id)
+                conn.execute(text("UPDATE uploads SET lines_loaded = TRUE WHERE id = :id"), {'id': upload_id})
+        except Exception as e:
+            print(f"Error loading lines of upload {upload_id}: {e}")
+
 def save_targets(month, store_name, lob, target_aov, target_bills):
     """Save or update target in database"""
     engine = get_db_connection()
@@ -194,6 +608,69 @@ def save_targets(month, store_name, lob, target_aov, target_bills):
         })
         conn.commit()
 
+def changed_targets(month_targets, saved_targets=None):
+    """
+    (store_name, lob, aov, bills) rows of month_targets that differ from saved_targets
+
+    Both are {store: {lob: {'aov', 'bills'}}} dicts as in load_targets; with no
+    saved_targets every row counts as changed.
+    """
+    saved_targets = saved_targets or {}
+    rows = []
+    for store_name, lobs in month_targets.items():
+        for lob, values in lobs.items():
+            row = (store_name, lob, float(values['aov']), int(values['bills']))
+            saved = saved_targets.get(store_name, {}).get(lob)
+            if saved is None or (float(saved['aov']), int(saved['bills'])) != row[2:]:
+                rows.append(row)
+    return rows
+
+def save_targets_bulk(month, month_targets, saved_targets=None):
+    """
+    Save a month's targets in one upsert statement and transaction
+
+    Only rows that changed versus saved_targets (what was last loaded or
+    saved) are sent, and rows whose stored values are already equal are not
+    rewritten, so updated_at only moves for real changes.
+
+    Args:
+        month: Target month (YYYY-MM)
+        month_targets: {store: {lob: {'aov', 'bills'}}} to save
+        saved_targets: The same structure as currently stored, if known
+
+    Returns:
+        Number of rows sent to the database
+    """
+    rows = changed_targets(month_targets, saved_targets)
+    if not rows:
+        return 0
+
+    params = {'month': month}
+    values = []
+    for i, (store_name, lob, target_aov, target_bills) in enumerate(rows):
+        values.append(f"(:month, :store_name_{i}, :lob_{i}, :target_aov_{i}, :target_bills_{i}, NOW())")
+        params.update({
+            f'store_name_{i}': store_name,
+            f'lob_{i}': lob,
+            f'target_aov_{i}': target_aov,
+            f'target_bills_{i}': target_bills
+        })
+
+    engine = get_db_connection()
+    with engine.begin() as conn:
+        conn.execute(text(f"""
+            INSERT INTO targets (month, store_name, lob, target_aov, target_bills, updated_at)
+            VALUES {", ".join(values)}
+            ON CONFLICT (month, store_name, lob)
+            DO UPDATE SET
+                target_aov = EXCLUDED.target_aov,
+                target_bills = EXCLUDED.target_bills,
+                updated_at = NOW()
+            WHERE targets.target_aov IS DISTINCT FROM EXCLUDED.target_aov
+               OR targets.target_bills IS DISTINCT FROM EXCLUDED.target_bills
+        """), params)
+    return len(rows)
+
 def load_targets():
     """Load all targets from database"""
     engine = get_db_connection()
@@ -232,3 +709,19 @@ def delete_upload(upload_id):
     with engine.connect() as conn:
         conn.execute(text("DELETE FROM uploads WHERE id = :id"), {'id': upload_id})
         conn.commit()
+
+    frame_cache.discard_upload(upload_id)
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Migrate uploads saved by older versions (database URL from secrets)")
+    parser.add_argument('--migrate', action='store_true', help="convert JSONB frames to Parquet and fill the line tables")
+    parser.add_argument('--batch', type=int, default=None, help="migrate at most this many uploads (default: all)")
+    args = parser.parse_args()
+
+    if args.migrate:
+        init_database()
+        print(f"{migrate_uploads(args.batch)} upload(s) still pending")
+    else:
+        print(f"{pending_migrations()} upload(s) pending; run with --migrate to migrate them")
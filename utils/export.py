@@ -0,0 +1,106 @@
+"""
+Excel export
+
+Workbooks are written with XlsxWriter in constant_memory mode: every row is
+flushed to a temporary file as soon as it is complete, so memory stays flat
+however many rows the Detailed Transactions sheet has. Each column is
+converted once (missing values to empty cells, timestamps to datetimes) and
+written with the writer method for its type, instead of dispatching on the
+type of every cell; cell formats are created once per workbook.
+"""
+import io
+from datetime import date, datetime
+
+import pandas as pd
+import xlsxwriter
+
+DATETIME_FORMAT = 'yyyy-mm-dd hh:mm:ss'
+DATE_FORMAT = 'yyyy-mm-dd'
+
+WORKBOOK_OPTIONS = {
+    'constant_memory': True,
+    # Write text exactly as it is, as pandas does
+    'strings_to_formulas': False,
+    'strings_to_urls': False,
+    'nan_inf_to_errors': True
+}
+
+def _values(series):
+    """Column values as a list, with None for missing values"""
+    return series.astype(object).where(series.notna(), None).tolist()
+
+def _column_writer(worksheet, series, formats):
+    """(write method, values, cell format) for one column"""
+    kind = series.dtype.kind
+    if kind == 'b':
+        return worksheet.write_boolean, _values(series) if series.hasnans else series.tolist(), None
+    if kind in 'iu':
+        return worksheet.write_number, _values(series) if series.hasnans else series.tolist(), None
+    if kind == 'f':
+        return worksheet.write_number, _values(series), None
+    if kind == 'M':
+        if series.dt.tz is not None:
+            series = series.dt.tz_localize(None)
+        return worksheet.write_datetime, _values(series), formats['datetime']
+    if pd.api.types.is_string_dtype(series.dtype) and kind != 'O':
+        return worksheet.write_string, _values(series), None
+
+    # Mixed object columns: let XlsxWriter pick per value, giving dates a format
+    def write_value(row, col, value, cell_format=None):
+        if isinstance(value, datetime):
+            return worksheet.write_datetime(row, col, value, formats['datetime'])
+        if isinstance(value, date):
+            return worksheet.write_datetime(row, col, value, formats['date'])
+        return worksheet.write(row, col, value)
+    return write_value, _values(series), None
+
+def write_sheet(workbook, name, df, formats):
+    """Write one DataFrame (without its index) as a sheet, row by row"""
+    worksheet = workbook.add_worksheet(name)
+    for col, column in enumerate(df.columns):
+        worksheet.write_string(0, col, str(column), formats['header'])
+
+    columns = []
+    for col, column in enumerate(df.columns):
+        write, values, cell_format = _column_writer(worksheet, df.iloc[:, col], formats)
+        if cell_format is not None:
+            worksheet.set_column(col, col, 19)
+        columns.append((col, write, values, cell_format))
+
+    # constant_memory needs rows in order, so write across columns one row at a time
+    for row in range(len(df)):
+        for col, write, values, cell_format in columns:
+            value = values[row]
+            if value is None:
+                continue
+            if cell_format is None:
+                write(row + 1, col, value)
+            else:
+                write(row + 1, col, value, cell_format)
+    return worksheet
+
+def write_workbook(target, sheets):
+    """
+    Write DataFrames to an .xlsx workbook
+
+    Args:
+        target: File path or binary file object (e.g. io.BytesIO)
+        sheets: Sheet name -> DataFrame, in sheet order
+    """
+    workbook = xlsxwriter.Workbook(target, WORKBOOK_OPTIONS)
+    formats = {
+        'header': workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'}),
+        'datetime': workbook.add_format({'num_format': DATETIME_FORMAT}),
+        'date': workbook.add_format({'num_format': DATE_FORMAT})
+    }
+    try:
+        for name, df in sheets.items():
+            write_sheet(workbook, name, df, formats)
+    finally:
+        workbook.close()
+
+def workbook_bytes(sheets):
+    """The .xlsx workbook for sheets as bytes (for download buttons)"""
+    output = io.BytesIO()
+    write_workbook(output, sheets)
+    return output.getvalue()
@@ -0,0 +1,130 @@
+"""
+Incremental processing of month-to-date snapshots
+
+Stores upload cumulative snapshots every day. Instead of recomputing the
+whole month, a new snapshot is diffed against the previous upload of the same
+month on (Sales_Doc, Bill No, LOB): unchanged lines keep their incentives,
+only new or changed lines are calculated, and the employee summary and
+qualifier metrics are updated by adding the new lines' totals and subtracting
+the removed ones.
+"""
+import numpy as np
+import pandas as pd
+
+from utils.calculator import (
+    calculate_incentives_vectorized, employee_lob_points, summarize_employee_points,
+    qualifier_lob_totals, qualifier_metrics_from_totals
+)
+from utils.ingest import REQUIRED_COLUMNS, identifiers_as_text, load_sales_frame
+
+KEY_COLUMNS = ['Sales_Doc', 'Bill No', 'LOB']
+INCENTIVE_COLUMNS = ['Ince Amt', 'PE Inc amt', 'SM Inc Amt', 'DM Inc Amt']
+
+def _numbered_lines(df, row_label):
+    """Input columns plus a per-key occurrence number, so repeated keys pair up in order"""
+    lines = df[REQUIRED_COLUMNS].reset_index(drop=True)
+    lines['_occurrence'] = lines.groupby(KEY_COLUMNS, dropna=False, sort=False).cumcount()
+    lines[row_label] = np.arange(len(lines))
+    return lines
+
+def diff_snapshots(previous_df, current_df):
+    """
+    Match the lines of two snapshots
+
+    A line is unchanged only if its key and every input column match; a
+    changed line shows up as removed (old version) plus added (new version).
+
+    Returns:
+        (matched, added, removed): matched is a frame of (current row,
+        previous row) positions; added/removed are row positions in
+        current_df/previous_df
+    """
+    merged = _numbered_lines(current_df, '_current').merge(
+        _numbered_lines(previous_df, '_previous'),
+        on=REQUIRED_COLUMNS + ['_occurrence'],
+        how='outer',
+        indicator=True
+    )
+    matched = merged.loc[merged['_merge'] == 'both', ['_current', '_previous']].astype(int)
+    added = np.sort(merged.loc[merged['_merge'] == 'left_only', '_current'].to_numpy(dtype=int))
+    removed = np.sort(merged.loc[merged['_merge'] == 'right_only', '_previous'].to_numpy(dtype=int))
+    return matched, added, removed
+
+def build_state(df):
+    """Additive totals behind the employee summary and qualifier metrics"""
+    sales, bills = qualifier_lob_totals(df)
+    return {
+        'points': employee_lob_points(df),
+        'sales': sales,
+        'bills': bills
+    }
+
+def _combine(total, added, removed):
+    """total + added - removed, dropping groups that no longer have any lines"""
+    levels = list(range(total.index.nlevels))
+    combined = pd.concat([total, added, -removed]).groupby(level=levels, sort=False, observed=True).sum()
+    if isinstance(combined, pd.Series):
+        # Bill counts: order does not matter (and mixed-type bill numbers cannot be sorted)
+        return combined[combined > 0]
+    return combined[combined['Lines'] > 0].sort_index()
+
+def update_state(state, added_df, removed_df):
+    """Apply a snapshot delta to a state from build_state"""
+    added, removed = build_state(added_df), build_state(removed_df)
+    return {key: _combine(state[key], added[key], removed[key]) for key in state}
+
+def results_from_state(state):
+    """Employee summary and qualifier metrics for a state"""
+    summary_df = summarize_employee_points(state['points'])
+    qualifier_df = qualifier_metrics_from_totals(state['sales'], state['bills'])
+    return summary_df, qualifier_df
+
+def process_snapshot(uploaded_file, previous=None, sheet_name=None, month=None):
+    """
+    Process a month-to-date snapshot, reusing the previous upload where possible
+
+    Args:
+        uploaded_file: Sales file (path or file-like)
+        previous: Previous upload dict of the same month (transactions_df and
+            optionally state), or None for a full calculation
+        sheet_name: Sheet to read for workbooks (first sheet by default)
+        month: Month (YYYY-MM) selecting the commission rules
+
+    Returns:
+        Dict with transactions_df, summary_df, qualifier_df, state and the
+        number of added, removed and unchanged lines
+    """
+    current = load_sales_frame(uploaded_file, sheet_name)
+
+    if previous is None:
+        df = current.join(calculate_incentives_vectorized(current, month))
+        state = build_state(df)
+        added, removed, unchanged = len(df), 0, 0
+    else:
+        # Uploads saved by older versions may still have numeric identifiers
+        previous_df = identifiers_as_text(previous['transactions_df'].reset_index(drop=True))
+        state = previous.get('state') or build_state(previous_df)
+        matched, added_rows, removed_rows = diff_snapshots(previous_df, current)
+
+        # Unchanged lines keep their incentives, only new/changed lines are calculated
+        incentives = np.zeros((len(current), len(INCENTIVE_COLUMNS)))
+        incentives[matched['_current'].to_numpy()] = (
+            previous_df[INCENTIVE_COLUMNS].to_numpy(dtype=float)[matched['_previous'].to_numpy()]
+        )
+        added_df = current.iloc[added_rows]
+        incentives[added_rows] = calculate_incentives_vectorized(added_df, month).to_numpy()
+
+        df = current.join(pd.DataFrame(incentives, columns=INCENTIVE_COLUMNS, index=current.index))
+        state = update_state(state, df.iloc[added_rows], previous_df.iloc[removed_rows])
+        added, removed, unchanged = len(added_rows), len(removed_rows), len(matched)
+
+    summary_df, qualifier_df = results_from_state(state)
+    return {
+        'transactions_df': df,
+        'summary_df': summary_df,
+        'qualifier_df': qualifier_df,
+        'state': state,
+        'added_lines': added,
+        'removed_lines': removed,
+        'unchanged_lines': unchanged
+    }
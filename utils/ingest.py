@@ -0,0 +1,322 @@
+"""
+Streaming ingestion of BI sales exports
+
+Supports .xlsx, CSV, Parquet and Arrow IPC, detected from the file's magic
+bytes. For every format the header is read and validated first, then only
+the required columns are streamed in fixed-size chunks.
+
+Workbooks are read in openpyxl read-only mode, with cell values converted
+the same way pd.read_excel converts them, so the resulting frame matches the
+old read-everything-then-select path. The one exception is IDENTIFIER_COLUMNS,
+which are always text: types inferred chunk by chunk would make the same bill
+number an int in one chunk and a str in another (e.g. Bill No mixing 2600002
+and 4PBN01), so it would be counted twice.
+"""
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.cell.cell import ERROR_CODES
+from pandas.io.parsers import TextParser
+
+from utils import cache as parse_cache
+
+REQUIRED_COLUMNS = [
+    'Store Code', 'Name', 'Sales_Doc', 'Sales Date', 'LOB', 'Bill No', 'Salesman',
+    'Sum of NET SALES VALUE', 'Sum of Sales value Without GST', 'SM', 'DM'
+]
+
+# Read as text in every chunk and every format (missing values stay NaN);
+# numeric cells read as they display, e.g. 2600002.0 becomes '2600002'
+IDENTIFIER_COLUMNS = ['Store Code', 'Bill No', 'Sales_Doc', 'Salesman', 'SM', 'DM']
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+# Leading bytes of each supported binary format (anything else is parsed as CSV)
+MAGIC_BYTES = [
+    (b'PK\x03\x04', 'xlsx'),
+    (b'PAR1', 'parquet'),
+    (b'ARROW1', 'arrow'),
+    (b'\xff\xff\xff\xff', 'arrow_stream'),
+    (b'\xd0\xcf\x11\xe0', 'xls'),
+]
+
+SUPPORTED_EXTENSIONS = ['.xlsx', '.csv', '.parquet', '.arrow', '.feather']
+
+def detect_format(source):
+    """Detect the file format from its first bytes ('xlsx', 'parquet', 'arrow', 'arrow_stream' or 'csv')"""
+    if hasattr(source, 'read'):
+        source.seek(0)
+        head = source.read(8)
+        source.seek(0)
+    else:
+        with open(source, 'rb') as f:
+            head = f.read(8)
+
+    if isinstance(head, str):
+        return 'csv'
+    for magic, file_format in MAGIC_BYTES:
+        if head.startswith(magic):
+            if file_format == 'xls':
+                raise ValueError("Legacy .xls files are not supported, please save as .xlsx")
+            return file_format
+    return 'csv'
+
+def missing_columns(header, required_cols=REQUIRED_COLUMNS):
+    """Return required columns that are not in the header"""
+    return [col for col in required_cols if col not in header]
+
+def _open_sheet(source, sheet_name=None):
+    """Open a workbook in read-only mode and return (workbook, worksheet)"""
+    if hasattr(source, 'seek'):
+        source.seek(0)
+
+    wb = load_workbook(source, read_only=True, data_only=True, keep_links=False)
+    if sheet_name is None or isinstance(sheet_name, int):
+        ws = wb.worksheets[sheet_name or 0]
+    elif sheet_name in wb.sheetnames:
+        ws = wb[sheet_name]
+    else:
+        wb.close()
+        raise ValueError(f"Worksheet named '{sheet_name}' not found")
+    return wb, ws
+
+def _convert_cell(value):
+    """Convert a cell value the way pandas' openpyxl reader does"""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str) and value in ERROR_CODES:
+        return float('nan')
+    return value
+
+def _identifier_dtypes(columns):
+    return {col: str for col in IDENTIFIER_COLUMNS if col in columns}
+
+def identifiers_as_text(df):
+    """
+    Convert the identifier columns of an already typed frame to text, in place
+
+    For Parquet/Arrow chunks, and for frames saved before identifiers were
+    text (so they still compare equal to freshly loaded ones).
+    """
+    for col in _identifier_dtypes(df.columns):
+        df[col] = df[col].astype(object).map(lambda value: str(_convert_cell(value)), na_action='ignore')
+    return df
+
+def _is_blank(values):
+    return all(v is None or v == '' for v in values)
+
+def _iter_rows(ws):
+    """Return (header, iterator over the remaining rows), skipping leading blank rows"""
+    rows = ws.iter_rows(values_only=True)
+    for header in rows:
+        if not _is_blank(header):
+            return list(header), rows
+    return [], rows
+
+def _header_names(header):
+    """Header cells as pandas would name them (blank cells become 'Unnamed: N')"""
+    return [
+        f'Unnamed: {i}' if value is None or value == '' else value
+        for i, value in enumerate(header)
+    ]
+
+def _read_excel_header(source, sheet_name=None):
+    wb, ws = _open_sheet(source, sheet_name)
+    try:
+        header, _ = _iter_rows(ws)
+        return _header_names(header)
+    finally:
+        wb.close()
+
+def _read_excel_preview(source, sheet_name=None, nrows=5):
+    wb, ws = _open_sheet(source, sheet_name)
+    try:
+        header, rows = _iter_rows(ws)
+        data = []
+        for values in rows:
+            if len(data) >= nrows:
+                break
+            data.append([_convert_cell(v) for v in values])
+    finally:
+        wb.close()
+
+    names = _header_names(header)
+    if not data:
+        return pd.DataFrame(columns=names)
+    return TextParser(data, header=None, names=names, dtype=_identifier_dtypes(names)).read()
+
+def _iter_excel_chunks(source, sheet_name, chunk_size, required_cols):
+    wb, ws = _open_sheet(source, sheet_name)
+    try:
+        header, rows = _iter_rows(ws)
+        header = _header_names(header)
+
+        missing_cols = missing_columns(header, required_cols)
+        if missing_cols:
+            raise ValueError(f"Missing columns: {missing_cols}")
+
+        # Keep only the required columns (first occurrence wins) from each streamed row
+        positions = [header.index(col) for col in required_cols]
+
+        chunk = []
+        pending_blank = 0
+        for values in rows:
+            # Trailing blank rows are dropped (as pandas does); inner ones are kept
+            if _is_blank(values):
+                pending_blank += 1
+                continue
+            if pending_blank:
+                chunk.extend([None] * len(positions) for _ in range(pending_blank))
+                pending_blank = 0
+            chunk.append([values[i] if i < len(values) else None for i in positions])
+
+            if len(chunk) >= chunk_size:
+                yield _to_frame(chunk[:chunk_size], required_cols)
+                chunk = chunk[chunk_size:]
+
+        if chunk:
+            yield _to_frame(chunk, required_cols)
+    finally:
+        wb.close()
+
+def _read_csv(source, **kwargs):
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return pd.read_csv(source, encoding='utf-8-sig', **kwargs)
+
+def _iter_csv_chunks(source, chunk_size, required_cols):
+    missing_cols = missing_columns(list(_read_csv(source, nrows=0).columns), required_cols)
+    if missing_cols:
+        raise ValueError(f"Missing columns: {missing_cols}")
+
+    with _read_csv(
+        source, usecols=required_cols, dtype=_identifier_dtypes(required_cols), chunksize=chunk_size
+    ) as reader:
+        for chunk in reader:
+            yield chunk[required_cols]
+
+def _open_arrow(source, file_format):
+    """Open a Parquet or Arrow IPC source; returns (column names, batch iterator factory)"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if hasattr(source, 'seek'):
+        source.seek(0)
+        source = pa.BufferReader(source.read())
+    elif file_format != 'parquet':
+        source = pa.memory_map(str(source))
+
+    if file_format == 'parquet':
+        parquet_file = pq.ParquetFile(source)
+        return parquet_file.schema_arrow.names, lambda columns, size: parquet_file.iter_batches(size, columns=columns)
+
+    if file_format == 'arrow':
+        reader = pa.ipc.open_file(source)
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    else:
+        reader = pa.ipc.open_stream(source)
+        batches = iter(reader)
+    return reader.schema.names, lambda columns, size: (
+        batch.select(columns) for batch in batches
+    )
+
+def _iter_arrow_chunks(source, file_format, chunk_size, required_cols):
+    import pyarrow as pa
+
+    names, iter_batches = _open_arrow(source, file_format)
+    missing_cols = missing_columns(names, required_cols)
+    if missing_cols:
+        raise ValueError(f"Missing columns: {missing_cols}")
+
+    for batch in iter_batches(required_cols, chunk_size):
+        # IPC batches keep their written size, so re-slice them to chunk_size
+        for start in range(0, batch.num_rows, chunk_size):
+            yield identifiers_as_text(pa.Table.from_batches([batch.slice(start, chunk_size)]).to_pandas())
+
+def read_header(source, sheet_name=None):
+    """Read only the header row of the sheet (or the column names of a CSV/Parquet/Arrow file)"""
+    file_format = detect_format(source)
+    if file_format == 'xlsx':
+        return _read_excel_header(source, sheet_name)
+    if file_format == 'csv':
+        return list(_read_csv(source, nrows=0).columns)
+    return _open_arrow(source, file_format)[0]
+
+def read_preview(source, sheet_name=None, nrows=5):
+    """Read the header and the first nrows rows, all columns"""
+    file_format = detect_format(source)
+    if file_format == 'xlsx':
+        return _read_excel_preview(source, sheet_name, nrows)
+    if file_format == 'csv':
+        header = list(_read_csv(source, nrows=0).columns)
+        return _read_csv(source, nrows=nrows, dtype=_identifier_dtypes(header))
+
+    import pyarrow as pa
+
+    names, iter_batches = _open_arrow(source, file_format)
+    preview = next(iter(iter_batches(names, nrows)), None)
+    if preview is None:
+        return pd.DataFrame(columns=names)
+    return identifiers_as_text(pa.Table.from_batches([preview.slice(0, nrows)]).to_pandas())
+
+def iter_sales_chunks(source, sheet_name=None, chunk_size=DEFAULT_CHUNK_SIZE, required_cols=REQUIRED_COLUMNS):
+    """
+    Stream the required columns of a sales file in chunks
+
+    The format is detected from the file's magic bytes; sheet_name only
+    applies to workbooks. The header is validated before any data row is
+    read, so a file with missing columns fails fast with the same
+    ValueError as the full parse.
+
+    Yields:
+        DataFrames of at most chunk_size rows with only required_cols
+    """
+    file_format = detect_format(source)
+    if file_format == 'xlsx':
+        return _iter_excel_chunks(source, sheet_name, chunk_size, required_cols)
+    if file_format == 'csv':
+        return _iter_csv_chunks(source, chunk_size, required_cols)
+    return _iter_arrow_chunks(source, file_format, chunk_size, required_cols)
+
+def _to_frame(rows, columns):
+    """Parse raw cell rows into a typed DataFrame (pandas' inference, identifiers as text)"""
+    data = [[_convert_cell(v) for v in row] for row in rows]
+    return TextParser(data, header=None, names=columns, dtype=_identifier_dtypes(columns)).read()
+
+def prepare_sales_frame(df):
+    """Coerce sales values to numbers and fill blank role columns with '-'"""
+    df['Sum of NET SALES VALUE'] = pd.to_numeric(df['Sum of NET SALES VALUE'], errors='coerce').fillna(0)
+    df['Sum of Sales value Without GST'] = pd.to_numeric(df['Sum of Sales value Without GST'], errors='coerce').fillna(0)
+
+    for col in ['Salesman', 'SM', 'DM']:
+        df[col] = df[col].fillna('-')
+
+    return df
+
+def load_sales_frame(source, sheet_name=None, chunk_size=DEFAULT_CHUNK_SIZE, use_cache=True):
+    """
+    Load the required columns of a sales file, typed and cleaned
+
+    Each chunk is typed as it arrives, so only one chunk of raw cell values
+    is held in memory at a time. Parsed frames are cached by content hash,
+    so loading the same file again skips parsing entirely.
+    """
+    key = parse_cache.content_key(source, sheet_name) if use_cache else None
+    if key:
+        cached = parse_cache.get_frame(key)
+        if cached is not None:
+            return cached
+
+    chunks = [
+        prepare_sales_frame(chunk)
+        for chunk in iter_sales_chunks(source, sheet_name, chunk_size)
+    ]
+    if chunks:
+        df = pd.concat(chunks, ignore_index=True)
+    else:
+        df = prepare_sales_frame(pd.DataFrame(columns=REQUIRED_COLUMNS).astype(_identifier_dtypes(REQUIRED_COLUMNS)))
+
+    if key:
+        parse_cache.put_frame(key, df)
+    return df
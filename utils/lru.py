@@ -0,0 +1,90 @@
+"""
+Size-capped least-recently-used caches
+
+SizedLRU is the in-memory cache behind the upload frame cache, the API
+response cache and the frontend's conditional-request cache: entries are
+charged their size in bytes and the least recently used are dropped once the
+total goes over max_bytes. over_budget applies the same policy to caches
+whose entries live elsewhere (e.g. files on disk).
+"""
+import threading
+from collections import OrderedDict
+
+class SizedLRU:
+    """
+    LRU mapping capped by the total size of its values
+
+    Values larger than max_item_bytes (default: the whole budget) are not
+    kept. Safe to share between threads.
+    """
+
+    def __init__(self, max_bytes, max_item_bytes=None):
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_bytes if max_item_bytes is None else max_item_bytes
+        self.size = 0
+        self.entries = OrderedDict()  # key -> (value, nbytes)
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, default=None):
+        """The value for key (marking it most recently used), or default"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return default
+            self.entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value, nbytes):
+        """Store value under key, evicting older entries; False if it is too big to keep"""
+        with self.lock:
+            self._pop(key)
+            if nbytes > self.max_item_bytes:
+                return False
+            self.entries[key] = (value, nbytes)
+            self.size += nbytes
+            while self.size > self.max_bytes:
+                self._pop(next(iter(self.entries)))
+            return key in self.entries
+
+    def pop(self, key, default=None):
+        """Remove key and return its value, or default"""
+        with self.lock:
+            entry = self._pop(key)
+            return default if entry is None else entry[0]
+
+    def discard(self, predicate):
+        """Remove every entry whose key satisfies predicate"""
+        with self.lock:
+            for key in [key for key in self.entries if predicate(key)]:
+                self._pop(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def _pop(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[1]
+        return entry
+
+def over_budget(entries, max_bytes):
+    """
+    The entries to drop, least recently used first, to fit in max_bytes
+
+    entries is an iterable of (last_used, nbytes, item) tuples; returns the
+    items to remove.
+    """
+    entries = sorted(entries, key=lambda entry: entry[0])
+    total = sum(entry[1] for entry in entries)
+    dropped = []
+    for _, nbytes, item in entries:
+        if total <= max_bytes:
+            break
+        dropped.append(item)
+        total -= nbytes
+    return dropped
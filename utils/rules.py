@@ -0,0 +1,149 @@
+"""
+Commission rule tables
+
+Slabs and role splits live in commission_rules.json as data, one version per
+effective month. A version is compiled once into NumPy lookup arrays and then
+evaluated over a whole DataFrame with searchsorted.
+"""
+import json
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+RULES_FILE = Path(__file__).parent / 'commission_rules.json'
+
+ROLES = ['PE', 'SM', 'DM']
+
+_versions = None
+_compiled = {}
+
+def load_rule_versions(path=RULES_FILE):
+    """Load all rule versions, oldest first"""
+    with open(path, encoding='utf-8') as f:
+        versions = json.load(f)['versions']
+    return sorted(versions, key=lambda v: v['effective_from'])
+
+def get_rule_version(month=None, versions=None):
+    """
+    Get the rule version in force for a month
+
+    Args:
+        month: Month in YYYY-MM format (defaults to the current month)
+        versions: Rule versions to pick from (defaults to commission_rules.json)
+    """
+    global _versions
+    if versions is None:
+        if _versions is None:
+            _versions = load_rule_versions()
+        versions = _versions
+
+    month = month or datetime.now().strftime("%Y-%m")
+    in_force = [v for v in versions if v['effective_from'] <= month]
+    if not in_force:
+        raise ValueError(f"No commission rules in force for {month}")
+    return in_force[-1]
+
+def compile_rules(version):
+    """
+    Compile one rule version into lookup arrays
+
+    Each LOB becomes (edges, rates): a value falls in slab
+    np.searchsorted(edges, value, side='right'). Slabs whose upper bound is
+    inclusive get their edge nudged up to the next float, so "<= 40000" and
+    "< 20000" can both be answered by a single searchsorted call.
+    """
+    lobs = {}
+    for lob, slabs in version['lobs'].items():
+        if 'up_to' in slabs[-1]:
+            raise ValueError(f"{lob}: last slab must be open-ended (no 'up_to')")
+
+        edges = []
+        for slab in slabs[:-1]:
+            edge = float(slab['up_to'])
+            if slab.get('inclusive', True):
+                edge = np.nextafter(edge, np.inf)
+            edges.append(edge)
+
+        edges = np.array(edges, dtype=float)
+        if np.any(np.diff(edges) <= 0):
+            raise ValueError(f"{lob}: slab thresholds must be strictly increasing")
+
+        lobs[lob] = (edges, np.array([slab['rate'] for slab in slabs], dtype=float))
+
+    splits = version['splits']
+    return {
+        'effective_from': version['effective_from'],
+        'lobs': lobs,
+        'default_rate': float(version.get('default_rate', 0.0)),
+        # Row 0 = without DM, row 1 = with DM; columns follow ROLES
+        'splits': np.array([
+            [splits['without_dm'].get(role, 0.0) for role in ROLES],
+            [splits['with_dm'].get(role, 0.0) for role in ROLES]
+        ], dtype=float),
+        'unpaid_salesmen': list(version.get('unpaid_salesmen', []))
+    }
+
+def get_rules(month=None):
+    """Get compiled rules for a month (each version is compiled only once)"""
+    version = get_rule_version(month)
+    key = version['effective_from']
+    if key not in _compiled:
+        _compiled[key] = compile_rules(version)
+    return _compiled[key]
+
+def apply_commission_rules(df, rules=None, month=None, zero_unnamed=True):
+    """
+    Calculate the four incentive columns for a whole DataFrame
+
+    Args:
+        df: Transactions with LOB, Salesman, DM and both sales value columns
+        rules: Compiled rules (defaults to the version in force for month)
+        month: Month in YYYY-MM format used to pick the rule version
+        zero_unnamed: Pay nobody when the salesman is one of unpaid_salesmen
+
+    Returns:
+        DataFrame with 'Ince Amt', 'PE Inc amt', 'SM Inc Amt', 'DM Inc Amt'
+    """
+    if rules is None:
+        rules = get_rules(month)
+
+    sales_with_gst = df['Sum of NET SALES VALUE'].to_numpy(dtype=float)
+    sales_without_gst = df['Sum of Sales value Without GST'].to_numpy(dtype=float)
+    lob = df['LOB'].to_numpy()
+
+    # Slab lookup per LOB
+    commission_rate = np.full(len(df), rules['default_rate'])
+    for lob_name, (edges, rates) in rules['lobs'].items():
+        mask = lob == lob_name
+        if mask.any():
+            commission_rate[mask] = rates[np.searchsorted(edges, sales_with_gst[mask], side='right')]
+
+    total_incentive = sales_without_gst * commission_rate
+
+    # If salesperson is "No Name" or blank, NOBODY gets paid
+    if zero_unnamed:
+        if 'Salesman' in df.columns:
+            salesman = df['Salesman'].astype(str).str.strip()
+            unpaid = salesman.isin(rules['unpaid_salesmen']).to_numpy()
+        else:
+            unpaid = np.ones(len(df), dtype=bool)
+        total_incentive = np.where(unpaid, 0.0, total_incentive)
+
+    if 'DM' in df.columns:
+        dm_value = df['DM'].astype(str).str.strip()
+        has_dm = (~dm_value.isin(['-', ''])).to_numpy()
+    else:
+        has_dm = np.zeros(len(df), dtype=bool)
+
+    # Split based on DM presence (a zero share is paid as exactly 0.0)
+    split = rules['splits'][has_dm.astype(int)]
+    role_incentives = np.where(split == 0, 0.0, total_incentive[:, None] * split)
+
+    return pd.DataFrame({
+        'Ince Amt': total_incentive,
+        'PE Inc amt': role_incentives[:, 0],
+        'SM Inc Amt': role_incentives[:, 1],
+        'DM Inc Amt': role_incentives[:, 2]
+    }, index=df.index)
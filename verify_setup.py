@@ -27,6 +27,7 @@ def check_packages():
         'streamlit',
         'pandas',
         'openpyxl',
+        'xlsxwriter',
         'plotly',
         'requests'
     ]